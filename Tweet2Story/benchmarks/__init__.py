@@ -0,0 +1,6 @@
+"""
+    Benchmarks for the text2story package.
+
+    Run them from the Tweet2Story directory, for instance:
+        python -m benchmarks.entity_memory
+"""
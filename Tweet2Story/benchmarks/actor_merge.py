@@ -0,0 +1,174 @@
+"""
+    Benchmark of the combination of the actors identified by several tools (text2story.core.utils.merge_actors)
+
+    The actors are synthetic: each tool annotates the same sequence of entities, with jittered character spans,
+    random POS and NE labels and some entities missed or split in two.
+    The result is checked against the previous implementation (nested scan over the tools and list.count votes).
+
+    Usage (from the Tweet2Story directory):
+        python -m benchmarks.actor_merge --spans 100000 --tools 3
+"""
+
+import argparse
+import random
+import time
+
+from text2story.core.utils import merge_actors
+
+POS_TAGS = ['Noun', 'Noun', 'Pronoun', 'UNDEF']
+NE_TAGS = ['Per', 'Org', 'Loc', 'Other', 'Other', 'Date']
+
+
+def synthetic_annotations(nr_spans, nr_tools, seed=0):
+    """
+    @param nr_spans: Number of actors identified by each tool (approximately)
+    @param nr_tools: Number of tools
+    @param seed: Seed of the random generator
+    @return: List with the actors identified by each tool, sorted by character span, and the text length
+    """
+    rng = random.Random(seed)
+
+    entities, offset = [], 0
+    for _ in range(nr_spans):
+        offset += rng.randint(1, 20)
+        length = rng.randint(1, 15)
+        entities.append((offset, offset + length))
+        offset += length
+
+    annotations = []
+    for _ in range(nr_tools):
+        tool_annotations = []
+        for start, end in entities:
+            if rng.random() < 0.05:  # Missed entity
+                continue
+
+            start = max(0, start + rng.randint(-1, 1))
+            end = max(start + 1, end + rng.randint(-1, 1))
+            if end - start > 4 and rng.random() < 0.05:  # Entity split in two
+                middle = (start + end) // 2
+                spans = [(start, middle), (middle + 1, end)]
+            else:
+                spans = [(start, end)]
+
+            for span in spans:
+                tool_annotations.append((span, rng.choice(POS_TAGS), rng.choice(NE_TAGS)))
+
+        tool_annotations.sort(key=lambda actor: actor[0])
+        annotations.append(tool_annotations)
+
+    return annotations, offset + 1
+
+
+def legacy_merge_actors(annotations, text_length):
+    """
+    Previous implementation of the combination (Annotator.extract_actors), kept as the reference.
+    """
+    text = range(text_length)  # Only len(text) is used
+
+    nr_tools = len(annotations)
+
+    final_annotation = []
+
+    idxs = [0] * nr_tools # Current actor position from each tool
+
+    while not(all([len(annotations[i]) == idxs[i] for i in range(nr_tools)])): # We finish when we consumed every actor identified by every tool
+        tool_id = -1
+        tool_id_start_char_offset = len(text) # len(self.text) acting as infinite
+
+        # Get the next entity chunk to be gather (the one with the lowest start character span)
+        for i in range(nr_tools):
+            if idxs[i] < len(annotations[i]):
+                current_actor = annotations[i][idxs[i]]
+                current_actor_start_character_span = current_actor[0][0]
+
+                if current_actor_start_character_span < tool_id_start_char_offset:
+                    tool_id = i
+                    tool_id_start_char_offset = current_actor_start_character_span
+
+
+        # For now, our actor consists of a unique annotation made by some tool
+        actor_start_character_offset = annotations[tool_id][idxs[tool_id]][0][0]
+        actor_end_character_offset   = annotations[tool_id][idxs[tool_id]][0][1]
+        # For the lexical head and type we will accumulate the results and latter choose the best following a criterion
+        actor_lexical_heads          = [annotations[tool_id][idxs[tool_id]][1]]
+        actor_types                  = [annotations[tool_id][idxs[tool_id]][2]]
+
+        idxs[tool_id] += 1 # Consume the annotation
+
+        # Other tools may have identified the same actor.
+        # We need to search if theres some intersection in the span of the identified actor, with the other tools.
+        # That is, they identified the same actor, but maybe missed some initial part of it.
+        # We identify this situation by looking to the character start char offset of the current actor identified by each tool,
+        # and if it happens to be less than our end char offset of our current identified actor, then we can extend the current information we have.
+        # Note that we may extend the end char offset, each force us to repete this process, till the offsets stabilize.
+
+        # In the first interation, the tool that first identified the actor, will be matched and add double information and we don't want that
+        # If we get to a second iteration, then that means the actor end char offset was extended which, in that case, the tool that first identified the actor, may now extend also...
+        first_iteration = True
+        while True:
+            flag = False
+            for i in range(nr_tools):
+                if first_iteration and i == tool_id:
+                    continue
+
+                if idxs[i] < len(annotations[i]):
+                    if annotations[i][idxs[i]][0][0] <= actor_end_character_offset:
+                        if actor_end_character_offset < annotations[i][idxs[i]][0][1]:
+                            actor_end_character_offset = annotations[i][idxs[i]][0][1]
+                            flag = True
+
+                        actor_lexical_heads.append(annotations[i][idxs[i]][1])
+                        actor_types.append(annotations[i][idxs[i]][2])
+                        idxs[i] = idxs[i] + 1
+
+            first_iteration = False
+            if not(flag):
+                break
+
+        # Now that we identified the larger span possible for the actor, we need to fix the lexical head and type.
+
+        # For the POS tag, we favor specifics the 'Noun' and 'Pronoun' tag and then we take the most common.
+        # Since we only defined this labels, the others will appear as 'UNDEF'
+        rmv_undef_pos_tags = [ne for ne in actor_lexical_heads if ne != 'UNDEF']
+        if rmv_undef_pos_tags:
+            actor_lexical_head = max(rmv_undef_pos_tags, key=rmv_undef_pos_tags.count)
+        else:
+            continue # Discard the actor if it's lexical head isn't a 'Noun' or 'Pronoun'
+
+        # For the NE, we also favor specifics NEs, in this case all labels versus the NE 'OTHER' and we take the most common.
+        rmv_other_ne = [ne for ne in actor_types if ne != 'Other']
+        if rmv_other_ne:
+            actor_type = max(rmv_other_ne, key=rmv_other_ne.count)
+        else:
+            actor_type = 'Other'
+
+        # Discard entities with types other than 'Per', 'Org', 'Loc', 'Obj', 'Nat' & 'Other'.
+        # Used, typically, to eliminate dates and durations incorrectly identified as an actor.
+        if actor_type in ['Per', 'Org', 'Loc', 'Obj', 'Nat', 'Other']:
+            final_annotation.append(((actor_start_character_offset, actor_end_character_offset), actor_lexical_head, actor_type))
+
+    return final_annotation
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the combination of the actors of several tools")
+    parser.add_argument("--spans", type=int, default=100000, help="Number of actors identified by each tool")
+    parser.add_argument("--tools", type=int, default=3, help="Number of tools")
+    args = parser.parse_args()
+
+    annotations, text_length = synthetic_annotations(args.spans, args.tools)
+    print(f"Tools: {args.tools} - {sum(len(tool) for tool in annotations)} annotations")
+
+    start = time.perf_counter()
+    legacy = legacy_merge_actors(annotations, text_length)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = merge_actors(annotations)
+    merged_time = time.perf_counter() - start
+
+    assert merged == legacy, "The combination differs from the previous implementation"
+
+    print(f"Actors: {len(merged)} (identical to the previous implementation)")
+    print(f"Previous implementation - {legacy_time:.3f} seconds")
+    print(f"merge_actors            - {merged_time:.3f} seconds ({legacy_time / merged_time:.2f}x)")
@@ -0,0 +1,124 @@
+"""
+    Memory benchmark of the entity and link layouts (ActorEntity, ... vs CompactActorEntity, ...)
+
+    The entities and links are built from the gold annotations dataset (dataset/news_gold_annotations).
+    The news texts aren't in the dataset, so each text is rebuilt from the spans of its annotations.
+
+    Usage (from the Tweet2Story directory):
+        python -m benchmarks.entity_memory --copies 100
+"""
+
+import argparse
+import glob
+import os
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+from text2story.core.entity_structures import ActorEntity, TimeEntity, EventEntity
+from text2story.core.entity_structures import CompactActorEntity, CompactTimeEntity, CompactEventEntity
+from text2story.core.link_structures import SemanticRoleLink, ObjectalLink
+from text2story.core.link_structures import CompactSemanticRoleLink, CompactObjectalLink
+
+GOLD_DIR = os.path.join(Path(__file__).parent.parent.parent, "dataset", "news_gold_annotations")
+
+
+def read_gold_annotation(path):
+    """
+    @param path: Path of a brat (.ann) file
+    @return: The rebuilt text and the lists of actors, times, events, semantic role links and objectal links,
+    as tuples with the values needed to build the entities and links
+    """
+    spans = {}
+    actors, times, events, sem_links, obj_links = [], [], [], [], []
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 2:
+                continue
+
+            if fields[0].startswith("T"):
+                # T11	EVENT 107 113;118 122	chased down (discontinuous spans are merged into one)
+                label, offsets = fields[1].split(" ", 1)
+                offsets = offsets.replace(";", " ").split(" ")
+                start, end = int(offsets[0]), int(offsets[-1])
+                spans[(start, end)] = fields[2] if len(fields) > 2 else ""
+                if label == "ACTOR":
+                    actors.append(((start, end), "Noun", "Other"))
+                elif label == "TIME_X3":
+                    times.append(((start, end), "XXXX-XX-XX", "Date"))
+                elif label == "EVENT":
+                    events.append((start, end))
+            elif fields[0].startswith("R"):
+                # R18	SEMROLE_agent Arg1:E3 Arg2:T3 (some files separate the arguments with tabs)
+                label, arg1, arg2 = " ".join(fields[1:]).split()[:3]
+                if label.startswith("SEMROLE_"):
+                    sem_links.append((arg2[5:], arg1[5:], label[8:]))
+                elif label.startswith("OBJ_REL_"):
+                    obj_links.append((arg1[5:], arg2[5:]))
+
+    chars = [" "] * max((end for _, end in spans), default=0)
+    for (start, end), text in spans.items():
+        chars[start:end] = text[:end - start].ljust(end - start)
+
+    return "".join(chars), actors, times, events, sem_links, obj_links
+
+
+def build_dict_layout(narrative, actors, times, events, sem_links, obj_links):
+    text = narrative.text
+    return (
+        [ActorEntity(text[s:e], (s, e), head, actor_type) for (s, e), head, actor_type in actors],
+        [TimeEntity(text[s:e], (s, e), value, time_type) for (s, e), value, time_type in times],
+        [EventEntity(text[s:e], (s, e)) for s, e in events],
+        [SemanticRoleLink(actor, event, sem_type) for actor, event, sem_type in sem_links],
+        [ObjectalLink(arg1, arg2) for arg1, arg2 in obj_links],
+    )
+
+
+def build_compact_layout(narrative, actors, times, events, sem_links, obj_links):
+    return (
+        [CompactActorEntity(narrative, span, head, actor_type) for span, head, actor_type in actors],
+        [CompactTimeEntity(narrative, span, value, time_type) for span, value, time_type in times],
+        [CompactEventEntity(narrative, (s, e)) for s, e in events],
+        [CompactSemanticRoleLink(actor, event, sem_type) for actor, event, sem_type in sem_links],
+        [CompactObjectalLink(arg1, arg2) for arg1, arg2 in obj_links],
+    )
+
+
+def measure(build, documents, copies):
+    """
+    @return: The memory allocated (bytes) by the structures built with 'build' for every document, 'copies' times
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    kept = [build(narrative, *annotations) for _ in range(copies) for narrative, annotations in documents]
+
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    del kept
+    return allocated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compares the memory used by the entity and link layouts")
+    parser.add_argument("--copies", type=int, default=100,
+                        help="Number of times the gold dataset is kept in memory (simulates many narratives)")
+    args = parser.parse_args()
+
+    documents = []
+    for path in sorted(glob.glob(os.path.join(GOLD_DIR, "*.ann"))):
+        text, *annotations = read_gold_annotation(path)
+        documents.append((SimpleNamespace(text=text), annotations))
+
+    nr_objects = args.copies * sum(len(structures) for _, annotations in documents for structures in annotations)
+
+    dict_layout = measure(build_dict_layout, documents, args.copies)
+    compact_layout = measure(build_compact_layout, documents, args.copies)
+
+    print(f"Documents: {len(documents)} x {args.copies} copies - {nr_objects} entities and links")
+    print(f"Dict layout    - {dict_layout / 2 ** 20:8.2f} MiB ({dict_layout / nr_objects:6.1f} bytes/object)")
+    print(f"Compact layout - {compact_layout / 2 ** 20:8.2f} MiB ({compact_layout / nr_objects:6.1f} bytes/object)")
+    print(f"Ratio          - {dict_layout / compact_layout:.2f}x")
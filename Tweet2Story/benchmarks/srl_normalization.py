@@ -0,0 +1,169 @@
+"""
+    Benchmark of the normalization of the SRL frames (text2story.annotators.ALLENNLP tag matrices)
+
+    The predictor outputs are synthetic, with the structure of the AllenNLP SRL predictor: the words of each sentence
+    and, for each frame (verb), a BIO tag per word (the verb, arguments ARG0-2, references, continuations
+    and modifiers ARGM-X around it, and O everywhere else).
+    The result of every sentence is checked against the previous implementation (a pandas DataFrame per sentence,
+    sorted and normalized column by column), which is kept here as the reference.
+
+    Usage (from the Tweet2Story directory):
+        python -m benchmarks.srl_normalization --sentences 2000 --frames 4
+"""
+
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+import pandas as pd
+
+from text2story.annotators.ALLENNLP import _find_events, _find_actors, _run_srl_pipeline, _tag_matrices, \
+    SRL_TYPE_MAPPING
+
+ARGUMENTS = ['ARG0', 'ARG1', 'ARG1', 'ARG2', 'R-ARG0', 'C-ARG1'] + ['ARGM-' + role for role in SRL_TYPE_MAPPING]
+
+
+def synthetic_predictions(nr_sentences, max_frames, seed=0):
+    """
+    @param nr_sentences: Number of sentences
+    @param max_frames: Maximum number of frames of a sentence
+    @param seed: Seed of the random generator
+    @return: The text and the output of the SRL predictor for each of its sentences
+    """
+    rng = random.Random(seed)
+
+    sentences, srl = [], []
+    for _ in range(nr_sentences):
+        words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 8)))
+                 for _ in range(rng.randint(4, 30))]
+
+        frames = []
+        for _ in range(rng.randint(0, max_frames)):
+            tags = ['O'] * len(words)
+            verb = rng.randrange(len(words))
+            tags[verb] = 'B-V'
+            if verb + 1 < len(words) and rng.random() < 0.2:
+                tags[verb + 1] = 'I-V'
+
+            # Arguments before and after the verb
+            for start, end in ((max(0, verb - rng.randint(1, 6)), verb), (verb + 2, verb + 2 + rng.randint(1, 6))):
+                position = start
+                while position < min(end, len(words)):
+                    length = rng.randint(1, 3)
+                    argument = rng.choice(ARGUMENTS)
+                    for i in range(position, min(position + length, end, len(words))):
+                        tags[i] = ('B-' if i == position else 'I-') + argument
+                    position += length + rng.randint(0, 1)
+
+            frames.append({"verb": words[verb], "description": "", "tags": tags})
+
+        sentences.append(' '.join(words))
+        srl.append({"words": words, "verbs": frames})
+
+    return '\n'.join(sentences), srl
+
+
+def legacy_normalize_sent_tags(sentence_df):
+    """
+    Previous normalization (DataFrame columns sorted in descending order), kept as the reference.
+    """
+    normalized_tags, begin_tags = [], []
+    for col in np.arange(len(sentence_df.columns)):
+        word_vals = sentence_df.iloc[:, col]
+
+        word_vals = word_vals[word_vals != "O"]
+        if word_vals.shape[0] == 1:
+            normalized_tags.append(word_vals.iloc[0])
+            begin_tags.append(word_vals.iloc[0].startswith("B"))
+            continue
+        verb_words = word_vals[word_vals.isin(["I-V", "B-V"])]
+        if verb_words.shape[0] != 0:
+            normalized_tags.append(verb_words.iloc[0])
+            begin_tags.append(False)
+            continue
+        arg_words = word_vals[word_vals.str.contains(r".*[ARG][0-9]|ARGM")]
+        normalized_tags.append(arg_words.iloc[-1])
+        begin_tags.append(arg_words.iloc[-1].startswith("B"))
+
+    return normalized_tags, begin_tags
+
+
+def legacy_sentence_df(sentence):
+    """
+    Previous tag DataFrame of a sentence with frames (a row per frame, a column per word), without the words
+    tagged O in every frame and with each column sorted in descending order, kept as the reference.
+    """
+    sentence_df = pd.DataFrame(columns=sentence["words"])
+    for i, frame in zip(np.arange(len(sentence["verbs"])), sentence["verbs"]):
+        sentence_df.loc[i] = frame["tags"]
+
+    oov_mask = []
+    for name, values in sentence_df.items():
+        oov_mask.append(any(~(values == "O")))
+    sentence_df = sentence_df.loc[:, oov_mask]
+
+    return sentence_df.apply(lambda x: x.sort_values(ascending=False).values)
+
+
+def legacy_pipeline(srl):
+    """
+    Previous SRL post-processing of the sentences with frames, without the character spans:
+    @return: List with the actors (words, semantic role) of each sentence
+    """
+    result = []
+    for sentence in srl:
+        if not sentence["verbs"]:
+            continue
+
+        sentence_df = legacy_sentence_df(sentence)
+        normalized_tags, begin_tags = legacy_normalize_sent_tags(sentence_df)
+        event_tags = _find_events(normalized_tags, verb_tags=["B-V", "I-V"], event_threshold=3)
+        actor_tags = _find_actors(begin_tags, event_tags)
+        df = pd.DataFrame({"tag": normalized_tags, "actor": actor_tags}, index=sentence_df.columns)
+
+        actors = []
+        for actor in df["actor"].unique():
+            rows = df[df["actor"] == actor]
+            tags = rows["tag"]
+            if actor.startswith("EVENT"):
+                sem_role_type = "EVENT"
+            elif any(tag.endswith("ARG0") for tag in tags):
+                sem_role_type = "AGENT"
+            elif any("ARGM" in tag for tag in tags):
+                sem_role_type = SRL_TYPE_MAPPING[[tag for tag in tags if "ARGM" in tag][0].split("-")[-1]]
+            else:
+                sem_role_type = "THEME"
+            actors.append((' '.join(rows.index), sem_role_type))
+
+        result.append(actors)
+
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the normalization of the SRL frames")
+    parser.add_argument("--sentences", type=int, default=2000, help="Number of sentences")
+    parser.add_argument("--frames", type=int, default=4, help="Maximum number of frames of a sentence")
+    args = parser.parse_args()
+
+    text, srl = synthetic_predictions(args.sentences, args.frames)
+    print(f"Predictions: {len(srl)} sentences, {sum(len(sentence['verbs']) for sentence in srl)} frames")
+
+    start = time.perf_counter()
+    legacy = legacy_pipeline(srl)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    srl_by_sentence = _run_srl_pipeline([_tag_matrices(srl)], [text])[0]
+    matrix_time = time.perf_counter() - start
+
+    result = [[(actor.actor, actor.sem_role_type) for actor in actors] for actors in srl_by_sentence]
+    if result != legacy:
+        different = sum(actors != legacy_actors for actors, legacy_actors in zip(result, legacy))
+        raise AssertionError(f"The tag matrices differ from the previous implementation in {different} sentences")
+
+    print(f"Previous implementation - {legacy_time:.3f} seconds")
+    print(f"Tag matrices            - {matrix_time:.3f} seconds, same actors and roles "
+          f"({legacy_time / matrix_time:.2f}x)")
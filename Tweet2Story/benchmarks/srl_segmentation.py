@@ -0,0 +1,165 @@
+"""
+    Benchmark of the segmentation of the SRL tags in events and actors
+    (text2story.annotators.ALLENNLP._find_events_batch and _find_actors_batch)
+
+    The sentences are synthetic sequences of normalized SRL tags (verbs, arguments and modifiers, B and I tags),
+    and some empty sentences.
+    The events and actors of every sentence are checked against the previous implementation
+    (a stateful Python loop over the words), which is kept here as the reference.
+
+    Usage (from the Tweet2Story directory):
+        python -m benchmarks.srl_segmentation --sentences 20000
+"""
+
+import argparse
+import random
+import time
+from itertools import zip_longest
+
+import numpy as np
+
+from text2story.annotators.ALLENNLP import _find_events, _find_actors, _find_events_batch, _find_actors_batch
+
+TAGS = ['V', 'V', 'ARG0', 'ARG1', 'ARG1', 'ARG2', 'R-ARG0', 'ARGM-TMP', 'ARGM-LOC', 'ARGM-MOD', 'ARGM-NEG']
+VERB_TAGS = ["B-V", "I-V"]
+EVENT_THRESHOLD = 3
+
+
+def synthetic_sentences(nr_sentences, seed=0):
+    """
+    @param nr_sentences: Number of sentences
+    @param seed: Seed of the random generator
+    @return: List with the normalized tags and the begin tags of each sentence
+    (with some empty sentences, the last one included)
+    """
+    rng = random.Random(seed)
+
+    sentences = []
+    for _ in range(nr_sentences):
+        if rng.random() < 0.02:
+            sentences.append(([], []))
+            continue
+
+        tags = []
+        while len(tags) < rng.randint(3, 30):
+            role = rng.choice(TAGS)
+            tags.extend(('B-' if i == 0 else 'I-') + role for i in range(rng.randint(1, 3)))
+
+        begin_tags = [tag.startswith('B') for tag in tags]
+        sentences.append((tags, begin_tags))
+
+    sentences.append(([], []))
+
+    return sentences
+
+
+def legacy_find_events(normalized_tags, verb_tags, event_threshold=2):
+    """
+    Previous _find_events, kept as the reference.
+    """
+    event_tags = []
+    event_continue, event_begin = False, False
+    for i, tag in zip_longest(np.arange(len(normalized_tags) - event_threshold), normalized_tags):
+        if i is not None:
+            if ("ARGM" in tag) & (normalized_tags[i + 1] in verb_tags):
+                event_tags.append(True)
+                event_begin = True
+                continue
+
+        if event_continue:
+            event_tags.append(True)
+        elif tag in verb_tags:
+            event_tags.append(True)
+            event_begin = True
+        else:
+            event_tags.append(False)
+
+        if i is not None:
+            conds = []
+            for j in np.arange(1, event_threshold + 1):
+                conds.append(normalized_tags[i + j] in verb_tags)
+
+            if event_begin & any(conds):
+                event_continue = True
+            else:
+                event_continue = False
+                event_begin = False
+        else:
+            event_continue = False
+            event_begin = False
+
+    return event_tags
+
+
+def legacy_find_actors(begin_tags, event_tags):
+    """
+    Previous _find_actors, kept as the reference.
+    """
+    actor, i, actor_tags, event, is_event = False, 0, [], 1, False
+    for btag, etag in zip(begin_tags, event_tags):
+        if etag:
+            is_event = True
+        elif (not etag) & is_event:
+            is_event = False
+            event += 1
+
+        if btag & (not etag):
+            actor = True
+            i += 1
+            actor_tags.append("T" + str(i))
+            continue
+
+        if etag:
+            actor_tags.append("EVENT" + str(event))
+            actor = False
+            continue
+
+        if (not btag) & actor:
+            actor_tags.append("T" + str(i))
+        else:
+            actor_tags.append(actor_tags[-1])
+
+    return actor_tags
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the segmentation of the SRL tags in events and actors")
+    parser.add_argument("--sentences", type=int, default=20000, help="Number of sentences")
+    args = parser.parse_args()
+
+    sentences = synthetic_sentences(args.sentences)
+    print(f"Sentences: {len(sentences)}, {sum(len(tags) for tags, _ in sentences)} words")
+
+    start = time.perf_counter()
+    legacy = []
+    for tags, begin_tags in sentences:
+        event_tags = legacy_find_events(tags, VERB_TAGS, EVENT_THRESHOLD)
+        legacy.append((event_tags, legacy_find_actors(begin_tags, event_tags)))
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    by_sentence = []
+    for tags, begin_tags in sentences:
+        event_tags = _find_events(tags, VERB_TAGS, EVENT_THRESHOLD)
+        by_sentence.append((event_tags, _find_actors(begin_tags, event_tags)))
+    by_sentence_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    events_batch = _find_events_batch([tags for tags, _ in sentences], VERB_TAGS, EVENT_THRESHOLD)
+    batch = list(zip(events_batch, _find_actors_batch([begin_tags for _, begin_tags in sentences], events_batch)))
+    batch_time = time.perf_counter() - start
+
+    for name, result in (('sentence by sentence', by_sentence), ('batch', batch)):
+        different = sum(sentence != legacy_sentence for sentence, legacy_sentence in zip(result, legacy))
+        if different:
+            raise AssertionError(f"The segmentation ({name}) differs from the previous one in {different} "
+                                 f"sentences")
+
+    def per_sentence(seconds):
+        return f"{seconds / len(sentences) * 1e6:.1f} microseconds per sentence"
+
+    print(f"Previous implementation  - {per_sentence(legacy_time)}")
+    print(f"Loops, by sentence       - {per_sentence(by_sentence_time)}, same events and actors "
+          f"({legacy_time / by_sentence_time:.2f}x)")
+    print(f"Vectorized, all at once  - {per_sentence(batch_time)}, same events and actors "
+          f"({legacy_time / batch_time:.2f}x)")
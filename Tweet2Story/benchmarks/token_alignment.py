@@ -0,0 +1,94 @@
+"""
+    Benchmark of the alignment of tokens with the text (text2story.core.utils.align_tokens)
+
+    The document is synthetic: random words, punctuation, quotes and brackets separated by whitespace.
+    The tokens are those of a PTB-like tokenizer: quotes and brackets normalized ('``', "''", '-LRB-', ...)
+    and, optionally, some tokens the tokenizer made up (not in the text).
+    Each alignment is compared with the real spans of the tokens, against the previous approach
+    (text.find(token, offset) token by token).
+
+    Usage (from the Tweet2Story directory):
+        python -m benchmarks.token_alignment --tokens 300000 --unmatched 0.001
+"""
+
+import argparse
+import random
+import string
+import time
+
+from text2story.core.utils import align_tokens
+
+NORMALIZED = {'"': ['``', "''"], '(': ['-LRB-'], ')': ['-RRB-'], '[': ['-LSB-'], ']': ['-RSB-']}
+
+
+def synthetic_document(nr_tokens, normalized, unmatched, seed=0):
+    """
+    @param nr_tokens: Number of tokens of the document
+    @param normalized: Fraction of the tokens that are quotes or brackets (normalized by the tokenizer)
+    @param unmatched: Fraction of tokens made up by the tokenizer (not in the text)
+    @param seed: Seed of the random generator
+    @return: The text, its tokens and the real span of each token (None for the made up ones)
+    """
+    rng = random.Random(seed)
+
+    parts, tokens, spans, offset = [], [], [], 0
+    for _ in range(nr_tokens):
+        if rng.random() < unmatched:
+            tokens.append(''.join(rng.choice(string.ascii_uppercase) for _ in range(6)))
+            spans.append(None)
+            continue
+
+        if rng.random() < normalized:
+            word = rng.choice(list(NORMALIZED))
+            token = rng.choice(NORMALIZED[word])
+        else:
+            word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 10)))
+            token = word
+
+        space = rng.choice([' ', ' ', ' ', '  ', '\n'])
+        parts.append(word + space)
+        tokens.append(token)
+        spans.append((offset, offset + len(word)))
+        offset += len(word) + len(space)
+
+    return ''.join(parts), tokens, spans
+
+
+def legacy_alignment(text, tokens):
+    """
+    Previous approach of the annotators, kept as the reference.
+    """
+    char_offset = 0
+    spans = []
+    for token in tokens:
+        char_offset = text.find(token, char_offset)
+        spans.append((char_offset, char_offset + len(token)))
+        char_offset += len(token)
+
+    return spans
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the alignment of tokens with the text")
+    parser.add_argument("--tokens", type=int, default=300000, help="Number of tokens of the document")
+    parser.add_argument("--normalized", type=float, default=0.02, help="Fraction of quotes and brackets")
+    parser.add_argument("--unmatched", type=float, default=0.001, help="Fraction of tokens not in the text")
+    args = parser.parse_args()
+
+    text, tokens, real_spans = synthetic_document(args.tokens, args.normalized, args.unmatched)
+    print(f"Document: {len(text)} characters, {len(tokens)} tokens")
+
+    start = time.perf_counter()
+    legacy = legacy_alignment(text, tokens)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aligned = align_tokens(text, tokens)
+    aligned_time = time.perf_counter() - start
+
+    def correct(spans):
+        return sum(span == real for span, real in zip(spans, real_spans))
+
+    print(f"Previous approach - {legacy_time:.3f} seconds, {correct(legacy)} tokens with the right span")
+    print(f"align_tokens      - {aligned_time:.3f} seconds, {correct(aligned)} tokens with the right span "
+          f"({legacy_time / aligned_time:.2f}x)")
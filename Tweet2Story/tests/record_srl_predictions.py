@@ -0,0 +1,29 @@
+"""
+    Records the outputs of the srl_en predictor for the sentences of the fixture used by test_srl_normalization
+
+    Usage (from the Tweet2Story directory, with the AllenNLP models available):
+        python -m tests.record_srl_predictions
+"""
+
+import json
+import os
+
+from text2story.annotators.ALLENNLP import _get_pipeline
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'srl_en_predictions.json')
+
+
+if __name__ == '__main__':
+    with open(FIXTURE) as file:
+        fixture = json.load(file)
+
+    predictor = _get_pipeline(fixture["model"])
+    fixture["source"] = "Recorded from the srl_en predictor (predict_tokenized, on the words split by spaces) " \
+                        "by python -m tests.record_srl_predictions"
+    fixture["predictions"] = [predictor.predict_tokenized(sentence.split()) for sentence in fixture["sentences"]]
+
+    with open(FIXTURE, 'w') as file:
+        json.dump(fixture, file, indent=2)
+        file.write('\n')
+
+    print(f"Recorded the predictions of {len(fixture['sentences'])} sentences in {FIXTURE}")
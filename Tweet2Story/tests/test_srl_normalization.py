@@ -0,0 +1,46 @@
+"""
+    Regression test of the normalization of the SRL frames (text2story.annotators.ALLENNLP tag matrices)
+    against the previous implementation (a pandas DataFrame per sentence, kept in benchmarks.srl_normalization),
+    on outputs of the srl_en predictor (tests/fixtures/srl_en_predictions.json)
+"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('pandas') # The previous implementation (AllenNLP itself isn't needed to normalize the tags)
+
+from benchmarks.srl_normalization import legacy_normalize_sent_tags, legacy_pipeline, legacy_sentence_df
+from text2story.annotators.ALLENNLP import _normalize_sent_tags, _run_srl_pipeline, _tag_matrices
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'srl_en_predictions.json')
+
+
+@pytest.fixture(scope='module')
+def predictions():
+    with open(FIXTURE) as file:
+        return json.load(file)["predictions"]
+
+
+def test_normalized_tags(predictions):
+    for sentence, (words, vocabulary, codes) in zip(predictions, _tag_matrices(predictions)):
+        if not sentence["verbs"]:
+            assert codes.shape == (0, len(words))
+            continue
+
+        sentence_df = legacy_sentence_df(sentence)
+        legacy_tags, legacy_begin_tags = legacy_normalize_sent_tags(sentence_df)
+
+        positions, normalized_tags, begin_tags = _normalize_sent_tags(vocabulary, codes)
+        assert [words[position] for position in positions] == list(sentence_df.columns)
+        assert normalized_tags == legacy_tags
+        assert begin_tags == legacy_begin_tags
+
+
+def test_actors(predictions):
+    text = '\n'.join(' '.join(sentence["words"]) for sentence in predictions)
+    srl_by_sentence = _run_srl_pipeline([_tag_matrices(predictions)], [text])[0]
+
+    actors = [[(actor.actor, actor.sem_role_type) for actor in sentence] for sentence in srl_by_sentence]
+    assert actors == legacy_pipeline(predictions)
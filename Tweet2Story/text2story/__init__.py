@@ -1,7 +1,23 @@
-from text2story.annotators import load
+from text2story.annotators import load, prefetch, resident_models
+from text2story.core.model_store import configure as configure_models
+from text2story.core.result_cache import enable as enable_cache, disable as disable_cache, get_cache
 
-def start():
-    load()
+def start(tools=None, langs=None):
+    """
+    Models are loaded the first time they are used.
+    To load them ahead of time, specify the tools and/or languages to load (e.g. start(['spacy'], ['en'])).
+    """
+    if tools is not None or langs is not None:
+        load(tools, langs)
 
 # Export to out of the package
-from text2story.core.narrative import Narrative
\ No newline at end of file
+# (imported on their first use, so the client of the server doesn't import the libraries of the annotators)
+def __getattr__(name):
+    if name == 'Narrative':
+        from text2story.core.narrative import Narrative
+        return Narrative
+    if name == 'extract_narratives':
+        from text2story.core.corpus import extract_narratives
+        return extract_narratives
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
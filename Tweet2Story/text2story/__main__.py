@@ -1,4 +1,5 @@
 import text2story as t2s
+from text2story import client # The other modes are imported when they're used, the client doesn't need the annotators
 import os
 import time
 from pathlib import Path
@@ -9,6 +10,12 @@ EXPORT_DIR = os.path.join(Path(__file__).parent.parent, "Data", "auto_ann")
 DATA_DIR = os.path.join(Path(__file__).parent.parent, "Data", "input_files")
 
 
+def print_cache_stats(cache):
+    stats = cache.stats()
+    print(f"Result cache - {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['results']} results ({round(stats['size'] / 1024 ** 2, 2)} MB)")
+
+
 if __name__ == '__main__':
     # Arguments for CMD
     parser = argparse.ArgumentParser(
@@ -16,33 +23,152 @@ if __name__ == '__main__':
     )
 
     parser.add_argument(
-        "Filename", metavar="Filename",
+        "Filename", metavar="Filename", nargs="?",
         help="Filename of document that you want to extract the narrative from (must be in Data/input_files/)"
     )
     parser.add_argument("-o", "--outputname", nargs="?", metavar="string", default="your_output.ann", required=False,
                         help="Output name for the extracted narrative annotation file (exported to Data/auto_ann/)")
+    parser.add_argument("--no-blank-lines", action="store_true",
+                        help="Don't separate the records of the annotation file with blank lines")
+
+    parser.add_argument("--model-dir", metavar="path",
+                        help="Directory with the local copies of the models (default: the T2S_MODEL_DIR variable)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Only load models from the model directory, never using the network "
+                             "(set T2S_OFFLINE=1 instead for the transformers of the AllenNLP models to be offline too)")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="Download every model to the model directory and exit")
+
+    parser.add_argument("--serve", action="store_true",
+                        help="Load the models once and serve the narrative extraction over HTTP (see text2story.server)")
+    parser.add_argument("--connect", action="store_true",
+                        help="Send the file to a running server (started with --serve) instead of loading the models")
+    parser.add_argument("--host", default=client.DEFAULT_HOST, help="Address of the server")
+    parser.add_argument("--port", type=int, default=client.DEFAULT_PORT, help="Port of the server")
+    parser.add_argument("--socket", metavar="path", help="Unix socket of the server, instead of --host and --port")
+    parser.add_argument("--actor-tools", nargs="+", metavar="tool",
+                        help="Tools used by the server to extract the actors (default: every tool)")
+
+    parser.add_argument("--batch", metavar="source",
+                        help="Extract the narratives of many files in one process: a directory (its .txt files), "
+                             "a glob or a manifest (one path per line); relative to Data/input_files/ if not found")
+    parser.add_argument("--output-dir", metavar="path", default=EXPORT_DIR,
+                        help="Directory of the annotation files of the batch, stream and topic corpus modes "
+                             "(default: Data/auto_ann/)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of batches annotated at the same time")
+    parser.add_argument("--batch-size", type=int, default=8, help="Number of documents annotated together")
+    parser.add_argument("--force", action="store_true",
+                        help="Annotate every file again, even if its annotation is up to date")
+
+    parser.add_argument("--cache", metavar="path",
+                        help="Cache the results of the annotators in this database, to reuse them in later runs")
+    parser.add_argument("--cache-size", type=int, default=2048, metavar="MB",
+                        help="Maximum size of the cached results, in MB (least recently used results are evicted)")
+
+    parser.add_argument("--stream", metavar="source",
+                        help="Follow live topics: read tweets as JSON lines from a file being written (or - for stdin) "
+                             "and write the narrative of each updated topic to --output-dir")
+    parser.add_argument("--topics", metavar="csv",
+                        help="CSV mapping tweet IDs to topics (like dataset/tweetIDs_by_newsID.csv), "
+                             "for tweets without a 'topic' field")
+    parser.add_argument("--window-tweets", type=int, default=200, help="Maximum number of tweets in the window of a topic")
+    parser.add_argument("--window-seconds", type=float, help="Maximum age of the tweets in the window of a topic")
+    parser.add_argument("--topic-ttl", type=float, default=3600,
+                        help="Seconds without new tweets after which a topic is forgotten")
+    parser.add_argument("--emit-interval", type=float, default=60,
+                        help="Seconds between the emissions of the updated narratives")
+    parser.add_argument("--topic-corpus", metavar="jsonl",
+                        help="Extract the narrative of every topic of a file of tweets (JSON lines, grouped by --topics "
+                             "or by their 'topic' field) to --output-dir, with one process per shard of topics")
+    parser.add_argument("--processes", type=int, help="Number of worker processes of --topic-corpus (default: CPUs)")
+    parser.add_argument("--chunk-size", type=int, metavar="characters",
+                        help="Annotate long documents (also in --batch, and topics of --topic-corpus) in chunks of at "
+                             "most this size; not supported by --stream and --connect")
 
     args = parser.parse_args()
+    if args.Filename is None and not (args.prefetch or args.serve or args.batch or args.stream or args.topic_corpus):
+        parser.error("the Filename is required, unless --prefetch, --serve, --batch, --stream or --topic-corpus is used")
+    if args.chunk_size is not None and (args.stream or args.connect):
+        parser.error("--chunk-size can't be used with --stream (the windows are bounded by --window-tweets and "
+                     "--window-seconds) or --connect (the server annotates the whole text)")
+    if args.chunk_size is not None and args.chunk_size <= 0:
+        parser.error(f"--chunk-size must be positive, instead it was {args.chunk_size}")
+
+    t2s.configure_models(args.model_dir, True if args.offline else None)
+    if args.cache:
+        t2s.enable_cache(args.cache, args.cache_size * 1024 ** 2)
+
+    if args.prefetch:
+        start = time.time()
+        t2s.prefetch()
+        print(f"Models saved to {t2s.core.model_store.get_model_dir()} - {round(time.time() - start, 2)} seconds")
+        raise SystemExit(0)
+
+    if args.serve:
+        from text2story import server
+        server.serve(args.host, args.port, args.socket, args.actor_tools)
+        raise SystemExit(0)
+
+    if args.batch:
+        from text2story import batch
+        summary = batch.run(batch.find_inputs(args.batch, DATA_DIR), args.output_dir, workers=args.workers,
+                            batch_size=args.batch_size, force=args.force, blank_lines=not args.no_blank_lines,
+                            chunk_size=args.chunk_size)
+
+        print(f"Annotated {summary['annotated']} files, skipped {summary['skipped']}, failed {summary['failed']}"
+              f" - {round(summary['seconds'], 2)} seconds")
+        print(f"Throughput - {round(summary['documents/s'], 2)} documents/s, {round(summary['tokens/s'], 2)} tokens/s")
+        if t2s.get_cache() is not None:
+            print_cache_stats(t2s.get_cache())
+        raise SystemExit(1 if summary['failed'] else 0)
+
+    if args.topic_corpus:
+        from text2story import topics
+        summary = topics.run(topics.read_topics(args.topic_corpus, args.topics), args.output_dir, args.processes,
+                             chunk_size=args.chunk_size)
+
+        print(f"Annotated {summary['annotated']} topics, failed {summary['failed']} - {round(summary['seconds'], 2)} seconds")
+        raise SystemExit(1 if summary['failed'] else 0)
+
+    if args.stream:
+        from text2story import stream
+        lines = stream.stdin_lines() if args.stream == "-" else stream.follow(args.stream)
+        stream.run(lines, args.output_dir, stream.load_topics(args.topics) if args.topics else None,
+                   emit_interval=args.emit_interval, window_tweets=args.window_tweets,
+                   window_seconds=args.window_seconds, topic_ttl=args.topic_ttl)
+        raise SystemExit(0)
 
     start = time.time()
-    t2s.start()
 
     with open(os.path.join(DATA_DIR, args.Filename), "r+", encoding="utf-8") as f:
         text = f.read()
 
+    if args.connect:
+        annotation = client.request_narrative(text, datetime.now().date().isoformat(), blank_lines=not args.no_blank_lines,
+                                              host=args.host, port=args.port, socket_path=args.socket)
+        with open(os.path.join(EXPORT_DIR, args.outputname), "w", encoding="utf-8") as f:
+            f.write(annotation)
+
+        print(f"Exported file - {args.outputname}")
+        print(f"Computation time - {round(time.time() - start, 2)} seconds")
+        raise SystemExit(0)
+
+    t2s.start()
+
     doc = t2s.Narrative("en", text, datetime.now().date().isoformat())
 
-    doc.extract_actors()
-    doc.extract_times()
-    doc.extract_objectal_links()
-    doc.extract_events()
-    doc.extract_semantic_role_links()
+    timings = doc.extract_all(chunk_size=args.chunk_size)
+    for stage, seconds in timings.items():
+        print(f"{stage} - {round(seconds, 2)} seconds")
 
-    annotation = doc.ISO_annotation()
     with open(os.path.join(EXPORT_DIR, args.outputname), "w", encoding="utf-8") as f:
-        f.write(annotation)
-    f.close()
+        doc.write_ISO_annotation(f, blank_lines=not args.no_blank_lines)
 
     print(f"Exported file - {args.outputname}")
+    for tool, models in t2s.resident_models().items():
+        for model, seconds in models.items():
+            print(f"Loaded {tool} model {model} - {round(seconds, 2)} seconds")
+    if t2s.get_cache() is not None:
+        print_cache_stats(t2s.get_cache())
     end = time.time()
     print(f"Computation time - {round(end - start, 2)} seconds")
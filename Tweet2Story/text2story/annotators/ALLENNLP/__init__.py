@@ -6,13 +6,24 @@
             'en' : 'https://storage.googleapis.com/allennlp-public-models/coref-spanbert-large-2020.02.27.tar.gz'
 """
 
-import pandas as pd
-import numpy as np
-from itertools import zip_longest
+from text2story.core import model_store # Before allennlp, so the transformers cache is set up when they are imported
+
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import urllib.request
 
-from nltk.tokenize import sent_tokenize
+import numpy as np
+from collections import OrderedDict
+from threading import Lock
+from time import perf_counter
 
-from allennlp.predictors.predictor import Predictor
+from text2story.core.document import Document
+from text2story.core.exceptions import InvalidLanguage
+from text2story.core.srl_structures import SemanticRoleArgument
+from text2story.core.utils import align_tokens
 
 SRL_TYPE_MAPPING = {
     "TMP": "time",
@@ -34,50 +45,150 @@ SRL_TYPE_MAPPING = {
     "REC": "instrument"  # REC = reciprocal
 }
 
+# SRL argument tags (ARG0-5, their continuations and references, and the modifiers ARGM-X)
+ARG_TAG = re.compile(r".*[ARG][0-9]|ARGM")
+
 pipeline = {}
 
-def load():
-    pipeline['coref_en'] = Predictor.from_path('https://storage.googleapis.com/allennlp-public-models/coref-spanbert-large-2020.02.27.tar.gz')
-    pipeline["srl_en"] = Predictor.from_path(
-        "https://storage.googleapis.com/allennlp-public-models/structured-prediction-srl-bert.2020.12.15.tar.gz"
-    )
+# SRL results by (model, language, text), shared by extract_events and extract_semantic_role_links,
+# so each document only goes through the SRL model (and _run_srl_pipeline) once.
+# Holds the results of the last SRL_CACHE_SIZE documents.
+SRL_CACHE_SIZE = 16
+_srl_cache = OrderedDict()
+_srl_cache_lock = Lock()
+
+# Number of sentences sent together to the SRL predictor (set with the environment variable T2S_SRL_BATCH_SIZE)
+SRL_BATCH_SIZE = int(os.environ.get('T2S_SRL_BATCH_SIZE', 32))
+
+# spaCy model that tags the words of the sentences given to the SRL predictor (the same as the predictor's own, whose
+# VERB and AUX words are the verbs of the frames). The words are split on spaces only, so they aren't tokenized again.
+SRL_SPACY_MODEL = 'en_core_web_sm'
+_srl_tokenizer = None
+_srl_tokenizer_lock = Lock()
+
+# Windowed coreference: texts longer than COREF_WINDOW sentences go through the coreference model in windows of
+# COREF_WINDOW sentences, starting every COREF_STRIDE sentences (0 for the whole text at once, the default).
+# Set with the environment variables T2S_COREF_WINDOW and T2S_COREF_STRIDE (half the window if not set).
+COREF_WINDOW = int(os.environ.get('T2S_COREF_WINDOW', 0))
+COREF_STRIDE = int(os.environ.get('T2S_COREF_STRIDE', 0))
+
+MODELS = {
+    'coref_en': 'https://storage.googleapis.com/allennlp-public-models/coref-spanbert-large-2020.02.27.tar.gz',
+    'srl_en': 'https://storage.googleapis.com/allennlp-public-models/structured-prediction-srl-bert.2020.12.15.tar.gz'
+}
 
+load_times = {} # model name -> seconds it took to load
+_load_locks = {model: Lock() for model in MODELS} # One lock per model, so different models load concurrently
 
-def _normalize_sent_tags(sentence_df):
+def load(lang=None):
     """
-    Normalize the frames retrieved from the SRL from one sentence.
-    Each word must have only one label.
+    Loads the coreference and SRL models of the language 'lang' (of every supported language if None),
+    ahead of their first use. Otherwise, each model is loaded the first time it is used.
+    """
+    if lang is not None and lang not in ['en']:
+        raise InvalidLanguage(lang)
+
+    for model in MODELS:
+        _get_pipeline(model)
+
+
+def result_options():
+    """
+    @return: The options that change the results of the annotator (part of the keys of the result cache)
+    """
+    return {'coref_window': COREF_WINDOW, 'coref_stride': COREF_STRIDE}
+
+
+def prefetch(lang=None):
+    """
+    Downloads the models of the language 'lang' (of every supported language if None) to the model directory,
+    extracting each archive there, so they are loaded from disk (and the archives aren't extracted again) on start.
+    The models are then loaded once, which also caches the transformers they use.
+    """
+    if lang is not None and lang not in ['en']:
+        raise InvalidLanguage(lang)
+
+    for model, url in MODELS.items():
+        path = model_store.model_path('allennlp', model)
+        if path is None:
+            raise ValueError("A model directory must be configured to prefetch the models (T2S_MODEL_DIR).")
+
+        if not os.path.isdir(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=os.path.dirname(path)) as tmp:
+                archive = os.path.join(tmp, 'model.tar.gz')
+                urllib.request.urlretrieve(url, archive)
+
+                extracted = os.path.join(tmp, model)
+                with tarfile.open(archive) as tar:
+                    tar.extractall(extracted)
+
+                shutil.move(extracted, path) # Only complete extractions end up in the model directory
+
+        _get_pipeline(model)
+
+
+def _get_pipeline(model):
+    """
+    Returns the predictor 'model' ('coref_en' or 'srl_en'), loading it if it's the first use.
+    """
+    with _load_locks[model]:
+        if model not in pipeline:
+            from allennlp.predictors.predictor import Predictor # Only when a model is used (not for the tag matrices)
+
+            start = perf_counter()
+            pipeline[model] = Predictor.from_path(model_store.resolve('allennlp', model) or MODELS[model])
+            load_times[model] = perf_counter() - start
 
-    @param sentence_df: DataFrame of the SRL each column is a word from the sentence and each row is the results of SRL
-    for one frame.
+    return pipeline[model]
+
+
+def _normalize_sent_tags(vocabulary, codes, verb_tags=("B-V", "I-V")):
+    """
+    Normalize the frames retrieved from the SRL from one sentence.
+    Each word must have only one label: the tag of the only frame that tags the word or, if several frames do,
+    the verb tag or else the most specific argument tag (ARGM or ARG).
+    Words tagged "O" in every frame are left out.
+
+    The tags are given by their position (code) in the sorted vocabulary of the sentence, so the
+    comparisons between tags are comparisons between integers, done for every word at once.
+
+    @param vocabulary: Sorted array of the SRL tags of the sentence
+    @param codes: Matrix with the code of the tag of each frame (row) for each word (column) -> as returned by
+    _tag_matrices
+    @param verb_tags: SRL tags that represent verbs
+    @return: Array with the position of each word kept in the sentence
     @return: List of the normalized tags
     @return: List of booleans of whether the tag is the beginning of the argument.
     """
-    normalized_tags, begin_tags = [], []
-    for col in np.arange(len(sentence_df.columns)):
-        word_vals = sentence_df.iloc[:, col]
+    tagged = codes != np.searchsorted(vocabulary, "O") if "O" in vocabulary else np.ones(codes.shape, dtype=bool)
+    positions = np.flatnonzero(tagged.any(axis=0))
+    if positions.size == 0:
+        return positions, [], []
+
+    codes, tagged = codes[:, positions], tagged[:, positions]
+    is_verb = np.isin(vocabulary, verb_tags)[codes]
+    is_arg = np.array([ARG_TAG.search(tag) is not None for tag in vocabulary], dtype=bool)[codes] & tagged
+    has_verb = is_verb.any(axis=0)
+
+    # Tags in descending order: the first verb tag is the greatest one and the last argument tag the smallest one
+    single = (tagged.sum(axis=0) == 1)
+    normalized = np.select(
+        [single, has_verb, is_arg.any(axis=0)],
+        [np.where(tagged, codes, -1).max(axis=0), np.where(is_verb, codes, -1).max(axis=0),
+         np.where(is_arg, codes, len(vocabulary)).min(axis=0)],
+        default=-1
+    )
 
-        word_vals = word_vals[word_vals != "O"]
-        if word_vals.shape[0] == 1:
-            normalized_tags.append(word_vals.iloc[0])
-            begin_tags.append(word_vals.iloc[0].startswith("B"))
-            continue
-        verb_words = word_vals[word_vals.isin(["I-V", "B-V"])]
-        if verb_words.shape[0] != 0:  # a) - verbo
-            normalized_tags.append(verb_words.iloc[0])
-            begin_tags.append(False)  # Event
-            continue
-        # b) - ARGM e ARG (o último e mais especifico tem prio)
-        arg_words = word_vals[word_vals.str.contains(r".*[ARG][0-9]|ARGM")]
-        if arg_words.shape[0] != 0:
-            normalized_tags.append(arg_words.iloc[-1])  # desempate entre dois ARGM-X diferentes
-            begin_tags.append(arg_words.iloc[-1].startswith("B"))
-            continue
-        else:
-            print("\nNORMALIZATION ERROR - MULTIPLE TAG VALUES FOUND FOR WORD.")
-            print(word_vals.values)
+    for position in np.flatnonzero(normalized == -1):
+        print("\nNORMALIZATION ERROR - MULTIPLE TAG VALUES FOUND FOR WORD.")
+        print(np.sort(vocabulary[codes[:, position][tagged[:, position]]])[::-1])
 
-    return normalized_tags, begin_tags
+    found = normalized != -1
+    normalized, single, has_verb = normalized[found], single[found], has_verb[found]
+    begin_tags = np.char.startswith(vocabulary[normalized], "B") & (single | ~has_verb) # Events (verbs) don't begin
+
+    return positions[found], vocabulary[normalized].tolist(), begin_tags.tolist()
 
 
 def _find_events(normalized_tags, verb_tags, event_threshold=2):
@@ -91,14 +202,15 @@ def _find_events(normalized_tags, verb_tags, event_threshold=2):
     and still be considered part of the same event. n_args = event_threshold - 1
     @return: Boolean list of whether or not the word is part of an event
     """
+    # A loop over the words: for one sentence, it's faster than the array operations of _find_events_batch
     event_tags = []
     event_continue, event_begin = False, False
-    for i, tag in zip_longest(np.arange(len(normalized_tags) - event_threshold), normalized_tags):
-        if i is not None:
-            if ("ARGM" in tag) & (normalized_tags[i + 1] in verb_tags):
-                event_tags.append(True)
-                event_begin = True
-                continue
+    for i, tag in enumerate(normalized_tags):
+        looks_ahead = i < len(normalized_tags) - event_threshold
+        if looks_ahead and "ARGM" in tag and normalized_tags[i + 1] in verb_tags:
+            event_tags.append(True)
+            event_begin = True
+            continue
 
         if event_continue:
             event_tags.append(True)
@@ -108,23 +220,58 @@ def _find_events(normalized_tags, verb_tags, event_threshold=2):
         else:
             event_tags.append(False)
 
-        if i is not None:
-            conds = []
-            for j in np.arange(1, event_threshold + 1):
-                conds.append(normalized_tags[i + j] in verb_tags)
-
-            if event_begin & any(conds):
-                event_continue = True
-            else:
-                event_continue = False
-                event_begin = False
-        else:
-            event_continue = False
-            event_begin = False
+        event_continue = event_begin and looks_ahead and \
+            any(next_tag in verb_tags for next_tag in normalized_tags[i + 1:i + event_threshold + 1])
+        event_begin = event_continue
 
     return event_tags
 
 
+def _find_events_batch(tags_by_sentence, verb_tags, event_threshold=2):
+    """
+    Batch version of _find_events: finds the events of every sentence at once, with the tags of all the sentences
+    in one array.
+
+    A word is part of an event if it's a verb, an ARGM right before a verb or if it follows (in the same sentence)
+    a run of words started by a verb in which every word has a verb in the next 'event_threshold' words.
+    The words in the last 'event_threshold' positions of a sentence don't continue events.
+
+    @param tags_by_sentence: List with the normalized SRL tags of each sentence
+    @param verb_tags: list of SRL tags for the algorithm to classify as event tags
+    @param event_threshold: Threshold of non-verb arguments that can be found between verbs
+    and still be considered part of the same event. n_args = event_threshold - 1
+    @return: List with the boolean list of whether or not each word is part of an event, for each sentence
+    """
+    lengths = [len(tags) for tags in tags_by_sentence]
+    tags = [tag for sentence_tags in tags_by_sentence for tag in sentence_tags]
+    if not tags:
+        return [[] for _ in tags_by_sentence]
+
+    positions = np.arange(len(tags))
+    sentence_ends = np.repeat(np.cumsum(lengths), lengths)
+    is_verb = np.array([tag in verb_tags for tag in tags], dtype=bool)
+    is_argm = np.array(["ARGM" in tag for tag in tags], dtype=bool)
+
+    # Words followed by at least 'event_threshold' words in the sentence, which look ahead for verbs
+    looks_ahead = positions < sentence_ends - event_threshold
+    verbs_so_far = np.concatenate(([0], np.cumsum(is_verb)))
+    verbs_ahead = verbs_so_far[np.minimum(positions + event_threshold + 1, len(tags))] - verbs_so_far[positions + 1]
+    verb_ahead = looks_ahead & (verbs_ahead > 0)
+
+    # ARGM right before a verb
+    argm_before_verb = looks_ahead & is_argm & np.append(is_verb[1:], False)
+
+    # The event continues after a word if there was a verb since the last word without a verb ahead
+    # (the last word of each sentence never has one, so events don't continue into the next sentence)
+    last_verb = np.maximum.accumulate(np.where(is_verb, positions, -1))
+    last_stop = np.maximum.accumulate(np.where(verb_ahead, -1, positions))
+    continues = verb_ahead & (last_verb > last_stop)
+
+    event_tags = (argm_before_verb | is_verb | np.concatenate(([False], continues[:-1]))).tolist()
+
+    return _split(event_tags, lengths)
+
+
 def _find_actors(begin_tags, event_tags):
     """
     Finds words that belong to the same actor or event and categorize them into actors.
@@ -134,34 +281,94 @@ def _find_actors(begin_tags, event_tags):
     @param event_tags: result of find_events - boolean list of words that represent events
     @return: List of the actors that are represented by each word in the sentence
     """
+    # A loop over the words: for one sentence, it's faster than the array operations of _find_actors_batch
     actor, i, actor_tags, event, is_event = False, 0, [], 1, False
     for btag, etag in zip(begin_tags, event_tags):
         if etag:
             is_event = True
-        elif (not etag) & is_event:
+        elif is_event:
             is_event = False
             event += 1
 
-        if btag & (not etag):
+        if btag and not etag:
             actor = True
             i += 1
             actor_tags.append("T" + str(i))
-            continue
-
-        if etag:
-            actor_tags.append("EVENT" + str(event))
+        elif etag:
             actor = False
-            continue
-
-        if (not btag) & actor:
+            actor_tags.append("EVENT" + str(event))
+        elif actor:
             actor_tags.append("T" + str(i))
-        else:
-            actor_tags.append(actor_tags[-1])  # In case everything else fails, just join with previous actor
+        else: # After an event, or the words before the first actor or event (T0)
+            actor_tags.append(actor_tags[-1] if actor_tags else "T0")
 
     return actor_tags
 
 
-def _srl_by_actor(srl_by_token, text, char_offset):
+def _find_actors_batch(begin_tags_by_sentence, event_tags_by_sentence):
+    """
+    Batch version of _find_actors: finds the actors of every sentence at once, with the tags of all the sentences
+    in one array.
+
+    Events are numbered by sentence (EVENT1, EVENT2, ...), like the actors (T1, T2, ...), which start at each
+    begin tag that isn't an event. Other words join the last actor or event before them in the sentence,
+    or a T0 actor if there is none.
+
+    @param begin_tags_by_sentence: List with the begin tags (result of normalized_sent_tags) of each sentence
+    @param event_tags_by_sentence: List with the event tags (result of find_events) of each sentence
+    @return: List with the actor of each word, for each sentence
+    """
+    lengths = [len(begin_tags) for begin_tags in begin_tags_by_sentence]
+    total = sum(lengths)
+    if total == 0:
+        return [[] for _ in begin_tags_by_sentence]
+
+    starts = np.cumsum([0] + lengths[:-1])
+    sentence_starts = np.repeat(starts, lengths)
+    begins = np.array([tag for tags in begin_tags_by_sentence for tag in tags], dtype=bool)
+    events = np.array([tag for tags in event_tags_by_sentence for tag in tags], dtype=bool)
+
+    # First position and length of the sentences with words (the start of an empty last sentence is out of bounds)
+    non_empty = np.array(lengths) > 0
+    first_words, non_empty_lengths = starts[non_empty], np.array(lengths)[non_empty]
+
+    def count_by_sentence(flags):
+        counts = np.cumsum(flags)
+        return counts - np.repeat(counts[first_words] - flags[first_words], non_empty_lengths)
+
+    new_actors = begins & ~events
+    actor_numbers = count_by_sentence(new_actors)
+
+    event_ends = np.concatenate(([False], events[:-1] & ~events[1:]))
+    event_ends[first_words] = False
+    event_numbers = 1 + count_by_sentence(event_ends)
+
+    # Each word belongs to the last actor or event started before it (or at it) in the sentence
+    positions = np.arange(total)
+    owners = np.maximum.accumulate(np.where(new_actors | events, positions, -1))
+    owners = np.where(owners >= sentence_starts, owners, -1).tolist()
+
+    events, actor_numbers, event_numbers = events.tolist(), actor_numbers.tolist(), event_numbers.tolist()
+    actor_tags = [
+        "T0" if owner == -1 else "EVENT" + str(event_numbers[owner]) if events[owner] else "T" + str(actor_numbers[owner])
+        for owner in owners
+    ]
+
+    return _split(actor_tags, lengths)
+
+
+def _split(values, lengths):
+    """
+    @return: List with the consecutive slices of 'values' with lengths 'lengths'
+    """
+    slices, start = [], 0
+    for length in lengths:
+        slices.append(values[start:start + length])
+        start += length
+    return slices
+
+
+def _srl_by_actor(words, tags, actor_tags, spans):
     """
     Organizes actors as words or expressions in the full text with their respective semantic role and character span.
 
@@ -171,178 +378,496 @@ def _srl_by_actor(srl_by_token, text, char_offset):
     The character span is a tuple - (start_char, end_char) -
     where the "start_char" is where the actor starts in the text and the "end_char" is where the actor ends.
 
-    @param srl_by_token: DataFrame containing the results for the rest of the pipeline - namely, the actor references
-    @param text: The full text to be annotated
-    @param char_offset: The current char position in the text. Each word in the text increments it
-    @return: Dict list with the actor, its semantic role and the its character position span in the text
-
-    @note: CAN MALFUNCTION IF SRL DOES NOT FIND FRAMES IN EVERY SENTENCE.
-    The char positions are checked in the entire text, if there is a word before in a sentence not recognized by the SRL
-    it will malfunction slightly (give wrong position values).
+    @param words: The words of the sentence (after the normalization of the tags)
+    @param tags: The normalized SRL tag of each word
+    @param actor_tags: The actor of each word - result of _find_actors
+    @param spans: The character span of each word in the full text (None if it wasn't found)
+    @return: List of SemanticRoleArgument with the actor, its semantic role and the its character position span
+    in the text
     """
+    positions_by_actor = {}
+    for position, actor in enumerate(actor_tags):
+        positions_by_actor.setdefault(actor, []).append(position)
+
     result_list = []
-    for actor in srl_by_token["actor"].unique():
-        rows = srl_by_token[srl_by_token["actor"] == actor]
-        tags = rows["tag"]
+    for actor, positions in positions_by_actor.items():
+        actor_words_tags = [tags[position] for position in positions]
         if actor.startswith("EVENT"):
             sem_role_type = "EVENT"
-        elif any(tag.endswith("ARG0") for tag in tags):
+        elif any(tag.endswith("ARG0") for tag in actor_words_tags):
             sem_role_type = "AGENT"
-        elif any("ARGM" in tag for tag in tags):
-            argm_tags = [tag for tag in tags if "ARGM" in tag]
+        elif any("ARGM" in tag for tag in actor_words_tags):
+            argm_tags = [tag for tag in actor_words_tags if "ARGM" in tag]
             sem_role_type = SRL_TYPE_MAPPING[argm_tags[0].split("-")[-1]]
         else:
             sem_role_type = "THEME"
 
-        char_spans = []
-        for token in rows.index:
-            char_offset = text.find(token, char_offset)
-            char_spans.append(char_offset)
-            char_offset += len(token)
+        char_spans = [spans[position] for position in positions if spans[position] is not None]
+        if not char_spans:
+            continue # None of its words were found in the text
+
+        result_list.append(SemanticRoleArgument(
+            ' '.join(words[position] for position in positions), sem_role_type, (char_spans[0][0], char_spans[-1][1])
+        ))
+
+    return result_list
+
+
+def _make_tag_matrices(document, model="srl_en"):
+    """
+    Runs the SRL on each sentence in the document and encodes the results as in _tag_matrices.
+
+    @param document: The Document of the text to annotate
+    @param model: The key of the SRL model in the pipeline
+    @return: List with the words, the tag vocabulary and the tag matrix of each sentence
+    """
+    return _tag_matrices(_predict_srl(document.words, model))
+
+
+def _predict_srl(sentences, model="srl_en", batch_size=None):
+    """
+    Runs the SRL model on the sentences, already tokenized, in batches of 'batch_size' sentences: the instances
+    (one per verb) of the sentences of a batch go through the predictor together (predict_batch_instance),
+    made from the words of the sentences as in its predict_tokenized method (see _srl_instances).
+    The sentences are sorted by length first, so the sentences of each batch have about the same length
+    (less padding), and the predictions are returned in the original order of the sentences.
+
+    @param sentences: List with the words of each sentence (of one or more texts)
+    @param model: The key of the SRL model in the pipeline
+    @param batch_size: Number of sentences of each batch (SRL_BATCH_SIZE if None)
+    @return: List with the output of the SRL predictor for each sentence (its words and the verb and tags of each frame)
+    """
+    batch_size = batch_size or SRL_BATCH_SIZE
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+    predictor = _get_pipeline(model)
+    tokenizer = _get_srl_tokenizer()
+
+    predictions = [None] * len(sentences)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        instances = [_srl_instances(predictor, tokenizer, sentences[i]) for i in batch]
+
+        flattened = [instance for sentence_instances in instances for instance in sentence_instances]
+        outputs = []
+        for i in range(0, len(flattened), batch_size):
+            outputs.extend(predictor.predict_batch_instance(flattened[i:i + batch_size]))
 
-        result_list.append({
-            "actor": ' '.join(rows.index), "sem_role_type": sem_role_type,
-            "char_span": (char_spans[0], char_spans[-1] + len(token))
-        })
+        outputs = iter(outputs)
+        for i, sentence_instances in zip(batch, instances):
+            frames = [next(outputs) for _ in sentence_instances]
+            predictions[i] = {
+                "words": sentences[i],
+                "verbs": [{"verb": frame["verb"], "tags": frame["tags"]} for frame in frames]
+            }
 
-    return result_list, char_offset
+    return predictions
 
 
-def _make_srl_df(text):
+def _get_srl_tokenizer():
     """
-    Make a pandas DataFrame with the results from the SRL for each sentence in the text.
-    Each row of the DataFrame is a frame from the SRL.
+    Returns the tokenizer of the words given to the SRL predictor, loading it if it's the first use.
+    """
+    global _srl_tokenizer
+
+    with _srl_tokenizer_lock:
+        if _srl_tokenizer is None:
+            from allennlp.data.tokenizers.spacy_tokenizer import SpacyTokenizer
+
+            _srl_tokenizer = SpacyTokenizer(language=SRL_SPACY_MODEL, pos_tags=True, split_on_spaces=True)
 
-    @param text: The full text to annotate
-    @return: List of pandas DataFrames with the contents of the SRL (values) for each frame (row) by word (column)
+    return _srl_tokenizer
+
+
+def _srl_instances(predictor, tokenizer, words):
+    """
+    @param predictor: The SRL predictor
+    @param tokenizer: The tokenizer of _get_srl_tokenizer
+    @param words: The words of a sentence
+    @return: The instances of the sentence, one per verb, made from its words tagged by the tokenizer
+    (the words are joined and split on spaces again, so each word is a token)
     """
-    sentences = sent_tokenize(text)
+    return predictor.tokens_to_instances(tokenizer.tokenize(' '.join(words)))
 
-    srl = []
-    for sent in sentences:
-        result = pipeline['srl_en'].predict(sentence=sent)
-        srl.append(result)
 
-    dfs_by_sent = []
+def _tag_matrices(srl):
+    """
+    Encodes the SRL predictions of each sentence as a matrix with the tag of each frame (row) for each word (column).
+    The tags are integers: their position in the sorted vocabulary of the tags of the sentence.
+
+    @param srl: List with the output of the SRL predictor for each sentence
+    @return: List of tuples (words, vocabulary, codes) for each sentence - the words, the sorted array of tags
+    and the frames x words matrix of tag codes (without rows for sentences without frames)
+    """
+    matrices = []
     for sentence in srl:
-        tags_by_frame = pd.DataFrame(columns=sentence["words"])
-        for i, frame in zip(np.arange(len(sentence["verbs"])), sentence["verbs"]):
-            tags_by_frame.loc[i] = frame["tags"]
+        words = sentence["words"]
+        tags = np.array([frame["tags"] for frame in sentence["verbs"]], dtype=str).reshape(-1)
+        vocabulary, codes = np.unique(tags, return_inverse=True)
 
-        if tags_by_frame.shape[0] != 0:
-            dfs_by_sent.append(tags_by_frame)
+        # Sentences without frames are kept, for their words to be aligned
+        matrices.append((words, vocabulary, codes.reshape(len(sentence["verbs"]), len(words))))
 
-    return dfs_by_sent
+    return matrices
 
 
-def _srl_pipeline(sentence_df, text, char_offset, verb_tags, event_threshold=3):
+def _end_of_last_span(spans, default):
     """
-    Pipeline to retrieve actors and events by their order in the text, with their semantic roles and character spans.
-    Each iteration of the pipeline takes a dataframe of the SRL results for a sentence -> as returned by _make_srl_df.
+    @return: The end character offset of the last span found (not None) or 'default' if none was found
+    """
+    for span in reversed(spans):
+        if span is not None:
+            return span[1]
+    return default
+
+
+def _srl_by_sentence(text, lang="en", model="srl_en", document=None):
+    """
+    Applies the SRL pipeline to every sentence of the text, reusing the results of a previous call with the same
+    text, language and model, if they are still in the cache.
 
-    @param sentence_df: The DataFrame with the SRL results with the structure shown in _make_srl_df
     @param text: The full text to be annotated
-    @param char_offset: The current character position offset to start looking for character spans (recursive)
-    @param verb_tags: SRL tags that represent verbs -> defaults to ["B-V", "I-V"]
+    @param lang: The language of the text (splits it in sentences and words)
+    @param model: The key of the SRL model in the pipeline
+    @param document: The Document of the text (made from the text and the language if None)
+
+    @return: The result of _run_srl_pipeline - list with the actors (SemanticRoleArgument with the actor, its semantic
+    role and its character span) of each sentence in the text
+    """
+    key = (model, lang, text)
+    with _srl_cache_lock:
+        if key in _srl_cache:
+            _srl_cache.move_to_end(key)
+            return _srl_cache[key]
+
+    document = document or Document(text, lang)
+
+    # 1. TAG MATRIX WITH THE SRL RESULTS OF EVERY FRAME FOR EACH SENTENCE IN THE TEXT #
+    srl_by_sentence = _run_srl_pipeline([_make_tag_matrices(document, model)], [text],
+                                        spans_by_text=[document.word_spans])[0]
+
+    _cache_srl(key, srl_by_sentence)
+
+    return srl_by_sentence
+
+
+def _srl_by_sentence_batch(texts, lang="en", model="srl_en", documents=None):
+    """
+    Batch version of _srl_by_sentence. The sentences of every text not in the cache go through the SRL model
+    together (see _predict_srl), and then through _run_srl_pipeline together.
+    The results of all the texts are kept in the cache (even if there are more than SRL_CACHE_SIZE),
+    so the next batch call with the same texts doesn't repeat the SRL.
+
+    @param texts: List of texts to be annotated
+    @param lang: The language of the texts
+    @param model: The key of the SRL model in the pipeline
+    @param documents: List with the Document of each text (made from the texts and the language if None)
+
+    @return: List with the result of _srl_by_sentence for each text
+    """
+    keep = max(SRL_CACHE_SIZE, len(texts))
+    documents_by_text = dict(zip(texts, documents)) if documents is not None else {}
+
+    results, missing = {}, []
+    with _srl_cache_lock:
+        for text in texts:
+            if (model, lang, text) in _srl_cache:
+                _srl_cache.move_to_end((model, lang, text))
+                results[text] = _srl_cache[(model, lang, text)]
+            elif text not in missing:
+                missing.append(text)
+
+    missing_documents = [documents_by_text.get(text) or Document(text, lang) for text in missing]
+    srl = _predict_srl([words for document in missing_documents for words in document.words], model)
+
+    matrices = _split(_tag_matrices(srl), [len(document.words) for document in missing_documents])
+    spans_by_text = [document.word_spans for document in missing_documents]
+    for text, srl_by_sentence in zip(missing, _run_srl_pipeline(matrices, missing, spans_by_text=spans_by_text)):
+        results[text] = srl_by_sentence
+        _cache_srl((model, lang, text), results[text], keep=keep)
+
+    return [results[text] for text in texts]
+
+
+def _run_srl_pipeline(sentences_by_text, texts, verb_tags=("B-V", "I-V"), event_threshold=3, spans_by_text=None):
+    """
+    Pipeline to retrieve actors and events by their order in the text, with their semantic roles and character spans.
+    The tags of each sentence are normalized separately, then the events and actors of all the sentences
+    of all the texts are found at once.
+
+    @param sentences_by_text: The SRL results of the sentences of each text, as returned by _make_tag_matrices
+    @param texts: The full texts to be annotated
+    @param verb_tags: SRL tags that represent verbs
     @param event_threshold: Threshold of non-verb arguments that can be found between verbs
     and still be considered part of the same event. number_of_args = event_threshold - 1
+    @param spans_by_text: The character spans of the words of each sentence of each text, if they're known
+    (Document.word_spans); otherwise the words are aligned with the texts
 
-    @return: df_by_actor -> Pandas DataFrame with each actor, their semantic roles and character spans
-    character_offset -> The current character position offset in the full text
+    @return: List with the actors of each sentence with frames - SemanticRoleArgument with the actor, its semantic
+    role and its character span - for each text
     """
-    # 2. Remove words out of vocabulary in every frame #
-    oov_mask = []
-    for name, values in sentence_df.iteritems():
-        oov_mask.append(any(~(values == "O")))
-    sentence_df = sentence_df.loc[:, oov_mask]
-    sentence_df = sentence_df.apply(lambda x: x.sort_values(ascending=False).values)  # Begin tags in the end always
+    if spans_by_text is None:
+        spans_by_text = [None] * len(texts)
+
+    normalized, sentences_per_text = [], []
+    for sentences, text, text_spans in zip(sentences_by_text, texts, spans_by_text):
+        character_offset, sentences_with_frames = 0, 0
+        for i, (words, vocabulary, codes) in enumerate(sentences):
+            # 1. Character spans of every word of the sentence (before some are removed) #
+            if text_spans is not None:
+                spans = text_spans[i]
+            else:
+                spans = align_tokens(text, words, character_offset)
+                character_offset = _end_of_last_span(spans, character_offset)
+            if codes.shape[0] == 0: # Sentence without frames: its words are just skipped in the text
+                continue
 
-    # 3. Normalize SRL tags for each word in the sentence dataframe #
-    normalized_tags, begin_tags = _normalize_sent_tags(sentence_df)
+            # 2. Normalize SRL tags for each word in the sentence, removing the words out of vocabulary in every frame #
+            positions, normalized_tags, begin_tags = _normalize_sent_tags(vocabulary, codes, verb_tags)
+            normalized.append((
+                [words[position] for position in positions], normalized_tags, begin_tags,
+                [spans[position] for position in positions]
+            ))
+            sentences_with_frames += 1
 
-    # 4. Define events #
-    event_tags = _find_events(normalized_tags, verb_tags=verb_tags, event_threshold=event_threshold)
+        sentences_per_text.append(sentences_with_frames)
 
-    # 5. Find and categorize expressions into actors #
-    actor_tags = _find_actors(begin_tags, event_tags)
+    # 3. Define events #
+    event_tags = _find_events_batch([tags for _, tags, _, _ in normalized], verb_tags, event_threshold)
 
-    # Putting together a dataframe for the characteristics of each word in this sentence
-    df = pd.DataFrame({
-        "tag": normalized_tags, "is_begin_tag": begin_tags, "is_event": event_tags, "actor": actor_tags
-    }, index=sentence_df.columns)
+    # 4. Find and categorize expressions into actors #
+    actor_tags = _find_actors_batch([begin_tags for _, _, begin_tags, _ in normalized], event_tags)
 
-    # 6. Find semantic roles and character spans for each actor in the sentence #
-    df_by_actor, character_offset = _srl_by_actor(df, text, char_offset)
+    # 5. Find semantic roles and character spans for each actor in each sentence #
+    srl_by_sentence = [
+        _srl_by_actor(words, tags, sentence_actor_tags, spans)
+        for (words, tags, _, spans), sentence_actor_tags in zip(normalized, actor_tags)
+    ]
 
-    return df_by_actor, character_offset
+    return _split(srl_by_sentence, sentences_per_text)
 
 
-def extract_events(lang, text):
+def _cache_srl(key, srl_by_sentence, keep=None):
+    """
+    Stores the SRL result of a text in the cache, removing the least recently used results above 'keep'
+    (defaults to SRL_CACHE_SIZE).
+    """
+    keep = SRL_CACHE_SIZE if keep is None else keep
+
+    with _srl_cache_lock:
+        _srl_cache[key] = srl_by_sentence
+        _srl_cache.move_to_end(key)
+        while len(_srl_cache) > keep:
+            _srl_cache.popitem(last=False)
+
+
+def clear_srl_cache():
+    """
+    Removes every SRL result kept in the cache.
+    """
+    with _srl_cache_lock:
+        _srl_cache.clear()
+
+
+def extract_events(lang, text, document=None):
     """
     Main function that applies the SRL pipeline to extract event entities from each sentence.
     Joins every event actor from each sentence in the text.
 
     @param lang: The language of the text
     @param text: The full text to be annotated
+    @param document: The text split in sentences and words (see core.document); made from the text if None
 
-    @return: Pandas DataFrame with every event entity and their character span
+    @return: List of SemanticRoleArgument with every event entity and their character span
     """
-    # 1. DATAFRAME WITH THE SRL RESULTS OF EVERY FRAME FOR EACH SENTENCE IN THE TEXT #
-    dfs_by_sent = _make_srl_df(text)
-
     # FIND EVENTS - PIPELINE #
-    character_offset, srl_actors_list = 0, []
-    for sent_df in dfs_by_sent:
-        df_by_actor, character_offset = _srl_pipeline(sent_df, text, character_offset, verb_tags=["B-V", "I-V"],
-                                                      event_threshold=3)
-        srl_actors_list.append(df_by_actor)
+    srl_actors_list = _srl_by_sentence(text, lang, document=document)
+
+    return _events(srl_actors_list)
+
+
+def extract_events_batch(lang, texts, documents=None):
+    """
+    Batch version of extract_events.
+
+    @param lang: The language of the texts
+    @param texts: List of texts to be annotated
+    @param documents: List with the Document of each text (made from the texts if None)
+
+    @return: List with the events (SemanticRoleArgument) of each text
+    """
+    return [
+        _events(srl_actors_list) for srl_actors_list in _srl_by_sentence_batch(list(texts), lang, documents=documents)
+    ]
+
 
-    srl_actors_list = [item for sublist in srl_actors_list for item in sublist]  # flatten list
-    srl_df = pd.DataFrame(srl_actors_list)
-    return srl_df[srl_df["sem_role_type"] == "EVENT"]
+def _events(srl_actors_list):
+    """
+    @param srl_actors_list: The result of _srl_by_sentence for a text
+    @return: List of SemanticRoleArgument with every event entity and their character span
+    """
+    return [argument for sentence in srl_actors_list for argument in sentence if argument.sem_role_type == "EVENT"]
 
 
-def extract_semantic_role_links(lang, text):
+def extract_semantic_role_links(lang, text, document=None):
     """
     Main function that applies the SRL pipeline to extract the semantic role links between actors and events.
     Joins the Semantic Role Links from each sentence in the text.
 
     @param lang: The language of the text
     @param text: The full text to be annotated
+    @param document: The text split in sentences and words (see core.document); made from the text if None
 
-    @return: List of pandas DataFrames that contains the SRL for each actor in each sentence.
+    @return: List with the SRL for each actor in each sentence - lists of SemanticRoleArgument, in text order.
     """
-    dfs_by_sent = _make_srl_df(text)
+    # Copies, the cached lists are shared
+    return [list(sentence) for sentence in _srl_by_sentence(text, lang, document=document)]
 
-    character_offset, srl_by_sentence = 0, []
-    for sent_df in dfs_by_sent:
-        df_by_actor, character_offset = _srl_pipeline(sent_df, text, character_offset, verb_tags=["B-V", "I-V"],
-                                                      event_threshold=3)
-        srl_by_sentence.append(pd.DataFrame(df_by_actor))
 
-    return srl_by_sentence
+def extract_semantic_role_links_batch(lang, texts, documents=None):
+    """
+    Batch version of extract_semantic_role_links.
 
+    @param lang: The language of the texts
+    @param texts: List of texts to be annotated
+    @param documents: List with the Document of each text (made from the texts if None)
+
+    @return: List with the result of extract_semantic_role_links for each text
+    """
+    return [
+        [list(sentence) for sentence in srl_by_sentence]
+        for srl_by_sentence in _srl_by_sentence_batch(list(texts), lang, documents=documents)
+    ]
 
-def extract_objectal_links(lang, text):
-    prediction = pipeline['coref_en'].predict(document=text)
 
-    cluster_indexes_list = prediction["clusters"] # Indexes are token spans, we need character spans
-    # Compute the character spans
-    character_offset = 0
-    character_span = []
-    for token in prediction["document"]:
-        character_offset = text.find(token, character_offset)
-        character_span.append((character_offset, character_offset + len(token)))
-        character_offset += len(token)
+def extract_objectal_links(lang, text, document=None):
+    """
+    Main function that applies the coreference model to find the clusters of mentions of the same entity.
+    Texts longer than COREF_WINDOW sentences go through the model in overlapping windows (see _coref_windows).
 
-    # Convert the clusters to character spans
-    for cluster in cluster_indexes_list:
-        for i in range(len(cluster)):
-            start_token_span = cluster[i][0]
-            end_token_span = cluster[i][1]
+    @param lang: The language of the text
+    @param text: The full text to be annotated
+    @param document: The text split in sentences and words (see core.document); made from the text if None
 
-            char_offset = (character_span[start_token_span][0], character_span[end_token_span][1])
+    @return: The clusters of the text, each one a list with the character spans of its mentions
+    """
+    return extract_objectal_links_batch(lang, [text], documents=[document] if document is not None else None)[0]
 
-            cluster[i] = char_offset
 
-    return cluster_indexes_list
+def extract_objectal_links_batch(lang, texts, window=None, stride=None, documents=None):
+    """
+    Batch version of extract_objectal_links. The texts (or their windows) go through the coreference model
+    already split in words (predict_tokenized: the model doesn't tokenize them again, and the mentions are mapped
+    to the character spans of the words, without aligning them with the text).
+
+    @param lang: The language of the texts
+    @param texts: List of texts to be annotated
+    @param window: Number of sentences of each window (COREF_WINDOW if None; 0 for the whole texts)
+    @param stride: Number of sentences between the starts of consecutive windows (COREF_STRIDE if None;
+    half the window if 0)
+    @param documents: List with the Document of each text (made from the texts if None)
+
+    @return: List with the clusters (character spans) of each text
+    """
+    texts = list(texts)
+    window = COREF_WINDOW if window is None else window
+    stride = (COREF_STRIDE if stride is None else stride) or max(1, window // 2)
+    if window > 0 and stride > window:
+        raise ValueError(f"The stride can't be greater than the window, or sentences would be skipped.\n"
+                         f"Instead it was {stride} (window {window})")
+
+    documents = documents or [Document(text, lang) for text in texts]
+    windows_by_text = [_coref_windows(document, window, stride) for document in documents]
+
+    predictor = _get_pipeline('coref_en')
+    predictions = [
+        predictor.predict_tokenized([word for words in document.words[first:last] for word in words])
+        for document, text_windows in zip(documents, windows_by_text) for first, last in text_windows
+    ]
+
+    clusters_by_text, i = [], 0
+    for document, text_windows in zip(documents, windows_by_text):
+        clusters_by_window = [
+            _clusters_char_spans(prediction, [span for spans in document.word_spans[first:last] for span in spans])
+            for (first, last), prediction in zip(text_windows, predictions[i:i + len(text_windows)])
+        ]
+        if len(clusters_by_window) == 1:
+            clusters_by_text.append(clusters_by_window[0])
+        else:
+            clusters_by_text.append(_stitch_clusters(clusters_by_window))
+        i += len(text_windows)
+
+    return clusters_by_text
+
+
+def _coref_windows(document, window, stride):
+    """
+    Splits the document in overlapping windows of 'window' sentences, starting every 'stride' sentences
+    (the last window ends at the last sentence).
+
+    @param document: The Document of the text
+    @param window: Number of sentences of each window (0 for a single window with the whole text)
+    @param stride: Number of sentences between the starts of consecutive windows
+    @return: List of (first sentence, last sentence + 1) of each window - a single window if the text fits in one
+    (none if the text has no sentences)
+    """
+    nr_sentences = len(document.words)
+    if nr_sentences == 0:
+        return []
+    if window <= 0 or nr_sentences <= window:
+        return [(0, nr_sentences)]
+
+    windows = []
+    for first in range(0, nr_sentences, stride):
+        last = min(first + window, nr_sentences)
+        windows.append((first, last))
+        if last == nr_sentences:
+            break
+
+    return windows
+
+
+def _stitch_clusters(clusters_by_window):
+    """
+    Merges the clusters found in each window of a text: clusters of different windows that share a mention
+    (the same character span, in the overlap of the windows) are the same cluster.
+
+    @param clusters_by_window: List with the clusters of each window, with the character spans in the full text
+    @return: The merged clusters, each one with its mentions in text order, ordered by their first mention
+    """
+    parent = {} # Union-find of the mentions
+
+    def find(mention):
+        root = mention
+        while parent[root] != root:
+            root = parent[root]
+        while parent[mention] != root: # Path compression
+            parent[mention], mention = root, parent[mention]
+        return root
+
+    for clusters in clusters_by_window:
+        for cluster in clusters:
+            for mention in cluster:
+                parent.setdefault(mention, mention)
+            for mention in cluster[1:]:
+                root, other = find(cluster[0]), find(mention)
+                if root != other:
+                    parent[other] = root
+
+    mentions_by_root = {}
+    for mention in parent:
+        mentions_by_root.setdefault(find(mention), []).append(mention)
+
+    return sorted((sorted(mentions) for mentions in mentions_by_root.values()), key=lambda mentions: mentions[0])
+
+
+def _clusters_char_spans(prediction, spans):
+    """
+    @param prediction: The output of the coreference predictor for a document (or a window of it)
+    @param spans: The character span of each word given to the predictor
+    @return: The clusters of the prediction, with each mention converted from token span to character span
+    """
+    # Indexes are token spans, we need character spans
+    return [
+        [(spans[start_token_span][0], spans[end_token_span][1]) for start_token_span, end_token_span in cluster]
+        for cluster in prediction["clusters"]
+    ]
@@ -6,23 +6,88 @@
             'en' : default                
 """
 
+from text2story.core.document import Document
 from text2story.core.utils import chunknize_actors
-from text2story.core.exceptions import InvalidLanguage
+from text2story.core.exceptions import InvalidLanguage, ModelNotAvailable
+from text2story.core import model_store
 
 import nltk
-from nltk import word_tokenize, sent_tokenize, pos_tag, ne_chunk, tree2conlltags
+from nltk import pos_tag, ne_chunk, tree2conlltags
+from nltk import pos_tag_sents, ne_chunk_sents
 
+from threading import Lock
+from time import perf_counter
 
-def load():
+RESOURCES = ["maxent_ne_chunker", "words"]
+
+# Where each resource is in the NLTK data directories. The tokenizer and the tagger are also used
+# (and by the AllenNLP annotator too), so they are saved by the prefetch as well
+RESOURCE_PATHS = {
+    "punkt": "tokenizers/punkt",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+    "maxent_ne_chunker": "chunkers/maxent_ne_chunker",
+    "words": "corpora/words"
+}
+
+load_times = {} # resource name -> seconds it took to load
+_load_lock = Lock()
+
+
+def load(lang=None):
     """
-    Used, at start, to load the pipeline for the supported languages.
+    Gets the resources used by the NE chunker, ahead of their first use.
+    Otherwise, they are loaded the first time an extraction is made.
+    Resources already in the model directory (or in the NLTK data directories) aren't downloaded again.
     """
-    nltk.download("maxent_ne_chunker")
-    nltk.download("words")
-    pass # Nothing to load
+    if lang is not None and lang not in ['en']:
+        raise InvalidLanguage(lang)
 
+    with _load_lock:
+        for resource in RESOURCES:
+            if resource not in load_times:
+                start = perf_counter()
+                _get_resource(resource)
+                load_times[resource] = perf_counter() - start
 
-def extract_actors(lang, text):
+
+def prefetch(lang=None):
+    """
+    Downloads every resource used to the model directory.
+    """
+    if lang is not None and lang not in ['en']:
+        raise InvalidLanguage(lang)
+
+    if model_store.model_path('nltk', '') is None:
+        raise ValueError("A model directory must be configured to prefetch the models (T2S_MODEL_DIR).")
+
+    with _load_lock:
+        for resource in RESOURCE_PATHS:
+            _get_resource(resource)
+
+
+def _get_resource(resource):
+    """
+    Downloads the resource 'resource' (to the model directory, if there's one) unless it is already available.
+
+    Raises
+    ------
+    ModelNotAvailable if, in offline mode, the resource isn't available
+    """
+    data_dir = model_store.model_path('nltk', '') # On the NLTK search path (see model_store.configure)
+
+    try:
+        nltk.data.find(RESOURCE_PATHS[resource])
+        return
+    except LookupError:
+        pass
+
+    if model_store.is_offline():
+        raise ModelNotAvailable('nltk', resource)
+
+    nltk.download(resource, download_dir=data_dir, quiet=True)
+
+
+def extract_actors(lang, text, document=None):
     """
     Parameters
     ----------
@@ -30,6 +95,8 @@ def extract_actors(lang, text):
         the language of text to be annotated
     text : str
         the text to be annotated
+    document : Document
+        the text split in sentences and tokens (see core.document); it's made from the text if None
     
     Returns
     -------
@@ -44,27 +111,82 @@ def extract_actors(lang, text):
     if lang not in ['en']:
         raise InvalidLanguage(lang)
 
-    language_mapping = {'en' : 'english'}
+    load(lang)
 
-    iob_token_list = []
+    document = document or Document(text, lang)
+
+    trees = [ne_chunk(pos_tag(tokens)) for tokens in document.tokens]
 
-    char_offset = 0 
-    sents = sent_tokenize(text, language=language_mapping[lang])
+    return _trees_actors(trees, document.token_spans)
+
+
+def extract_actors_batch(lang, texts, documents=None):
+    """
+    Parameters
+    ----------
+    lang : str
+        the language of the texts to be annotated
+    texts : list[str]
+        the texts to be annotated; the sentences of every text are POS tagged and chunked together
+    documents : list[Document]
+        the texts split in sentences and tokens (see core.document); they're made from the texts if None
     
-    for sent in sents:
-        tree = ne_chunk(pos_tag(word_tokenize(sent, language=language_mapping[lang])))
-        
-        doc = tree2conlltags(tree) # doc :: [(Token, POS_TAG, IOB-NE)]
-        
-        for token in doc:
-            token_text = token[0] # Don't call token[0] 'text', it will ofuscate the 'text' parameter!
-            char_offset = text.find(token_text, char_offset) # always actualize char_offset to where we are, so next search we are doing, we are following the part of the text we didn't search yet
-            char_span = (char_offset, char_offset + len(token_text))
-            char_offset += len(token_text)
-            pos = normalize(token[1])
-            ne = token[2][:2] + normalize(token[2][2:]) if token[2] != 'O' else 'O'
-            
-            iob_token_list.append((char_span, pos, ne))
+    Returns
+    -------
+    list[list[tuple[tuple[int, int], str, str]]]
+        for each text, the list of actors identified, like in 'extract_actors'
+    
+    Raises
+    ------
+    InvalidLanguage if the language given is invalid/unsupported
+    """
+
+    if lang not in ['en']:
+        raise InvalidLanguage(lang)
+
+    load(lang)
+
+    documents = documents or [Document(text, lang) for text in texts]
+
+    trees = iter(ne_chunk_sents(pos_tag_sents([tokens for document in documents for tokens in document.tokens])))
+
+    actors_by_text = []
+    for document in documents:
+        document_trees = [next(trees) for _ in document.tokens]
+        actors_by_text.append(_trees_actors(document_trees, document.token_spans))
+
+    return actors_by_text
+
+
+def _trees_actors(trees, spans_by_sentence):
+    """
+    Parameters
+    ----------
+    trees : list[nltk.Tree]
+        the NE chunk tree of each sentence of the text, in order
+    spans_by_sentence : list[list[tuple[int, int]]]
+        the character span of each token of each sentence (see Document.token_spans)
+
+    Returns
+    -------
+    list[tuple[tuple[int, int], str, str]]
+        the list of actors identified where each actor is represented by a tuple
+    """
+
+    iob_token_list = []
+
+    doc = [token for tree in trees for token in tree2conlltags(tree)] # doc :: [(Token, POS_TAG, IOB-NE)]
+    spans = [span for sentence_spans in spans_by_sentence for span in sentence_spans]
+
+    # Tokens not found in the text (None span) are left out
+    for token, char_span in zip(doc, spans):
+        if char_span is None:
+            continue
+
+        pos = normalize(token[1])
+        ne = token[2][:2] + normalize(token[2][2:]) if token[2] != 'O' else 'O'
+
+        iob_token_list.append((char_span, pos, ne))
     
     actor_list = chunknize_actors(iob_token_list)
         
@@ -8,17 +8,29 @@
 '''
 
 from text2story.core.exceptions import InvalidLanguage
+from text2story.core.utils import align_tokens
 
 from py_heideltime import py_heideltime
 import re
 
-def load():
+TIMEX_PATTERN = re.compile(r'<TIMEX3 tid="[^"]*" type="(?P<type>[^"]*)" value="(?P<value>[^"]*)"[^>]*>(?P<text>.*?)</TIMEX3>')
+
+load_times = {} # Nothing is loaded, HeidelTime runs in a new process for each extraction
+
+def load(lang=None):
     """
     Used, at start, to load the pipeline for the supported languages.
     """
     pass # Nothing to load
 
 
+def prefetch(lang=None):
+    """
+    Used by the prefetch of the models. HeidelTime comes with py_heideltime, so there's nothing to download.
+    """
+    pass # Nothing to download
+
+
 def extract_times(lang, text, publication_time):
     """
     Parameters
@@ -48,48 +60,54 @@ def extract_times(lang, text, publication_time):
 
     annotations = py_heideltime(text, language=lang, document_creation_time=publication_time)
 
-    pattern = r'<TIMEX3 tid=.*? type=.*? value=.*?>.*?</TIMEX3>'
+    # The tagged text is split in words, the words of each timex marked, and every word is aligned with the text,
+    # so the span of a timex goes from the start of its first word to the end of its last word
+    tagged_text = annotations[2]
 
-    timexs_list = re.finditer(pattern, annotations[2])
+    words, timex_words = [], [] # timex_words :: [(first word, last word + 1, type, value)]
+    tagged_offset = 0
+    for timex in TIMEX_PATTERN.finditer(tagged_text):
+        words.extend(tagged_text[tagged_offset:timex.start()].split())
 
-    timexs = []
+        timex_text_words = timex.group('text').split()
+        timex_words.append((len(words), len(words) + len(timex_text_words), timex.group('type'), timex.group('value')))
+        words.extend(timex_text_words)
 
-    char_offset = 0
+        tagged_offset = timex.end()
 
-    for timex in timexs_list:
-        match = timex.group()
+    word_spans = align_tokens(text, words)
 
-        i = 13 # Discard all till the starting of the 'tid' value
-        while match[i] != '"': # Consume the 'tid' value
-            i += 1
+    timexs = []
 
-        i += 8 # Now, we are at the field 'type'
-        timex_type = ''
-        while match[i] != '"':
-            timex_type += match[i]
-            i += 1
+    for first, last, timex_type, timex_value in timex_words:
+        spans = [span for span in word_spans[first:last] if span is not None]
+        if not spans:
+            continue # Not found in the text
 
-        i += 9 # Now, we are the field 'value'
-        timex_value = ''
-        while match[i] != '"':
-            timex_value += match[i]
-            i += 1
+        timex_character_span = (spans[0][0], spans[-1][1])
 
-        i += 2 # Now, we are the text of the timex
-        timex_text = ''
-        while match[i] != '<':
-            timex_text += match[i]
-            i += 1
+        timex = (timex_character_span, timex_type, timex_value)
+        timexs.append(timex)
 
-        char_offset = text.find(timex_text, char_offset)
+    return timexs
 
-        timex_start_offset = char_offset
-        timex_end_offset = char_offset + len(timex_text)
-        timex_character_span =  (timex_start_offset, timex_end_offset)
 
-        char_offset = timex_end_offset
+def extract_times_batch(lang, texts, publication_times):
+    """
+    Parameters
+    ----------
+    lang : str
+        the language of the texts to be annotated
+    texts : list[str]
+        the texts to be annotated
+    publication_times : list[str]
+        the publication time of each text
 
-        timex = (timex_character_span, timex_type, timex_value)
-        timexs.append(timex)
+    Returns
+    -------
+    list[list[tuple[tuple[int, int], str, str]]]
+        for each text, the times identified, like in 'extract_times'
+        HeidelTime has no batched interface, so each text is annotated on its own
+    """
 
-    return timexs
+    return [extract_times(lang, text, publication_time) for text, publication_time in zip(texts, publication_times)]
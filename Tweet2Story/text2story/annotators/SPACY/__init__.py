@@ -7,23 +7,130 @@
             'en' : https://spacy.io/models/en#en_core_web_lg)
 """
 
+from text2story.core.document import Document
 from text2story.core.utils import chunknize_actors
-from text2story.core.exceptions import InvalidLanguage
+from text2story.core.exceptions import InvalidLanguage, ModelNotAvailable
+from text2story.core import model_store
 
 import spacy
+import spacy.cli
+
+import os
+from threading import Lock
+from time import perf_counter
+
+MODELS = {'pt': 'pt_core_news_lg', 'en': 'en_core_web_lg'}
+
+# Components left out when the pipelines are loaded: the actors only need the tokens, the POS tags and the entities.
+# The spaCy 2 pipelines (the models of requirements.txt) only have a tagger, the parser and the ner: the parser is
+# disabled. The spaCy 3 pipelines may also have a lemmatizer and a senter: the ones they have are excluded
+EXCLUDED_COMPONENTS = ['parser', 'lemmatizer', 'senter']
+SPACY_3 = int(spacy.__version__.split('.')[0]) >= 3
+
+# Number of texts processed together by the 'pipe' method and number of processes it uses
+# (set with the environment variables T2S_SPACY_BATCH_SIZE and T2S_SPACY_PROCESSES)
+PIPE_BATCH_SIZE = int(os.environ.get('T2S_SPACY_BATCH_SIZE', 64))
+PIPE_PROCESSES = int(os.environ.get('T2S_SPACY_PROCESSES', 1))
+
+# Sentence mode: each text is split in sentences (see core.document) and its sentences are streamed through
+# the 'pipe' method, instead of processing each text as a whole (set with the environment variable T2S_SPACY_SENTENCES=1)
+SENTENCE_MODE = os.environ.get('T2S_SPACY_SENTENCES', '0') not in ('', '0')
 
 pipeline = {}
+load_times = {} # model name -> seconds it took to load
+_load_locks = {lang: Lock() for lang in MODELS} # One lock per model, so different models load concurrently
+
+def load(lang=None):
+    """
+    Loads the pipeline of the language 'lang' (of every supported language if None), ahead of its first use.
+    Otherwise, each pipeline is loaded the first time it is used.
+    """
+
+    if lang is not None and lang not in MODELS:
+        raise InvalidLanguage(lang)
+
+    for model_lang in ([lang] if lang is not None else MODELS):
+        _get_pipeline(model_lang)
+
+
+def result_options():
+    """
+    @return: The options that change the results of the annotator (part of the keys of the result cache)
+    """
+    return {'sentence_mode': SENTENCE_MODE}
+
+
+def prefetch(lang=None):
+    """
+    Saves the pipeline of the language 'lang' (of every supported language if None) to the model directory,
+    downloading the model package first if it isn't installed.
+    """
+
+    if lang is not None and lang not in MODELS:
+        raise InvalidLanguage(lang)
+
+    for model_lang in ([lang] if lang is not None else MODELS):
+        name = MODELS[model_lang]
+        path = model_store.model_path('spacy', name)
+        if path is None:
+            raise ValueError("A model directory must be configured to prefetch the models (T2S_MODEL_DIR).")
+
+        if not os.path.isdir(path):
+            try:
+                nlp = spacy.load(name)
+            except OSError: # Model package not installed
+                spacy.cli.download(name)
+                nlp = spacy.load(name)
+
+            nlp.to_disk(path + '.tmp')
+            os.rename(path + '.tmp', path) # Only complete pipelines end up in the model directory
+
+
+def _get_pipeline(lang):
+    """
+    Returns the pipeline of the language 'lang', loading it if it's the first use.
+    """
+
+    with _load_locks[lang]:
+        if lang not in pipeline:
+            start = perf_counter()
+            pipeline[lang] = _load_without_parser(_model_location(MODELS[lang]))
+            load_times[MODELS[lang]] = perf_counter() - start
+
+            assert 'parser' not in pipeline[lang].pipe_names, f"{MODELS[lang]} was loaded with the parser"
+
+    return pipeline[lang]
+
+
+def _load_without_parser(location):
+    """
+    Loads the pipeline at 'location' (a path or a package name) without the EXCLUDED_COMPONENTS it has.
+    """
+
+    if not SPACY_3:
+        return spacy.load(location, disable=['parser'])
+
+    path = location if os.path.isdir(location) else spacy.util.get_package_path(location)
+    components = spacy.util.get_model_meta(path).get('components', [])
+
+    return spacy.load(location, exclude=[name for name in EXCLUDED_COMPONENTS if name in components])
 
-def load():
+
+def _model_location(name):
     """
-    Used, at start, to load the pipeline for the supported languages.
+    Returns the path of the model 'name' in the model directory or, if it isn't there, its package name.
+    Installed model packages load without the network, so they are also used in offline mode.
     """
 
-    pipeline['pt'] = spacy.load('pt_core_news_lg')
-    pipeline['en'] = spacy.load('en_core_web_lg')
+    try:
+        return model_store.resolve('spacy', name) or name
+    except ModelNotAvailable:
+        if spacy.util.is_package(name):
+            return name
+        raise
 
     
-def extract_actors(lang, text):
+def extract_actors(lang, text, document=None):
     """
     Parameters
     ----------
@@ -31,6 +138,8 @@ def extract_actors(lang, text):
         the language of text to be annotated
     text : str
         the text to be annotated
+    document : Document
+        the text split in sentences (see core.document), used in sentence mode; it's made from the text if None
     
     Returns
     -------
@@ -45,21 +154,141 @@ def extract_actors(lang, text):
     if lang not in ['pt', 'en']:
         raise InvalidLanguage(lang)
 
-    doc = pipeline[lang](text)
+    if SENTENCE_MODE:
+        return _sentence_actors(lang, [document or Document(text, lang)])[0]
+
+    doc = _get_pipeline(lang)(text)
+
+    return _doc_actors(doc)
+
+
+def extract_actors_batch(lang, texts, documents=None, batch_size=None, n_process=None):
+    """
+    Parameters
+    ----------
+    lang : str
+        the language of the texts to be annotated
+    texts : list[str]
+        the texts to be annotated, processed together with the spaCy 'pipe' (batched) method
+    documents : list[Document]
+        the texts split in sentences (see core.document), used in sentence mode; they're made from the texts if None
+    batch_size : int
+        number of texts (or sentences, in sentence mode) of each batch of the 'pipe' method (PIPE_BATCH_SIZE if None)
+    n_process : int
+        number of processes used by the 'pipe' method (PIPE_PROCESSES if None)
+
+    Returns
+    -------
+    list[list[tuple[tuple[int, int], str, str]]]
+        for each text, the list of actors identified, like in 'extract_actors'
+
+    Raises
+    ------
+        InvalidLanguage if the language given is invalid/unsupported
+    """
+
+    if lang not in ['pt', 'en']:
+        raise InvalidLanguage(lang)
+
+    texts = list(texts)
+    if SENTENCE_MODE:
+        return _sentence_actors(lang, documents or [Document(text, lang) for text in texts], batch_size, n_process)
+
+    return [_doc_actors(doc) for doc in _pipe(lang, texts, batch_size, n_process)]
+
+
+def _pipe(lang, texts, batch_size=None, n_process=None, as_tuples=False):
+    """
+    Streams the texts through the 'pipe' method of the pipeline of the language 'lang'.
+
+    @return: generator of the spaCy Doc of each text (or of (Doc, context) pairs if 'as_tuples')
+    """
+
+    return _get_pipeline(lang).pipe(texts, batch_size=batch_size or PIPE_BATCH_SIZE,
+                                    n_process=n_process or PIPE_PROCESSES, as_tuples=as_tuples)
+
+
+def _sentence_actors(lang, documents, batch_size=None, n_process=None):
+    """
+    Sentence mode: the sentences of every document are streamed through the 'pipe' method together,
+    so a large document is processed in small pieces (and, with more than one process, in parallel).
+
+    Parameters
+    ----------
+    lang : str
+        the language of the documents
+    documents : list[Document]
+        the documents to be annotated
+    batch_size : int
+        number of sentences of each batch of the 'pipe' method (PIPE_BATCH_SIZE if None)
+    n_process : int
+        number of processes used by the 'pipe' method (PIPE_PROCESSES if None)
+
+    Returns
+    -------
+    list[list[tuple[tuple[int, int], str, str]]]
+        for each document, the list of actors identified, with the character spans in the document
+    """
+
+    sentences = ((document.text[start:end], start) for document in documents for start, end in document.sentence_spans)
+    docs = _pipe(lang, sentences, batch_size, n_process, as_tuples=True)
+
+    actors_by_document = []
+    for document in documents:
+        iob_token_list = []
+        for _ in document.sentence_spans:
+            doc, offset = next(docs)
+            iob_token_list.extend(_doc_tokens(doc, offset))
+
+        actors_by_document.append(chunknize_actors(iob_token_list))
+
+    return actors_by_document
+
+
+def _doc_actors(doc):
+    """
+    Parameters
+    ----------
+    doc : spacy.tokens.Doc
+        the text processed by the spaCy pipeline
+
+    Returns
+    -------
+    list[tuple[tuple[int, int], str, str]]
+        the list of actors identified where each actor is represented by a tuple
+    """
+
+    actor_list = chunknize_actors(_doc_tokens(doc))
+
+    return actor_list  
+
+
+def _doc_tokens(doc, offset=0):
+    """
+    Parameters
+    ----------
+    doc : spacy.tokens.Doc
+        the text (or a sentence of it) processed by the spaCy pipeline
+    offset : int
+        the character offset of the doc in the text
+
+    Returns
+    -------
+    list[tuple[tuple[int, int], str, str]]
+        the character span, the normalized POS tag and the normalized NE IOB tag of each token
+    """
 
     iob_token_list = []
     for token in doc:
-        start_character_offset = token.idx
-        end_character_offset = token.idx + len(token)
+        start_character_offset = offset + token.idx
+        end_character_offset = offset + token.idx + len(token)
         character_span = (start_character_offset, end_character_offset)
         pos = normalize(token.pos_)
         ne = token.ent_iob_ + "-" + normalize(token.ent_type_) if token.ent_iob_ != 'O' else 'O'
 
         iob_token_list.append((character_span, pos, ne))
 
-    actor_list = chunknize_actors(iob_token_list)
-
-    return actor_list  
+    return iob_token_list
 
 
 def normalize(label):
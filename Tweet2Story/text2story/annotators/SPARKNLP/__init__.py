@@ -7,43 +7,188 @@
 '''
 
 from text2story.core.utils import chunknize_actors
-from text2story.core.exceptions import InvalidLanguage
+from text2story.core.exceptions import InvalidLanguage, ModelNotAvailable
+from text2story.core import model_store
 
 import sparknlp
 from pyspark.sql import SparkSession
+from pyspark.sql.functions import col
 from sparknlp.base import DocumentAssembler, LightPipeline
 from sparknlp.annotator import Tokenizer, PerceptronModel, WordEmbeddingsModel, NerDLModel, NerCrfModel
 from pyspark.ml import Pipeline
 import pandas as pd
 
+import glob
+import os
+import shutil
+from threading import RLock
+from time import perf_counter
+
 pipeline = {}
+models = {} # lang -> fitted PipelineModel (the LightPipeline of each language wraps it)
+load_times = {} # model name -> seconds it took to load
+_load_lock = RLock()
+
+# Spark session and the stages shared by both languages, created on the first use
+_shared = {}
+
+# Pretrained models: name -> (annotator class, arguments of 'pretrained')
+MODELS = {
+    'glove_100d': (WordEmbeddingsModel, ('glove_100d',)),
+    'pos_ud_bosque': (PerceptronModel, ('pos_ud_bosque', 'pt')),
+    'wikiner_6B_100': (NerDLModel, ('wikiner_6B_100', 'pt')),
+    'pos_anc': (PerceptronModel, ('pos_anc', 'en')),
+    'ner_crf': (NerCrfModel, ())
+}
+LANG_MODELS = {'pt': ['glove_100d', 'pos_ud_bosque', 'wikiner_6B_100'], 'en': ['glove_100d', 'pos_anc', 'ner_crf']}
+
+# Corpus mode: batches of more than CORPUS_THRESHOLD texts go through the PipelineModel as a Spark DataFrame
+# ('transform', distributed across the cores of the local[*] session) instead of the LightPipeline in the driver
+# (set with the environment variable T2S_SPARKNLP_CORPUS_THRESHOLD)
+CORPUS_THRESHOLD = int(os.environ.get('T2S_SPARKNLP_CORPUS_THRESHOLD', 8))
+
+def load(lang=None):
+    """
+    Loads the pipeline of the language 'lang' (of every supported language if None), ahead of its first use.
+    Otherwise, each pipeline (and the Spark session) is loaded the first time it is used.
+    """
+
+    if lang is not None and lang not in ['pt', 'en']:
+        raise InvalidLanguage(lang)
+
+    for pipeline_lang in ([lang] if lang is not None else ['pt', 'en']):
+        _get_pipeline(pipeline_lang)
+
+
+def _timed(name, loader):
+    """
+    Calls 'loader', recording the time it took in load_times[name].
+    """
+    start = perf_counter()
+    model = loader()
+    load_times[name] = perf_counter() - start
+    return model
+
+
+def _pretrained(name):
+    """
+    Loads the pretrained model 'name' from the model directory or, if it isn't there, with 'pretrained' (which downloads it).
+    """
+    model_class, arguments = MODELS[name]
+    path = model_store.resolve('sparknlp', name)
+
+    if path is not None:
+        return _timed(name, lambda: model_class.load(path))
+    return _timed(name, lambda: model_class.pretrained(*arguments))
+
+
+def _local_jars():
+    """
+    Returns the jars saved in the model directory by the prefetch.
+    """
+    path = model_store.model_path('sparknlp', 'jars')
+    return sorted(glob.glob(os.path.join(path, '*.jar'))) if path is not None else []
+
+
+def prefetch(lang=None):
+    """
+    Saves the models of the language 'lang' (of every supported language if None), and the jars of Spark NLP,
+    to the model directory.
+    """
 
-def load():
+    if lang is not None and lang not in ['pt', 'en']:
+        raise InvalidLanguage(lang)
+
+    if model_store.model_path('sparknlp', '') is None:
+        raise ValueError("A model directory must be configured to prefetch the models (T2S_MODEL_DIR).")
+
+    with _load_lock:
+        spark = _get_shared()['spark']
+
+        jars_path = model_store.model_path('sparknlp', 'jars')
+        if not _local_jars():
+            os.makedirs(jars_path, exist_ok=True)
+            for jar in spark.sparkContext.getConf().get("spark.jars", "").split(","):
+                if jar:
+                    shutil.copy(jar[len("file:"):] if jar.startswith("file:") else jar, jars_path)
+
+        names = []
+        for model_lang in ([lang] if lang is not None else LANG_MODELS):
+            names += [name for name in LANG_MODELS[model_lang] if name not in names]
+
+        for name in names:
+            path = model_store.model_path('sparknlp', name)
+            if not os.path.isdir(path):
+                model_class, arguments = MODELS[name]
+                model_class.pretrained(*arguments).write().overwrite().save(path)
+
+
+def _get_shared():
     """
-    Used, at start, to load the pipeline for the supported languages.
+    Returns the Spark session and the stages used by the pipelines of both languages, creating them if needed.
     """
 
-    sparknlp.start()
-    spark = SparkSession.builder.appName("t2s").getOrCreate()
-    spark.sparkContext.setLogLevel("FATAL")
+    with _load_lock:
+        if not _shared:
+            def start_spark():
+                jars = _local_jars()
+                if jars:
+                    # Spark NLP jars saved by the prefetch, so they aren't resolved from Maven
+                    builder = SparkSession.builder.appName("Spark NLP").master("local[*]")
+                    builder = builder.config("spark.driver.memory", "16G")
+                    builder = builder.config("spark.serializer", "org.apache.spark.serializer.KryoSerializer")
+                    builder = builder.config("spark.kryoserializer.buffer.max", "2000M")
+                    builder.config("spark.jars", ",".join(jars)).getOrCreate()
+                elif model_store.is_offline():
+                    raise ModelNotAvailable('sparknlp', 'jars')
+                else:
+                    sparknlp.start()
+                spark = SparkSession.builder.appName("t2s").getOrCreate()
+                spark.sparkContext.setLogLevel("FATAL")
+                return spark
+
+            _shared['spark'] = _timed('spark_session', start_spark)
+
+            _shared['documentAssembler'] = DocumentAssembler().setInputCol("text").setOutputCol("document")
+
+            _shared['tokenizer'] = Tokenizer().setInputCols(["document"]).setOutputCol("token")
+
+            _shared['embeddings'] = _pretrained('glove_100d').setInputCols(["token", "document"]).setOutputCol("embeddings")
+
+    return _shared
+
 
-    documentAssembler = DocumentAssembler().setInputCol("text").setOutputCol("document")
+def _get_pipeline(lang):
+    """
+    Returns the LightPipeline of the language 'lang', loading it if it's the first use.
+    """
 
-    tokenizer         = Tokenizer().setInputCols(["document"]).setOutputCol("token")
+    with _load_lock:
+        if lang not in pipeline:
+            shared = _get_shared()
 
-    embeddings        = WordEmbeddingsModel.pretrained('glove_100d').setInputCols(["token", "document"]).setOutputCol("embeddings")
+            if lang == 'pt':
+                pos_tagger = _pretrained('pos_ud_bosque').setInputCols(["token", "document"]).setOutputCol("pos")
+                ner_model  = _pretrained('wikiner_6B_100').setInputCols(["document", "token", "embeddings"]).setOutputCol("ner")
+            else:
+                pos_tagger = _pretrained('pos_anc').setInputCols(["token", "document"]).setOutputCol("pos")
+                ner_model  = _pretrained('ner_crf').setInputCols(["document", "token", "pos", "embeddings"]).setOutputCol("ner")
 
-    pos_tagger_pt     = PerceptronModel.pretrained('pos_ud_bosque', 'pt').setInputCols(["token", "document"]).setOutputCol("pos")
-    pos_tagger_en     = PerceptronModel.pretrained('pos_anc', 'en').setInputCols(["token", "document"]).setOutputCol("pos")
+            lang_pipeline = Pipeline(stages=[shared['documentAssembler'], shared['tokenizer'], shared['embeddings'], pos_tagger, ner_model])
+            models[lang] = lang_pipeline.fit(shared['spark'].createDataFrame(pd.DataFrame({'text': ['']})))
+            pipeline[lang] = LightPipeline(models[lang])
 
-    ner_model_pt      = NerDLModel.pretrained('wikiner_6B_100', 'pt').setInputCols(["document", "token", "embeddings"]).setOutputCol("ner")
-    ner_model_en      = NerCrfModel.pretrained().setInputCols(["document", "token", "pos", "embeddings"]).setOutputCol("ner")
+    return pipeline[lang]
 
-    pipeline_pt = Pipeline(stages=[documentAssembler, tokenizer, embeddings, pos_tagger_pt, ner_model_pt])
-    pipeline['pt'] = LightPipeline(pipeline_pt.fit(spark.createDataFrame(pd.DataFrame({'text': ['']}))))
 
-    pipeline_en = Pipeline(stages=[documentAssembler, tokenizer, embeddings, pos_tagger_en, ner_model_en])
-    pipeline['en'] = LightPipeline(pipeline_en.fit(spark.createDataFrame(pd.DataFrame({'text': ['']}))))
+def _get_model(lang):
+    """
+    Returns the fitted PipelineModel of the language 'lang', loading it if it's the first use.
+    """
+
+    with _load_lock:
+        _get_pipeline(lang)
+        return models[lang]
 
 
 def extract_actors(lang, text):
@@ -68,15 +213,127 @@ def extract_actors(lang, text):
     if lang not in ['pt', 'en']:
         raise InvalidLanguage
 
-    doc = pipeline[lang].fullAnnotate(text)[0] 
+    doc = _get_pipeline(lang).fullAnnotate(text)[0] 
+
+    return _annotation_actors(doc)
+
+
+def extract_actors_batch(lang, texts):
+    """
+    Parameters
+    ----------
+    lang : str
+        the language of the texts to be annotated
+    texts : list[str]
+        the texts to be annotated, all in one 'fullAnnotate' call or, if there are more than CORPUS_THRESHOLD texts,
+        in one Spark DataFrame (see '_transform_actors')
+
+    Returns
+    -------
+    list[list[tuple[tuple[int, int], str, str]]]
+        for each text, the list of actors identified, like in 'extract_actors'
+
+    Raises
+    ------
+        InvalidLanguage if the language given is invalid/unsupported
+    """
+
+    if lang not in ['pt', 'en']:
+        raise InvalidLanguage
+
+    texts = list(texts)
+    if not texts:
+        return []
+
+    if len(texts) > CORPUS_THRESHOLD:
+        return _transform_actors(lang, texts)
+
+    return [_annotation_actors(doc) for doc in _get_pipeline(lang).fullAnnotate(texts)]
+
+
+def _transform_actors(lang, texts):
+    """
+    Corpus mode: the texts are put in a Spark DataFrame, split in one partition per core (up to one per text),
+    and annotated by the PipelineModel with 'transform', so the work is distributed across the cores of the session.
+    Only the token offsets, the POS tags and the NE tags are collected back to the driver.
+
+    Parameters
+    ----------
+    lang : str
+        the language of the texts
+    texts : list[str]
+        the texts to be annotated
+
+    Returns
+    -------
+    list[list[tuple[tuple[int, int], str, str]]]
+        for each text, the list of actors identified, like in 'extract_actors'
+    """
+
+    model = _get_model(lang)
+    spark = _get_shared()['spark']
+
+    partitions = min(len(texts), spark.sparkContext.defaultParallelism)
+    df = spark.createDataFrame(list(enumerate(texts)), ["id", "text"]).repartition(partitions)
+
+    rows = model.transform(df).select(
+        "id",
+        col("token.begin").alias("begin"),
+        col("token.end").alias("end"),
+        col("pos.result").alias("pos"),
+        col("ner.result").alias("ner")
+    ).collect()
+
+    actors_by_text = [None] * len(texts)
+    for row in rows:
+        actors_by_text[row["id"]] = _tags_actors(row["begin"], row["end"], row["pos"], row["ner"])
+
+    return actors_by_text
+
+
+def _annotation_actors(doc):
+    """
+    Parameters
+    ----------
+    doc : dict
+        the annotation of one text made by the LightPipeline ('fullAnnotate')
+
+    Returns
+    -------
+    list[tuple[tuple[int, int], str, str]]
+        the list of actors identified where each actor is represented by a tuple
+    """
+
+    return _tags_actors([token.begin for token in doc['token']], [token.end for token in doc['token']],
+                        [pos.result for pos in doc['pos']], [ner.result for ner in doc['ner']])
+
+
+def _tags_actors(begins, ends, pos_tags, ner_tags):
+    """
+    Parameters
+    ----------
+    begins : list[int]
+        the begin character offset of each token of a text
+    ends : list[int]
+        the end character offset of each token (inclusive, as in the Spark NLP annotations)
+    pos_tags : list[str]
+        the POS tag of each token
+    ner_tags : list[str]
+        the NE IOB tag of each token
+
+    Returns
+    -------
+    list[tuple[tuple[int, int], str, str]]
+        the list of actors identified where each actor is represented by a tuple
+    """
 
     iob_token_list = []
-    for i in range(len(doc['token'])):
-        start_char_offset = doc['token'][i].begin
-        end_char_offset   = doc['token'][i].end + 1
+    for i in range(len(begins)):
+        start_char_offset = begins[i]
+        end_char_offset   = ends[i] + 1
         char_span         = (start_char_offset, end_char_offset)
-        pos_tag           = normalize(doc['pos'][i].result)
-        ne                = doc['ner'][i].result[:2] + normalize(doc['ner'][i].result[2:]) if doc['ner'][i].result[:2] != 'O' else 'O'
+        pos_tag           = normalize(pos_tags[i])
+        ne                = ner_tags[i][:2] + normalize(ner_tags[i][2:]) if ner_tags[i][:2] != 'O' else 'O'
 
         iob_token_list.append((char_span, pos_tag, ne))
 
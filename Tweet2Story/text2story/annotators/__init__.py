@@ -1,5 +1,9 @@
+import sys
+from importlib import import_module
+
+from text2story.core import model_store # Sets up the model directory before the tools are imported
+from text2story.core import result_cache
 from text2story.core.exceptions import InvalidTool
-from text2story.annotators import SPACY, NLTK, SPARKNLP, PY_HEIDELTIME, ALLENNLP
 
 ACTOR_EXTRACTION_TOOLS = ['spacy', 'nltk', 'sparknlp']
 TIME_EXTRACTION_TOOLS = ['py_heideltime']
@@ -7,47 +11,264 @@ EVENT_EXTRACTION_TOOLS = ['allennlp']
 OBJECTAL_LINKS_RESOLUTION_TOOLS = ['allennlp']
 SEMANTIC_ROLE_LABELLING_TOOLS = ['allennlp']
 
-def load():
-    SPACY.load()
-    NLTK.load()
-    SPARKNLP.load()
-    PY_HEIDELTIME.load()
-    ALLENNLP.load()
+# Version of the format of the results of the annotators, part of the keys of the result cache
+# (bumped when a result changes format, so results cached in an older format aren't used)
+RESULT_FORMAT = 3
+
+# Module of each tool, imported the first time the tool is used (see _tool), so importing text2story
+# (e.g. for the client of the server) or using some tools doesn't import the libraries of every tool
+TOOLS = {'spacy': 'SPACY', 'nltk': 'NLTK', 'sparknlp': 'SPARKNLP', 'py_heideltime': 'PY_HEIDELTIME', 'allennlp': 'ALLENNLP'}
+LANGUAGES = {'spacy': ['pt', 'en'], 'nltk': ['en'], 'sparknlp': ['pt', 'en'], 'py_heideltime': ['pt', 'en'], 'allennlp': ['en']}
+
+def load(tools=None, langs=None):
+    """
+    Loads the models of the tools 'tools' for the languages 'langs', ahead of their first use.
+    Models not loaded here are loaded the first time they are used.
+
+    @param tools: list of tools to load (every tool if None)
+    @param langs: list of languages to load (every language supported by each tool if None)
+    """
+    for tool in (tools if tools is not None else TOOLS):
+        if tool not in TOOLS:
+            raise InvalidTool(tool)
+
+        for lang in LANGUAGES[tool]:
+            if langs is None or lang in langs:
+                _tool(tool).load(lang)
+
+
+def prefetch(tools=None, langs=None):
+    """
+    Saves the models of the tools 'tools' for the languages 'langs' to the model directory (see core.model_store),
+    so later starts load them from disk and can run offline.
+
+    @param tools: list of tools to prefetch (every tool if None)
+    @param langs: list of languages to prefetch (every language supported by each tool if None)
+    """
+    for tool in (tools if tools is not None else TOOLS):
+        if tool not in TOOLS:
+            raise InvalidTool(tool)
+
+        for lang in LANGUAGES[tool]:
+            if langs is None or lang in langs:
+                _tool(tool).prefetch(lang)
+
+
+def resident_models():
+    """
+    @return: dict {tool -> {model -> seconds it took to load}} with the models currently loaded
+    """
+    modules = {tool: _imported_tool(tool) for tool in TOOLS}
+    return {
+        tool: dict(module.load_times) for tool, module in modules.items() if module is not None and module.load_times
+    }
+
+
+def _tool(tool):
+    """
+    @return: the module of the tool 'tool', imported if it's the first use
+    """
+    return import_module(f'{__name__}.{TOOLS[tool]}')
+
+
+def _imported_tool(tool):
+    """
+    @return: the module of the tool 'tool' if it was already imported, None otherwise
+    """
+    return sys.modules.get(f'{__name__}.{TOOLS[tool]}')
+
+def extract_actors(tool, lang, text, document=None):
+    return _cached('actors', tool, lang, [text], lambda texts: [_extract_actors(tool, lang, texts[0], document)])[0]
+
+
+def extract_times(tool, lang, text, publication_time):
+    return _cached('times', tool, lang, [text], lambda texts, publication_times: [_extract_times(tool, lang, texts[0], publication_times[0])],
+                   [publication_time])[0]
+
+
+def extract_objectal_links(tool, lang, text, document=None):
+    return _cached('objectal_links', tool, lang, [text], lambda texts: [_extract_objectal_links(tool, lang, texts[0], document)])[0]
+
+
+def extract_events(tool, lang, text, document=None):
+    return _cached('events', tool, lang, [text], lambda texts: [_extract_events(tool, lang, texts[0], document)])[0]
+
+
+def extract_semantic_role_links(tool, lang, text, document=None):
+    return _cached('semantic_role_links', tool, lang, [text], lambda texts: [_extract_semantic_role_links(tool, lang, texts[0], document)])[0]
+
+
+def extract_actors_batch(tool, lang, texts, documents=None):
+    return _cached('actors', tool, lang, texts,
+                   lambda missing: _extract_actors_batch(tool, lang, missing, _documents_of(missing, texts, documents)))
+
+
+def extract_times_batch(tool, lang, texts, publication_times):
+    return _cached('times', tool, lang, texts, lambda texts, publication_times: _extract_times_batch(tool, lang, texts, publication_times),
+                   publication_times)
+
+
+def extract_objectal_links_batch(tool, lang, texts, documents=None):
+    return _cached('objectal_links', tool, lang, texts,
+                   lambda missing: _extract_objectal_links_batch(tool, lang, missing, _documents_of(missing, texts, documents)))
+
+
+def extract_events_batch(tool, lang, texts, documents=None):
+    return _cached('events', tool, lang, texts,
+                   lambda missing: _extract_events_batch(tool, lang, missing, _documents_of(missing, texts, documents)))
+
+
+def extract_semantic_role_links_batch(tool, lang, texts, documents=None):
+    return _cached('semantic_role_links', tool, lang, texts,
+                   lambda missing: _extract_semantic_role_links_batch(tool, lang, missing, _documents_of(missing, texts, documents)))
+
+
+def _documents_of(missing, texts, documents):
+    """
+    @param missing: some of the texts 'texts'
+    @param texts: list of texts
+    @param documents: list with the Document of each text (core.document) or None
+    @return: list with the Document of each text in 'missing' (None if 'documents' is None)
+    """
+    if documents is None:
+        return None
+
+    documents_by_text = dict(zip(texts, documents))
+    return [documents_by_text[text] for text in missing]
+
+
+def _cached(stage, tool, lang, texts, compute, publication_times=None):
+    """
+    Returns the results of the stage 'stage' for the texts 'texts', taking them from the result cache
+    (see core.result_cache) when it's enabled and computing (with 'compute') and caching just the missing ones.
 
-def extract_actors(tool, lang, text):
+    @param stage: the extraction stage ('actors', 'times', ...)
+    @param tool: the tool used
+    @param lang: the language of the texts
+    @param texts: list of texts
+    @param compute: function that, given a list of texts (and their publication times, for the times),
+    returns the list of their results
+    @param publication_times: list of the publication times of the texts (times only)
+
+    @return: list of the results of each text
+    """
+    cache = result_cache.get_cache()
+    if cache is None:
+        return compute(texts) if publication_times is None else compute(texts, publication_times)
+
+    if tool not in TOOLS:
+        raise InvalidTool(tool)
+
+    # The models of the tool (and the result format and the options of the tool that change its results)
+    # are part of the key, so results of other models aren't used
+    module = _tool(tool)
+    options = module.result_options() if hasattr(module, 'result_options') else None
+    model_version = repr((getattr(module, 'MODELS', None), RESULT_FORMAT, options))
+    if publication_times is None:
+        keys = [cache.key(stage, tool, lang, text, None, model_version) for text in texts]
+    else:
+        keys = [cache.key(stage, tool, lang, text, publication_time, model_version)
+                for text, publication_time in zip(texts, publication_times)]
+
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, (found, _) in enumerate(results) if not found]
+
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        if publication_times is None:
+            computed = compute(missing_texts)
+        else:
+            computed = compute(missing_texts, [publication_times[i] for i in missing])
+
+        for i, result in zip(missing, computed):
+            cache.put(keys[i], result)
+            results[i] = (True, result)
+
+    return [result for _, result in results]
+
+
+def _extract_actors(tool, lang, text, document=None):
     if tool == 'spacy':
-        return SPACY.extract_actors(lang, text)
+        return _tool('spacy').extract_actors(lang, text, document)
     elif tool == 'nltk':
-        return NLTK.extract_actors(lang, text)
+        return _tool('nltk').extract_actors(lang, text, document)
     elif tool == 'sparknlp':
-        return SPARKNLP.extract_actors(lang, text)
+        return _tool('sparknlp').extract_actors(lang, text)
 
     raise InvalidTool
 
 
-def extract_times(tool, lang, text, publication_time):
+def _extract_times(tool, lang, text, publication_time):
     if tool == 'py_heideltime':
-        return PY_HEIDELTIME.extract_times(lang, text, publication_time)
+        return _tool('py_heideltime').extract_times(lang, text, publication_time)
 
     raise InvalidTool
 
 
-def extract_objectal_links(tool, lang, text):
+def _extract_objectal_links(tool, lang, text, document=None):
     if tool == 'allennlp':
-        return ALLENNLP.extract_objectal_links(lang, text)
+        return _tool('allennlp').extract_objectal_links(lang, text, document)
 
     raise InvalidTool
 
 
-def extract_events(tool, lang, text):
+def _extract_events(tool, lang, text, document=None):
     if tool == 'allennlp':
-        return ALLENNLP.extract_events(lang, text)
+        return _tool('allennlp').extract_events(lang, text, document)
 
     raise InvalidTool
 
 
-def extract_semantic_role_links(tool, lang, text):
+def _extract_semantic_role_links(tool, lang, text, document=None):
     if tool == 'allennlp':
-        return ALLENNLP.extract_semantic_role_links(lang, text)
+        return _tool('allennlp').extract_semantic_role_links(lang, text, document)
 
     raise InvalidTool
+
+
+def _extract_actors_batch(tool, lang, texts, documents=None):
+    if tool == 'spacy':
+        return _tool('spacy').extract_actors_batch(lang, texts, documents)
+    elif tool == 'nltk':
+        return _tool('nltk').extract_actors_batch(lang, texts, documents)
+    elif tool == 'sparknlp':
+        return _tool('sparknlp').extract_actors_batch(lang, texts)
+
+    raise InvalidTool
+
+
+def _extract_times_batch(tool, lang, texts, publication_times):
+    if tool == 'py_heideltime':
+        return _tool('py_heideltime').extract_times_batch(lang, texts, publication_times)
+
+    raise InvalidTool
+
+
+def _extract_objectal_links_batch(tool, lang, texts, documents=None):
+    if tool == 'allennlp':
+        return _tool('allennlp').extract_objectal_links_batch(lang, texts, documents=documents)
+
+    raise InvalidTool
+
+
+def _extract_events_batch(tool, lang, texts, documents=None):
+    if tool == 'allennlp':
+        return _tool('allennlp').extract_events_batch(lang, texts, documents=documents)
+
+    raise InvalidTool
+
+
+def _extract_semantic_role_links_batch(tool, lang, texts, documents=None):
+    if tool == 'allennlp':
+        return _tool('allennlp').extract_semantic_role_links_batch(lang, texts, documents=documents)
+
+    raise InvalidTool
+
+
+def clear_srl_cache():
+    """
+    Clears the SRL results shared by the event and semantic role link extraction.
+    """
+    allennlp = _imported_tool('allennlp')
+    if allennlp is not None: # Otherwise there's nothing to clear
+        allennlp.clear_srl_cache()
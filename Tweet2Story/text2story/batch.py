@@ -0,0 +1,206 @@
+"""
+    text2story.batch
+
+    Batch mode of the CLI: extracts the narratives of many files (a directory, a glob or a manifest) in one process
+"""
+
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from time import perf_counter
+
+from text2story.core.corpus import extract_narratives
+
+
+def find_inputs(source, base_dir=None):
+    """
+    Parameters
+    ----------
+    source : str
+        a directory (every .txt file in it), a glob pattern (e.g. 'topics/*.txt') or a manifest
+        (a file with one input path per line; relative paths are relative to the manifest)
+    base_dir : str
+        directory where relative sources that don't exist are looked for (e.g. Data/input_files)
+
+    Returns
+    -------
+    list[str]
+        the paths of the input files, sorted and without repetitions (manifests keep their order)
+
+    Raises
+    ------
+    FileNotFoundError if 'source' isn't a directory, a manifest or a pattern matching some file
+    """
+
+    if base_dir is not None and not os.path.isabs(source) and not glob.glob(source):
+        source = os.path.join(base_dir, source)
+
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, '*.txt')))
+    elif os.path.isfile(source):
+        paths = []
+        manifest_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    paths.append(os.path.join(manifest_dir, line))
+    else:
+        paths = sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+        if not paths:
+            raise FileNotFoundError(f"No input files found for {source}")
+
+    return list(dict.fromkeys(paths))
+
+
+def output_path(input_path, output_dir):
+    """
+    Returns the path of the annotation file of 'input_path' ('<name>.ann' in 'output_dir').
+    """
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(input_path))[0] + '.ann')
+
+
+def is_up_to_date(input_path, output_dir):
+    """
+    Returns whether the annotation file of 'input_path' exists and is newer than it.
+    """
+    ann_path = output_path(input_path, output_dir)
+    return os.path.exists(ann_path) and os.path.getmtime(ann_path) >= os.path.getmtime(input_path)
+
+
+def run(inputs, output_dir, lang='en', workers=1, batch_size=8, force=False, blank_lines=True, tools=None,
+        chunk_size=None, log=print):
+    """
+    Extracts the narrative of every input file to '<name>.ann' in 'output_dir'.
+
+    The files are split in batches, annotated by a pool of 'workers' threads that share the loaded models.
+    A batch that fails is annotated again one file at a time, so only the files that fail are counted as failed.
+    Files whose annotation is up to date are skipped, so an interrupted run resumes where it stopped;
+    each annotation is written to a temporary file first, so interrupted writes aren't taken as up to date.
+
+    Parameters
+    ----------
+    inputs : list[str]
+        paths of the input files (one document per file, like the single file mode)
+    output_dir : str
+        directory of the annotation files
+    lang : str
+        the language of the documents
+    workers : int
+        number of batches annotated at the same time
+    batch_size : int
+        number of documents annotated together (see extract_narratives)
+    force : bool
+        whether to annotate files whose annotation is up to date too
+    blank_lines : bool
+        whether to separate every record of the annotations with a blank line
+    tools : dict{str -> iterable[str]}
+        the tools of each stage, like in Narrative.extract_all
+    chunk_size : int
+        maximum number of characters of a document annotated at once, like in extract_narratives
+        (None for the whole documents)
+    log : callable
+        called with the progress messages
+
+    Returns
+    -------
+    dict
+        'annotated', 'skipped' and 'failed' (numbers of files), 'documents/s' and 'tokens/s'
+        (whitespace separated tokens of the annotated files) and 'seconds'
+
+    Raises
+    ------
+    ValueError if two inputs have the same annotation file (the same name, in different directories)
+    """
+
+    if workers < 1:
+        raise ValueError(f"Parameter workers must be positive.\nInstead it was {workers}")
+
+    # The annotation files are named after the inputs only, so inputs with the same name would overwrite each other
+    inputs_by_output = {}
+    for path in inputs:
+        inputs_by_output.setdefault(output_path(path, output_dir), []).append(path)
+
+    collisions = [paths for paths in inputs_by_output.values() if len(paths) > 1]
+    if collisions:
+        raise ValueError(f"Inputs with the same name would overwrite each other's annotation file in {output_dir}:\n"
+                         f"{'; '.join(', '.join(paths) for paths in collisions)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    pending = [path for path in inputs if force or not is_up_to_date(path, output_dir)]
+    skipped = len(inputs) - len(pending)
+    if skipped:
+        log(f"Skipping {skipped} files with up to date annotations")
+
+    publication_time = datetime.now().date().isoformat()
+
+    def extract(documents):
+        texts = [(text, publication_time) for _, text in documents]
+        return list(extract_narratives(lang, texts, tools, batch_size=len(documents), chunk_size=chunk_size))
+
+    def annotate(batch):
+        """
+        Annotates the files of the batch together or, if that fails, one by one, so a failing file
+        (unreadable, or failing an extraction stage) doesn't fail the other files of its batch.
+
+        @return: list of (path, whitespace separated tokens, error) of each file - the error is None if it was annotated
+        """
+        results, documents = [], []
+        for path in batch:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    documents.append((path, f.read()))
+            except Exception as e:
+                results.append((path, 0, e))
+
+        narratives = None
+        if len(documents) > 1:
+            try:
+                narratives = extract(documents)
+            except Exception:
+                pass # Annotated one by one below
+
+        for i, (path, text) in enumerate(documents):
+            try:
+                narrative = narratives[i] if narratives is not None else extract([(path, text)])[0]
+
+                ann_path = output_path(path, output_dir)
+                with open(ann_path + '.tmp', 'w', encoding='utf-8') as f:
+                    narrative.write_ISO_annotation(f, blank_lines)
+                os.replace(ann_path + '.tmp', ann_path)
+            except Exception as e:
+                results.append((path, 0, e))
+            else:
+                results.append((path, len(text.split()), None))
+
+        return results
+
+    start = perf_counter()
+
+    annotated, failed, tokens = 0, 0, 0
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(annotate, batch) for batch in batches]
+        for future in as_completed(futures):
+            for path, file_tokens, error in future.result():
+                if error is None:
+                    annotated += 1
+                    tokens += file_tokens
+                    log(f"[{annotated + failed}/{len(pending)}] Annotated {os.path.basename(path)}")
+                else:
+                    failed += 1
+                    log(f"[{annotated + failed}/{len(pending)}] Failed {os.path.basename(path)}"
+                        f" - {type(error).__name__}: {error}")
+
+    seconds = perf_counter() - start
+
+    return {
+        'annotated': annotated,
+        'skipped': skipped,
+        'failed': failed,
+        'seconds': seconds,
+        'documents/s': annotated / seconds if seconds > 0 else 0.0,
+        'tokens/s': tokens / seconds if seconds > 0 else 0.0
+    }
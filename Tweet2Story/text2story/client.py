@@ -0,0 +1,85 @@
+"""
+    text2story.client
+
+    Client of the annotation server (see text2story.server). It only needs the standard library, so asking
+    a running server for a narrative doesn't import the annotators or load any model
+"""
+
+import http.client
+import json
+import socket
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+def request_narrative(text, publication_time=None, lang=None, output_format='ann', blank_lines=True,
+                      host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=None):
+    """
+    Asks a running server for the narrative of 'text'.
+
+    Parameters
+    ----------
+    text : str
+        the text to be annotated
+    publication_time : str
+        the publication time ('XXXX-XX-XX'); today if None
+    lang : str
+        the language of the text; the first language loaded by the server if None
+    output_format : str
+        'ann' for the annotation or 'json' for the narrative as JSON
+    blank_lines : bool
+        whether to separate every record of the annotation with a blank line
+    host, port, socket_path
+        the address of the server, as given to create_server
+    timeout : float
+        seconds to wait for the server (None waits forever)
+
+    Returns
+    -------
+    str or dict
+        the annotation ('ann') or the decoded JSON answer ('json')
+
+    Raises
+    ------
+    RuntimeError if the server couldn't extract the narrative
+    """
+
+    body = {'text': text, 'format': output_format, 'blank_lines': blank_lines}
+    if publication_time is not None:
+        body['publication_time'] = publication_time
+    if lang is not None:
+        body['lang'] = lang
+
+    if socket_path is not None:
+        connection = _UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    try:
+        connection.request('POST', '/narrative', json.dumps(body).encode('utf-8'), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        answer = response.read().decode('utf-8')
+    finally:
+        connection.close()
+
+    if response.status != 200:
+        raise RuntimeError(f"The server couldn't extract the narrative ({response.status}): {answer}")
+
+    return json.loads(answer) if output_format == 'json' else answer
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
@@ -8,6 +8,11 @@ from text2story.annotators import ACTOR_EXTRACTION_TOOLS, TIME_EXTRACTION_TOOLS,
 from text2story.annotators import EVENT_EXTRACTION_TOOLS, SEMANTIC_ROLE_LABELLING_TOOLS
 from text2story.annotators import extract_actors, extract_times, extract_objectal_links, extract_events
 from text2story.annotators import extract_semantic_role_links
+from text2story.annotators import extract_actors_batch, extract_times_batch, extract_objectal_links_batch
+from text2story.annotators import extract_events_batch, extract_semantic_role_links_batch
+from text2story.core.utils import merge_actors
+
+from concurrent.futures import ThreadPoolExecutor
 
 
 class Annotator:
@@ -52,7 +57,7 @@ class Annotator:
         self.tools = tools
 
 
-    def extract_actors(self, lang, text):
+    def extract_actors(self, lang, text, document=None):
         """
         Parameters
         ----------
@@ -61,6 +66,9 @@ class Annotator:
             current supported languages are: portuguese ('pt'); english ('en')
         text : str
             the text to be made the extraction
+        document : Document
+            the text split in sentences and tokens (see core.document), shared by the tools that use them;
+            each tool makes it from the text if None
 
         Returns
         -------
@@ -83,92 +91,39 @@ class Annotator:
             self.tools = ACTOR_EXTRACTION_TOOLS
             nr_tools = len(self.tools)
 
-        # Gather the annotations made by the tools specified and combine the results
-        annotations = []
-        for tool in self.tools:
-            annotations.append(extract_actors(tool, lang, text))
-
-        final_annotation = []
-
-        idxs = [0] * nr_tools # Current actor position from each tool
-
-        while not(all([len(annotations[i]) == idxs[i] for i in range(nr_tools)])): # We finish when we consumed every actor identified by every tool
-            tool_id = -1
-            tool_id_start_char_offset = len(text) # len(self.text) acting as infinite
-
-            # Get the next entity chunk to be gather (the one with the lowest start character span)
-            for i in range(nr_tools):
-                if idxs[i] < len(annotations[i]):
-                    current_actor = annotations[i][idxs[i]]
-                    current_actor_start_character_span = current_actor[0][0]
-
-                    if current_actor_start_character_span < tool_id_start_char_offset:
-                        tool_id = i
-                        tool_id_start_char_offset = current_actor_start_character_span
-
-
-            # For now, our actor consists of a unique annotation made by some tool
-            actor_start_character_offset = annotations[tool_id][idxs[tool_id]][0][0]
-            actor_end_character_offset   = annotations[tool_id][idxs[tool_id]][0][1]
-            # For the lexical head and type we will accumulate the results and latter choose the best following a criterion
-            actor_lexical_heads          = [annotations[tool_id][idxs[tool_id]][1]]
-            actor_types                  = [annotations[tool_id][idxs[tool_id]][2]]
-
-            idxs[tool_id] += 1 # Consume the annotation
-
-            # Other tools may have identified the same actor.
-            # We need to search if theres some intersection in the span of the identified actor, with the other tools.
-            # That is, they identified the same actor, but maybe missed some initial part of it.
-            # We identify this situation by looking to the character start char offset of the current actor identified by each tool,
-            # and if it happens to be less than our end char offset of our current identified actor, then we can extend the current information we have.
-            # Note that we may extend the end char offset, each force us to repete this process, till the offsets stabilize.
-
-            # In the first interation, the tool that first identified the actor, will be matched and add double information and we don't want that
-            # If we get to a second iteration, then that means the actor end char offset was extended which, in that case, the tool that first identified the actor, may now extend also...
-            first_iteration = True
-            while True:
-                flag = False
-                for i in range(nr_tools):
-                    if first_iteration and i == tool_id:
-                        continue
-
-                    if idxs[i] < len(annotations[i]):
-                        if annotations[i][idxs[i]][0][0] <= actor_end_character_offset:
-                            if actor_end_character_offset < annotations[i][idxs[i]][0][1]:
-                                actor_end_character_offset = annotations[i][idxs[i]][0][1]
-                                flag = True
-
-                            actor_lexical_heads.append(annotations[i][idxs[i]][1])
-                            actor_types.append(annotations[i][idxs[i]][2])
-                            idxs[i] = idxs[i] + 1
-
-                first_iteration = False
-                if not(flag):
-                    break
-
-            # Now that we identified the larger span possible for the actor, we need to fix the lexical head and type.
-
-            # For the POS tag, we favor specifics the 'Noun' and 'Pronoun' tag and then we take the most common.
-            # Since we only defined this labels, the others will appear as 'UNDEF'
-            rmv_undef_pos_tags = [ne for ne in actor_lexical_heads if ne != 'UNDEF']
-            if rmv_undef_pos_tags:
-                actor_lexical_head = max(rmv_undef_pos_tags, key=rmv_undef_pos_tags.count)
-            else:
-                continue # Discard the actor if it's lexical head isn't a 'Noun' or 'Pronoun'
-
-            # For the NE, we also favor specifics NEs, in this case all labels versus the NE 'OTHER' and we take the most common.
-            rmv_other_ne = [ne for ne in actor_types if ne != 'Other']
-            if rmv_other_ne:
-                actor_type = max(rmv_other_ne, key=rmv_other_ne.count)
-            else:
-                actor_type = 'Other'
-
-            # Discard entities with types other than 'Per', 'Org', 'Loc', 'Obj', 'Nat' & 'Other'.
-            # Used, typically, to eliminate dates and durations incorrectly identified as an actor.
-            if actor_type in ['Per', 'Org', 'Loc', 'Obj', 'Nat', 'Other']:
-                final_annotation.append(((actor_start_character_offset, actor_end_character_offset), actor_lexical_head, actor_type))
-
-        return final_annotation
+        # Gather the annotations made by the tools specified (concurrently) and combine the results
+        with ThreadPoolExecutor(max_workers=nr_tools) as executor:
+            annotations = list(executor.map(lambda tool: extract_actors(tool, lang, text, document), self.tools))
+
+        return merge_actors(annotations)
+
+    def extract_actors_batch(self, lang, texts, documents=None):
+        """
+        Batch version of 'extract_actors', using the batched entry point of each tool.
+
+        Parameters
+        ----------
+        lang : str
+            the language of the texts
+        texts : list[str]
+            the texts to be made the extraction
+        documents : list[Document]
+            the Document of each text (see 'extract_actors') or None
+
+        Returns
+        -------
+        list[list[tuple[tuple[int, int], str, str]]]
+            for each text, the list of actors identified
+        """
+
+        if len(self.tools) == 0:
+            self.tools = ACTOR_EXTRACTION_TOOLS
+
+        texts = list(texts)
+        with ThreadPoolExecutor(max_workers=len(self.tools)) as executor:
+            annotations_by_tool = list(executor.map(lambda tool: extract_actors_batch(tool, lang, texts, documents), self.tools))
+
+        return [merge_actors(list(annotations)) for annotations in zip(*annotations_by_tool)]
 
     def extract_times(self, lang, text, publication_time):
         """
@@ -200,14 +155,30 @@ class Annotator:
         times = extract_times(self.tools[0], lang, text, publication_time) # :: [(time_start_offset, time_end_offset, time_type, time_value)]
         return times
 
-    def extract_events(self, lang, text):
+    def extract_times_batch(self, lang, texts, publication_times):
+        """
+        Batch version of 'extract_times'.
+
+        Returns
+        -------
+        list[list[tuple[tuple[int, int], str, str]]]
+            for each text, the times identified
+        """
+
+        if len(self.tools) == 0:
+            self.tools = TIME_EXTRACTION_TOOLS
+
+        return extract_times_batch(self.tools[0], lang, texts, publication_times)
+
+    def extract_events(self, lang, text, document=None):
         """
         Event extraction. Only has one tool so it only returns what the annotator finds.
 
         @param lang: The language of the text
         @param text: The text to be annotated
+        @param document: The text split in sentences and tokens (see core.document) or None
 
-        @return: Pandas DataFrame with each event found in the text and their character spans
+        @return: List of SemanticRoleArgument with each event found in the text and their character spans
         """
         nr_tools = len(self.tools)
 
@@ -215,10 +186,21 @@ class Annotator:
             self.tools = EVENT_EXTRACTION_TOOLS
             nr_tools = len(self.tools)
 
-        events = extract_events(self.tools[0], lang, text)
+        events = extract_events(self.tools[0], lang, text, document)
         return events
 
-    def extract_objectal_links(self, lang, text):
+    def extract_events_batch(self, lang, texts, documents=None):
+        """
+        Batch version of extract_events.
+
+        @return: List with the events (SemanticRoleArgument) of each text
+        """
+        if len(self.tools) == 0:
+            self.tools = EVENT_EXTRACTION_TOOLS
+
+        return extract_events_batch(self.tools[0], lang, texts, documents)
+
+    def extract_objectal_links(self, lang, text, document=None):
         """
         Parameters
         ----------
@@ -227,6 +209,8 @@ class Annotator:
             Current supported languages are: english ('en')
         text : str
             The text to be made the extraction.
+        document : Document
+            The text split in sentences and tokens (see core.document) or None.
 
         Returns
         -------
@@ -243,16 +227,33 @@ class Annotator:
             nr_tools = len(self.tools)
 
         # NOTE: The extraction is done with only one tool, so the result in just the extraction done by the tool
-        return extract_objectal_links(self.tools[0], lang, text)
+        return extract_objectal_links(self.tools[0], lang, text, document)
+
+    def extract_objectal_links_batch(self, lang, texts, documents=None):
+        """
+        Batch version of 'extract_objectal_links'.
 
-    def extract_semantic_role_links(self, lang, text):
+        Returns
+        -------
+        list[list[list[tuple[int, int]]]]
+            for each text, the list with the clusters identified
+        """
+
+        if len(self.tools) == 0:
+            self.tools = OBJECTAL_LINKS_RESOLUTION_TOOLS
+
+        return extract_objectal_links_batch(self.tools[0], lang, texts, documents)
+
+    def extract_semantic_role_links(self, lang, text, document=None):
         """
         Semantic Role Link extraction. Only has one tool, so no tool merging is needed.
 
         @param lang: The language of the text
         @param text: The text to be annotated
+        @param document: The text split in sentences and tokens (see core.document) or None
 
-        @return: List of pandas DataFrames with the actors, events and their semantic roles to be linked
+        @return: List with the SemanticRoleArgument of each sentence - the actors, events and their semantic roles
+        to be linked, in text order
         """
         nr_tools = len(self.tools)
 
@@ -261,5 +262,16 @@ class Annotator:
             self.tools = SEMANTIC_ROLE_LABELLING_TOOLS
             nr_tools = len(self.tools)
 
-        srl_by_sentence = extract_semantic_role_links(self.tools[0], lang, text)
+        srl_by_sentence = extract_semantic_role_links(self.tools[0], lang, text, document)
         return srl_by_sentence
+
+    def extract_semantic_role_links_batch(self, lang, texts, documents=None):
+        """
+        Batch version of extract_semantic_role_links.
+
+        @return: List with the result of extract_semantic_role_links for each text
+        """
+        if len(self.tools) == 0:
+            self.tools = SEMANTIC_ROLE_LABELLING_TOOLS
+
+        return extract_semantic_role_links_batch(self.tools[0], lang, texts, documents)
@@ -0,0 +1,130 @@
+"""
+	text2story.core.corpus
+
+	Batch extraction of the narratives of many documents
+"""
+
+from itertools import islice
+
+from text2story.core.annotator import Annotator
+from text2story.core.document import Document
+from text2story.core.narrative import Narrative
+from text2story.core.utils import split_chunks
+
+
+def extract_narratives(lang, documents, tools=None, batch_size=32, compact=False, chunk_size=None):
+	"""
+	Extracts the narrative of every document, processing the documents in batches.
+
+	Each extraction stage (actors, times, objectal links, events and semantic role links) runs over a whole batch
+	at once, with the batched entry points of the annotators: spaCy 'pipe', NLTK 'pos_tag_sents' and 'ne_chunk_sents',
+	the Spark NLP LightPipeline (or a DataFrame 'transform', for large batches), the AllenNLP SRL predictor's
+	'predict_batch_instance' on the sentences of every document, and its coreference predictor on each document.
+	The results are the same as calling the extract_* methods of each narrative in that order.
+
+	Documents longer than 'chunk_size' characters are split in chunks like in Narrative.extract_all (see split_chunks):
+	the chunks go through each stage with the other documents of the batch, so no annotator gets more than
+	'chunk_size' characters at once, and their spans are rebased to the full document.
+
+	Parameters
+	----------
+	lang : str
+		the language of the documents
+	documents : iterable[tuple[str, str]]
+		the documents, as (text, publication_time) pairs; it can be a generator
+	tools : dict{str -> iterable[str]}
+		the tools of each stage, like in Narrative.extract_all; stages not in the dict use every tool available
+	batch_size : int
+		number of documents processed together
+	compact : bool
+		whether the narratives store their entities and links in the compact versions
+	chunk_size : int
+		maximum number of characters of a document annotated at once (None for the whole documents)
+
+	Returns
+	-------
+	generator[Narrative]
+		the narrative of each document, in the order of the documents, yielded as each batch is finished
+	"""
+
+	if batch_size < 1:
+		raise ValueError(f"Parameter batch_size must be positive.\nInstead it was {batch_size}")
+
+	tools = tools or {}
+
+	documents = iter(documents)
+	while True:
+		batch = list(islice(documents, batch_size))
+		if not batch:
+			return
+
+		yield from _extract_batch(lang, batch, tools, compact, chunk_size)
+
+
+def _extract_batch(lang, batch, tools, compact, chunk_size=None):
+	"""
+	Parameters
+	----------
+	lang : str
+		the language of the documents
+	batch : list[tuple[str, str]]
+		the (text, publication_time) pairs of the documents
+	tools : dict{str -> iterable[str]}
+		the tools of each stage
+	compact : bool
+		whether the narratives store their entities and links in the compact versions
+	chunk_size : int
+		maximum number of characters of a document annotated at once (None for the whole documents)
+
+	Returns
+	-------
+	list[Narrative]
+		the narrative of each document
+	"""
+
+	narratives = [Narrative(lang, text, publication_time, compact=compact) for text, publication_time in batch]
+
+	# The pieces annotated: the whole documents or, for the documents longer than chunk_size, their chunks
+	# (without the blank ones), each one with the document it belongs to and its offset in the document
+	pieces = []
+	for i, narrative in enumerate(narratives):
+		if chunk_size is None or len(narrative.text) <= chunk_size:
+			pieces.append((i, 0, narrative.text))
+		else:
+			pieces.extend((i, offset, chunk) for offset, chunk in split_chunks(narrative.text, chunk_size) if chunk.strip())
+
+	texts = [text for _, _, text in pieces]
+	documents = [Document(text, lang) for text in texts] # Split in sentences and tokens once, for every stage
+
+	def annotator(stage):
+		return Annotator(tuple(tools.get(stage, ())))
+
+	def by_narrative(stage, results):
+		# The results of the pieces of each narrative, rebased to its text
+		merged = [[] for _ in narratives]
+		for (i, offset, _), piece_results in zip(pieces, results):
+			merged[i].extend(Narrative._rebase(stage, piece_results, offset))
+		return merged
+
+	actors_batch = annotator('actors').extract_actors_batch(lang, texts, documents)
+	for narrative, actors in zip(narratives, by_narrative('actors', actors_batch)):
+		narrative._apply_actors(actors)
+
+	publication_times = [narratives[i].publication_time for i, _, _ in pieces]
+	times_batch = annotator('times').extract_times_batch(lang, texts, publication_times)
+	for narrative, times in zip(narratives, by_narrative('times', times_batch)):
+		narrative._apply_times(times)
+
+	clusters_batch = annotator('objectal_links').extract_objectal_links_batch(lang, texts, documents)
+	for narrative, clusters in zip(narratives, by_narrative('objectal_links', clusters_batch)):
+		narrative._apply_objectal_links(clusters)
+
+	events_batch = annotator('events').extract_events_batch(lang, texts, documents)
+	for narrative, events in zip(narratives, by_narrative('events', events_batch)):
+		narrative._apply_events(events)
+
+	srl_batch = annotator('semantic_role_links').extract_semantic_role_links_batch(lang, texts, documents)
+	for narrative, srl_by_sentence in zip(narratives, by_narrative('semantic_role_links', srl_batch)):
+		narrative._apply_semantic_role_links(srl_by_sentence)
+
+	return narratives
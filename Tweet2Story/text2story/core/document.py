@@ -0,0 +1,102 @@
+"""
+	text2story.core.document
+
+	Document class (a text split in sentences and tokens, shared by the annotators)
+"""
+
+from threading import Lock
+
+from text2story.core import model_store # Puts the NLTK data of the model directory on the NLTK search path
+
+from text2story.core.exceptions import InvalidLanguage
+from text2story.core.utils import align_tokens
+
+LANGUAGES = {'en': 'english', 'pt': 'portuguese'}
+
+
+class Document:
+	"""
+	A text preprocessed once for every annotator that works on its sentences and tokens (NLTK, AllenNLP),
+	so the text isn't segmented, tokenized and aligned again by each of them.
+
+	The sentences are found with the NLTK 'sent_tokenize' and the tokens of each sentence with 'word_tokenize'.
+	The segmentation is done the first time it's needed, so the annotators that don't use it (spaCy, SparkNLP, ...)
+	don't pay for it.
+
+	Attributes
+	----------
+	text: str
+		the text
+	lang: str
+		the language of the text
+	sentence_spans: list[tuple[int, int]]
+		the character span of each sentence
+	tokens: list[list[str]]
+		the tokens of each sentence, as given by the tokenizer (quotes and brackets normalized, like '``')
+	token_spans: list[list[tuple[int, int]]]
+		the character span of each token of each sentence (None if the token wasn't found in the text)
+	words: list[list[str]]
+		the tokens of each sentence found in the text, as they are written in the text
+	word_spans: list[list[tuple[int, int]]]
+		the character span of each word of each sentence
+	"""
+
+	def __init__(self, text, lang='en'):
+		if lang not in LANGUAGES:
+			raise InvalidLanguage(lang)
+
+		self.text = text
+		self.lang = lang
+
+		self._segmented = False
+		self._lock = Lock() # The annotators of different stages may use the document concurrently
+
+	@property
+	def sentence_spans(self):
+		self._segment()
+		return self._sentence_spans
+
+	@property
+	def tokens(self):
+		self._segment()
+		return self._tokens
+
+	@property
+	def token_spans(self):
+		self._segment()
+		return self._token_spans
+
+	@property
+	def words(self):
+		self._segment()
+		return self._words
+
+	@property
+	def word_spans(self):
+		self._segment()
+		return self._word_spans
+
+	def _segment(self):
+		with self._lock:
+			if self._segmented:
+				return
+
+			from nltk.tokenize import sent_tokenize, word_tokenize # Only when a document is segmented
+
+			language = LANGUAGES[self.lang]
+
+			sentences = sent_tokenize(self.text, language=language)
+			self._sentence_spans = [span for span in align_tokens(self.text, sentences) if span is not None]
+
+			self._tokens, self._token_spans, self._words, self._word_spans = [], [], [], []
+			for start, end in self._sentence_spans:
+				tokens = word_tokenize(self.text[start:end], language=language)
+				spans = align_tokens(self.text, tokens, start)
+				found = [span for span in spans if span is not None]
+
+				self._tokens.append(tokens)
+				self._token_spans.append(spans)
+				self._words.append([self.text[word_start:word_end] for word_start, word_end in found])
+				self._word_spans.append(found)
+
+			self._segmented = True
@@ -2,8 +2,11 @@
 	text2story.core.entity_structures
 
 	Entity structures classes (Actor, TimeX and Event)
+	and their compact counterparts (CompactActor, CompactTimeX and CompactEvent)
 """
 
+from sys import intern
+
 class ActorEntity:
     """
     Representation of an actor entity.
@@ -78,3 +81,97 @@ class EventEntity:
         self.polarity = "Pos"
         self.factuality = "Factual"
         self.tense = "Pres"
+
+
+class CompactActorEntity:
+    """
+    Compact representation of an actor entity, with the same attributes as ActorEntity.
+
+    The instances have no __dict__, the text is sliced from the narrative text only when it is accessed and
+    the attributes that are the same for every actor are class attributes.
+
+    Attributes
+    ----------
+    narrative: Narrative
+        The narrative (or any object with a 'text' attribute) the actor was identified in.
+    character_span: tuple[int, int]
+        The character span of the actor.
+    lexical_head: str
+        The lexical head of the actor (interned).
+    type: str
+        The type of the actor (interned).
+    """
+
+    __slots__ = ('narrative', 'character_span', 'lexical_head', 'type')
+
+    individuation = 'Individual'
+    involvement   = '1'
+
+    def __init__(self, narrative, character_span, lexical_head, actor_type):
+        self.narrative      = narrative
+        self.character_span = character_span
+        self.lexical_head   = intern(lexical_head)
+        self.type           = intern(actor_type)
+
+    @property
+    def text(self):
+        return self.narrative.text[self.character_span[0]:self.character_span[1]]
+
+class CompactTimeEntity:
+    """
+    Compact representation of a time entity, with the same attributes as TimeEntity.
+
+    Attributes
+    ----------
+    narrative: Narrative
+        The narrative (or any object with a 'text' attribute) the time was identified in.
+    character_span: tuple[int, int]
+        The character span of the time.
+    value: str
+        The value of the time.
+    type: str
+        The type of the time (interned).
+    """
+
+    __slots__ = ('narrative', 'character_span', 'value', 'type')
+
+    temporal_function = 'Publication_Time'
+
+    def __init__(self, narrative, character_span, value, timex_type):
+        self.narrative      = narrative
+        self.character_span = character_span
+        self.value          = value
+        self.type           = intern(timex_type)
+
+    @property
+    def text(self):
+        return self.narrative.text[self.character_span[0]:self.character_span[1]]
+
+class CompactEventEntity:
+    """
+    Compact representation of an event entity, with the same attributes as EventEntity.
+
+    The SRL joins the tokens of the event with spaces, which can differ from the slice of the text.
+    Only in that case the text is stored, otherwise it is sliced from the narrative text when accessed.
+    """
+
+    __slots__ = ('narrative', 'character_span', '_text')
+
+    event_class = "Occurrence"
+    polarity    = "Pos"
+    factuality  = "Factual"
+    tense       = "Pres"
+
+    def __init__(self, narrative, character_span, text=None):
+        self.narrative      = narrative
+        self.character_span = character_span
+
+        if text == narrative.text[character_span[0]:character_span[1]]:
+            text = None
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is not None:
+            return self._text
+        return self.narrative.text[self.character_span[0]:self.character_span[1]]
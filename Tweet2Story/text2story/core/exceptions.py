@@ -22,3 +22,13 @@ class InvalidTool(Exception):
 		description = ('Invalid tool: ' + tool)
 		
 		super().__init__(description)
+
+class ModelNotAvailable(Exception):
+	"""
+	Raised, in offline mode, if a model isn't in the local model directory.
+	"""
+
+	def __init__(self, tool, name):
+		description = ('Model not available offline: ' + tool + '/' + name + ' (run the prefetch first)')
+		
+		super().__init__(description)
@@ -2,8 +2,11 @@
 	text2story.core.link_structures
 
 	Link structure classes (Temporal, aspectual, subordination, semantic role and objectal)
+	and the compact counterparts of the semantic role and objectal links
 """
 
+from sys import intern
+
 
 class TemporalLink:
     pass
@@ -29,3 +32,30 @@ class ObjectalLink:
         self.type = 'objIdentity'
         self.arg1 = arg1
         self.arg2 = arg2
+
+
+class CompactSemanticRoleLink:
+    """
+    Compact (no __dict__) SemanticRoleLink, with the type interned.
+    """
+
+    __slots__ = ('type', 'actor', 'event')
+
+    def __init__(self, actor, event, type="theme"):
+        self.type = intern(type)
+        self.actor = actor
+        self.event = event
+
+
+class CompactObjectalLink:
+    """
+    Compact (no __dict__) ObjectalLink. The type is the same for every link, so it's a class attribute.
+    """
+
+    __slots__ = ('arg1', 'arg2')
+
+    type = 'objIdentity'
+
+    def __init__(self, arg1, arg2):
+        self.arg1 = arg1
+        self.arg2 = arg2
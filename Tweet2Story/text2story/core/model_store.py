@@ -0,0 +1,116 @@
+"""
+	text2story.core.model_store
+
+	Local model directory (models downloaded once and loaded from disk) and offline mode
+"""
+
+import os
+
+from text2story.core.exceptions import ModelNotAvailable
+
+MODEL_DIR_VARIABLE = 'T2S_MODEL_DIR'
+OFFLINE_VARIABLE = 'T2S_OFFLINE'
+
+_config = {
+	'model_dir': os.environ.get(MODEL_DIR_VARIABLE) or None,
+	'offline': os.environ.get(OFFLINE_VARIABLE, '').lower() in ('1', 'true', 'yes')
+}
+
+
+def configure(model_dir=None, offline=None):
+	"""
+	Sets the local model directory and/or the offline mode (arguments left as None keep their current value).
+	The defaults come from the environment variables T2S_MODEL_DIR and T2S_OFFLINE.
+
+	The transformers used inside the AllenNLP models read their own settings when they are imported,
+	so, for them to be cached in (and loaded offline from) the model directory, use the environment variables.
+
+	Parameters
+	----------
+	model_dir : str
+		directory with the models, one subdirectory per tool (e.g. 'allennlp/srl_en', 'spacy/en_core_web_lg')
+	offline : bool
+		if True, models are only loaded from the model directory and the network is never used
+	"""
+
+	if model_dir is not None:
+		_config['model_dir'] = os.path.abspath(os.path.expanduser(model_dir))
+	if offline is not None:
+		_config['offline'] = bool(offline)
+
+	_configure_transformers()
+	_configure_nltk()
+
+
+def get_model_dir():
+	return _config['model_dir']
+
+
+def is_offline():
+	return _config['offline']
+
+
+def model_path(tool, name):
+	"""
+	Returns the path where the model 'name' of the tool 'tool' is kept in the model directory
+	(whether it is there or not), or None if there's no model directory.
+	"""
+
+	if _config['model_dir'] is None:
+		return None
+
+	return os.path.join(_config['model_dir'], tool, name)
+
+
+def resolve(tool, name):
+	"""
+	Returns the local path of the model 'name' of the tool 'tool', if it is in the model directory.
+	Otherwise, returns None, so the tool gets it by itself (downloading it if needed).
+
+	Raises
+	------
+	ModelNotAvailable if, in offline mode, the model isn't in the model directory
+	"""
+
+	path = model_path(tool, name)
+	if path is not None and os.path.exists(path):
+		return path
+
+	if _config['offline']:
+		raise ModelNotAvailable(tool, name)
+
+	return None
+
+
+def _configure_transformers():
+	"""
+	Points the Hugging Face cache (tokenizers and weights of the transformers) to the model directory
+	and turns off its downloads in offline mode. Variables already set by the user are kept.
+	"""
+
+	if _config['model_dir'] is not None:
+		os.environ.setdefault('HF_HOME', os.path.join(_config['model_dir'], 'huggingface'))
+	if _config['offline']:
+		os.environ.setdefault('HF_HUB_OFFLINE', '1')
+		os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+
+def _configure_nltk():
+	"""
+	Puts the NLTK data of the model directory (the tokenizers, tagger and chunker saved by the prefetch) first on the
+	NLTK search path, so every user of NLTK (the NLTK annotator, but also the sentence and word splitting of
+	core.document, used by the AllenNLP annotator) finds them, in offline mode too.
+	"""
+
+	path = model_path('nltk', '')
+	if path is None:
+		return
+
+	import nltk.data # Only when there's a model directory
+
+	if path not in nltk.data.path:
+		nltk.data.path.insert(0, path)
+
+
+_configure_transformers()
+_configure_nltk()
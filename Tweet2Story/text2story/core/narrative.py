@@ -4,10 +4,25 @@
 	Narrative class
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
 from text2story.core.annotator import Annotator
+from text2story.core.document import Document
 from text2story.core.entity_structures import *
 from text2story.core.link_structures import *
-from text2story.core.utils import pairwise
+from text2story.core.span_index import SpanIndex
+from text2story.core.utils import pairwise, split_chunks
+
+# Extraction stages, in the order their results are added to a narrative
+STAGES = ('actors', 'times', 'objectal_links', 'events', 'semantic_role_links')
+
+# Stages that can be annotated concurrently; the stages of a group run one after the other
+# (events and semantic role links share the same SRL pass)
+STAGE_GROUPS = (('actors',), ('times',), ('objectal_links',), ('events', 'semantic_role_links'))
+
+# Characters of the earlier text given to the coreference resolution when text is appended to a narrative
+COREF_WINDOW = 2000
 
 class Narrative:
 	"""
@@ -30,6 +45,8 @@ class Narrative:
 	obj_links: dict{str -> ObjectalLink}
 		the corefs identified in the text
 		each key in the dict, of the form 'R' concatenated with some int, has an coref as a value.
+	compact: bool
+		whether the entities and links are stored in their compact versions (CompactActorEntity, ...)
 
 	Methods
 	-------
@@ -40,15 +57,25 @@ class Narrative:
 	extract_corefs(*tools)
 		coreference resolution in the text using the tools 'tools', updating self.obj_rels
 		typically, this call increases self.actors since news entities can be identified
+	extract_all(tools, max_workers, chunk_size)
+		runs every extraction, annotating the independent stages concurrently, and returns the time of each stage
+	append(text, publication_time, tools, separator, coref_window, max_workers)
+		appends text to the narrative, annotating just the new text
 	_get_actor_key(char_offset)
 		returns the key of the actor with the corresponding character offset or None if such actor wasn't identified before
 	_add_actor(char_offset)
 		update self.actors by adding the new actor with character offset 'char_offset' and returns the key given to the new actor
-	ISO_annotation(file_name)
+	ISO_annotation(blank_lines)
 		outputs ISO annotation in .ann format (txt)
+	write_ISO_annotation(file, blank_lines)
+		writes the ISO annotation in .ann format to a file-like object, record by record
+	iter_ISO_annotation(blank_lines)
+		generates the records of the ISO annotation in .ann format, one at a time
+	to_dict()
+		returns the narrative (entities and links) as JSON serializable data
 	"""
 
-	def __init__(self, lang, text, publication_time):
+	def __init__(self, lang, text, publication_time, compact=False):
 		"""
 		Parameters
 		----------
@@ -58,11 +85,15 @@ class Narrative:
 			the text ifself
 		publication_time : str
 			the publication time ('XXXX-XX-XX')
+		compact : bool
+			whether to store the entities and links in their compact (slotted) versions,
+			which don't keep a copy of their text; useful when keeping many narratives in memory
 		"""
 
 		self.lang = lang
 		self.text = text
 		self.publication_time = publication_time
+		self.compact = compact
 
 		# Counter to generate a unique ID for every participant
 		# TODO: Fix the counter, when repeting some extraction: The counter just keep going up.
@@ -76,6 +107,10 @@ class Narrative:
 		self.obj_links = {}
 		self.sem_links = {}
 
+		# Character span indexes of the actors and events, to find them by span without scanning every entity
+		self._actor_index = SpanIndex()
+		self._event_index = SpanIndex()
+
 	def extract_actors(self, *tools):
 		"""
 		Parameters
@@ -91,10 +126,18 @@ class Narrative:
 		actors = Annotator(tools).extract_actors(self.lang,
 												 self.text)  # annotations :: [(EntityStartOffset, EntityEndOffset, EntityPOSTag, EntityType)]
 
+		return self._apply_actors(actors)
+
+	def _apply_actors(self, actors):
+		"""
+		Adds the actors found by Annotator.extract_actors to the narrative.
+
+		@param actors: list of tuples (character span, lexical head, actor type)
+
+		@return: self.actors updated
+		"""
 		for actor in actors:
-			self.actors['T' + str(self._id)] = ActorEntity(self.text[actor[0][0]:actor[0][1]], actor[0], actor[1],
-														   actor[2])
-			self._id += 1
+			self._add_actor(actor[0], actor[1], actor[2])
 
 		return self.actors
 
@@ -111,9 +154,22 @@ class Narrative:
 		"""
 		times = Annotator(tools).extract_times(self.lang, self.text, self.publication_time)  # annotations :: [(TimeStartOffset, TimeEndOffset, TimeType, TimeValue)]
 
+		return self._apply_times(times)
+
+	def _apply_times(self, times):
+		"""
+		Adds the times found by Annotator.extract_times to the narrative.
+
+		@param times: list of tuples (character span, time type, time value)
+
+		@return: self.times updated
+		"""
 		for time in times:
-			self.times['T' + str(self._id)] = TimeEntity(self.text[time[0][0]:time[0][1]], time[0], time[1],
-														   time[2])
+			if self.compact:
+				self.times['T' + str(self._id)] = CompactTimeEntity(self, time[0], time[1], time[2])
+			else:
+				self.times['T' + str(self._id)] = TimeEntity(self.text[time[0][0]:time[0][1]], time[0], time[1],
+															   time[2])
 			self._id += 1
 
 		return self.times
@@ -129,9 +185,18 @@ class Narrative:
 		"""
 		events = Annotator(tools).extract_events(self.lang, self.text)
 
-		for event in events.itertuples():
-			self.events["E" + str(self._event_id)] = EventEntity(event.actor, event.char_span)
-			self._event_id += 1
+		return self._apply_events(events)
+
+	def _apply_events(self, events):
+		"""
+		Adds the events found by Annotator.extract_events to the narrative.
+
+		@param events: List of SemanticRoleArgument with the events (actor) and their character spans (char_span)
+
+		@return: self.events updated
+		"""
+		for event in events:
+			self._add_event(event.char_span, event.actor)
 
 		return self.events
 
@@ -149,11 +214,27 @@ class Narrative:
 
 		clusters = Annotator(tools).extract_objectal_links(self.lang, self.text)  # annotations ::
 
+		return self._apply_objectal_links(clusters)
+
+	def _apply_objectal_links(self, clusters, new_from=0):
+		"""
+		Links the mentions of each coreference cluster found by Annotator.extract_objectal_links.
+		Mentions that aren't actors yet are added as new actors.
+
+		@param clusters: list of clusters, each one a list of character spans
+		@param new_from: character offset where the new text starts (see append);
+		pairs of mentions before it were already linked, so they aren't linked again
+
+		@return: self.obj_links updated
+		"""
 		for cluster in clusters:
 			for i in range(0, len(cluster) - 1):
 				e1 = cluster[i]
 				e2 = cluster[i + 1]
 
+				if e1[0] < new_from and e2[0] < new_from:
+					continue
+
 				# Get the actors
 				arg1, arg2 = self._get_actor_key(e1), self._get_actor_key(e2)
 
@@ -163,7 +244,8 @@ class Narrative:
 				if arg2 == None:
 					arg2 = self._add_actor(e2)
 
-				self.obj_links['R' + str(self._rel_id)] = ObjectalLink(arg1, arg2)  # (Type (sameHead, partOf, ...), Arg1, Arg2)
+				link_class = CompactObjectalLink if self.compact else ObjectalLink
+				self.obj_links['R' + str(self._rel_id)] = link_class(arg1, arg2)  # (Type (sameHead, partOf, ...), Arg1, Arg2)
 				self._rel_id += 1
 
 		return self.obj_links
@@ -183,12 +265,24 @@ class Narrative:
 		"""
 		srl_by_sentence = Annotator(tools).extract_semantic_role_links(self.lang, self.text)
 
+		return self._apply_semantic_role_links(srl_by_sentence)
+
+	def _apply_semantic_role_links(self, srl_by_sentence):
+		"""
+		Maps the SRL arguments found by Annotator.extract_semantic_role_links to actors and events
+		and links them by text order, as described in extract_semantic_role_links.
+
+		@param srl_by_sentence: List with the SRL arguments (SemanticRoleArgument) of each sentence, in text order
+
+		@return: self.sem_links updated
+		"""
 		# FIND OUT IF ARGUMENT OF SRL HAS AN ACTOR RETRIEVED BY THE NER COMPONENT
 		# IF NOT, ADD A NEW ACTOR CORRESPONDING TO THE ARGUMENT
-		for sentence_df in srl_by_sentence:
+		keys_by_sentence = []
+		for sentence in srl_by_sentence:
 
 			key_list = []
-			for row in sentence_df.itertuples():
+			for row in sentence:
 				if row.sem_role_type == "EVENT":
 					event_key = self._get_event_key(row.char_span)
 					if event_key is not None:
@@ -208,24 +302,218 @@ class Narrative:
 					actor_key = self._add_actor(row.char_span, lexical_head="Noun", actor_type="Other")
 					key_list.append(actor_key)
 
-			sentence_df["key"] = key_list
+			keys_by_sentence.append(key_list) # The arguments aren't changed, they can be shared (e.g. cached)
 
 		# MAKE SEMANTIC ROLE LINK ENTITIES
-		for sentence_df in srl_by_sentence:
-			for row1, row2 in pairwise(sentence_df.itertuples()):
+		for sentence, key_list in zip(srl_by_sentence, keys_by_sentence):
+			for (row1, key1), (row2, key2) in pairwise(zip(sentence, key_list)):
 				sem1 = row1.sem_role_type
 				sem2 = row2.sem_role_type
 				if (sem1 == "EVENT") | (sem2 == "EVENT"):
 					if sem1 != "EVENT":
-						sem_role, actor, event = sem1, row1.key, row2.key
+						sem_role, actor, event = sem1, key1, key2
 					else:
-						sem_role, actor, event = sem2, row2.key, row1.key
+						sem_role, actor, event = sem2, key2, key1
 
-					self.sem_links["R" + str(self._rel_id)] = SemanticRoleLink(actor, event, sem_role.lower())
+					link_class = CompactSemanticRoleLink if self.compact else SemanticRoleLink
+					self.sem_links["R" + str(self._rel_id)] = link_class(actor, event, sem_role.lower())
 					self._rel_id += 1
 
 		return self.sem_links
 
+	def extract_all(self, tools=None, max_workers=None, chunk_size=None):
+		"""
+		Runs every extraction (actors, times, objectal links, events and semantic role links).
+
+		The annotators of the independent stages run concurrently in a thread pool, since they don't depend on each other:
+		actors (spaCy/NLTK/SparkNLP), times (HeidelTime), coreference and SRL (AllenNLP).
+		Their results are then added to the narrative in the same order of the sequential calls
+		(extract_actors, extract_times, extract_objectal_links, extract_events and extract_semantic_role_links),
+		so the narrative is the same.
+
+		Texts longer than 'chunk_size' characters are annotated in chunks split at tweet (line), sentence or word
+		boundaries (see split_chunks), one chunk at a time, so the memory used by the annotators depends on the chunk
+		size instead of the size of the text. The spans found in each chunk are rebased to the full text and the
+		results of all the chunks are added to the narrative together, so the keys are given in the same order as when
+		the text is annotated whole. Coreference only links mentions of the same chunk.
+
+		@param tools: dict {stage -> iterable of tools}, where stage is one of STAGES.
+		Stages not in the dict use every tool available, like the extract_* methods called without tools
+		@param max_workers: Maximum number of threads. Defaults to one for each group of stages
+		@param chunk_size: Maximum number of characters annotated at once (None for the whole text)
+
+		@return: dict {stage -> wall time in seconds} with the annotation time of each stage,
+		the time spent adding the results to the narrative ('linking') and the total time ('total')
+		"""
+		start = perf_counter()
+
+		if chunk_size is None or len(self.text) <= chunk_size:
+			results, timings = self._annotate(self.text, self.text, self.publication_time, tools, max_workers)
+		else:
+			results, timings = self._annotate_chunks(chunk_size, tools, max_workers)
+
+		linking_start = perf_counter()
+		self._apply_actors(results['actors'])
+		self._apply_times(results['times'])
+		self._apply_objectal_links(results['objectal_links'])
+		self._apply_events(results['events'])
+		self._apply_semantic_role_links(results['semantic_role_links'])
+
+		timings['linking'] = perf_counter() - linking_start
+		timings['total'] = perf_counter() - start
+
+		return timings
+
+	def append(self, text, publication_time=None, tools=None, separator='\n', coref_window=COREF_WINDOW, max_workers=None):
+		"""
+		Appends 'text' to the narrative (e.g. new tweets of a topic), annotating just the new text.
+
+		The annotators run only on the new segment and the character spans they find are rebased to the full text,
+		so the new entities and links get the next keys, like they would in a narrative extracted from the full text.
+		Coreference is the only stage that looks back, over the last 'coref_window' characters of the earlier text,
+		so new mentions can be linked to the actors already in the narrative.
+		Entities and links found before are kept as they are, so the cost of an update depends on the size of the new text.
+
+		@param text: the text to append
+		@param publication_time: the publication time of the new text (the publication time of the narrative if None)
+		@param tools: dict {stage -> iterable of tools}, like in extract_all
+		@param separator: string put between the earlier text and the new one (if the narrative isn't empty)
+		@param coref_window: maximum number of characters of the earlier text given to the coreference resolution
+		@param max_workers: Maximum number of threads, like in extract_all
+
+		@return: dict {stage -> wall time in seconds}, like extract_all
+		"""
+		start = perf_counter()
+
+		offset = len(self.text) + len(separator) if self.text else 0
+		self.text = self.text + separator + text if self.text else text
+
+		coref_offset = self._coref_window_start(offset, coref_window)
+
+		results, timings = self._annotate(text, self.text[coref_offset:], publication_time or self.publication_time,
+										   tools, max_workers)
+
+		linking_start = perf_counter()
+		self._apply_actors(self._rebase('actors', results['actors'], offset))
+		self._apply_times(self._rebase('times', results['times'], offset))
+		self._apply_objectal_links(self._rebase('objectal_links', results['objectal_links'], coref_offset), new_from=offset)
+		self._apply_events(self._rebase('events', results['events'], offset))
+		self._apply_semantic_role_links(self._rebase('semantic_role_links', results['semantic_role_links'], offset))
+
+		timings['linking'] = perf_counter() - linking_start
+		timings['total'] = perf_counter() - start
+
+		return timings
+
+	def _annotate(self, text, coref_text, publication_time, tools, max_workers):
+		"""
+		Runs the annotators of every stage, the independent stages concurrently (see extract_all).
+
+		@param text: the text given to the annotators
+		@param coref_text: the text given to the coreference resolution
+		@param publication_time: the publication time given to the time extraction
+		@param tools: dict {stage -> iterable of tools}
+		@param max_workers: Maximum number of threads
+
+		@return: dict {stage -> annotations} and dict {stage -> wall time in seconds}
+		"""
+		tools = tools or {}
+		for stage in tools:
+			if stage not in STAGES:
+				raise ValueError(f"Invalid stage {stage}. Must be one of {list(STAGES)}")
+
+		# The text is split in sentences and tokens once, for every annotator that uses them
+		document = Document(text, self.lang)
+		coref_document = document if coref_text == text else Document(coref_text, self.lang)
+
+		annotate = {
+			'actors': lambda annotator: annotator.extract_actors(self.lang, text, document),
+			'times': lambda annotator: annotator.extract_times(self.lang, text, publication_time),
+			'objectal_links': lambda annotator: annotator.extract_objectal_links(self.lang, coref_text, coref_document),
+			'events': lambda annotator: annotator.extract_events(self.lang, text, document),
+			'semantic_role_links': lambda annotator: annotator.extract_semantic_role_links(self.lang, text, document)
+		}
+
+		def run_group(group):
+			results = {}
+			for stage in group:
+				start = perf_counter()
+				annotations = annotate[stage](Annotator(tuple(tools.get(stage, ()))))
+				results[stage] = (annotations, perf_counter() - start)
+			return results
+
+		results = {}
+		with ThreadPoolExecutor(max_workers=max_workers or len(STAGE_GROUPS)) as executor:
+			for group_results in executor.map(run_group, STAGE_GROUPS):
+				results.update(group_results)
+
+		return {stage: results[stage][0] for stage in STAGES}, {stage: results[stage][1] for stage in STAGES}
+
+	def _annotate_chunks(self, chunk_size, tools, max_workers):
+		"""
+		Runs the annotators of every stage on each chunk of the text (see extract_all), one chunk after the other.
+
+		@return: dict {stage -> annotations of the full text} and dict {stage -> wall time in seconds}
+		"""
+		results = {stage: [] for stage in STAGES}
+		timings = {stage: 0.0 for stage in STAGES}
+
+		for offset, chunk in split_chunks(self.text, chunk_size):
+			if not chunk.strip():
+				continue
+
+			chunk_results, chunk_timings = self._annotate(chunk, chunk, self.publication_time, tools, max_workers)
+			for stage in STAGES:
+				results[stage].extend(self._rebase(stage, chunk_results[stage], offset))
+				timings[stage] += chunk_timings[stage]
+
+		return results, timings
+
+	def _coref_window_start(self, offset, coref_window):
+		"""
+		Returns where the coreference look-back window starts: 'coref_window' characters before 'offset',
+		moved forward to the start of a line (or of a word), so no mention is cut.
+		"""
+		window_start = max(0, offset - coref_window)
+		if window_start == 0:
+			return 0
+
+		for boundary in ('\n', ' '):
+			position = self.text.find(boundary, window_start - 1, offset)
+			if position != -1:
+				return position + 1
+
+		return offset
+
+	@staticmethod
+	def _rebase(stage, annotations, offset):
+		"""
+		Shifts the character spans of the annotations of the stage 'stage' by 'offset' characters.
+
+		@param stage: one of STAGES
+		@param annotations: the annotations returned by the Annotator for that stage
+		@param offset: number of characters to add to every span
+
+		@return: the annotations with the shifted spans (the given annotations aren't changed)
+		"""
+		if offset == 0:
+			return annotations
+
+		def shift(span):
+			return (span[0] + offset, span[1] + offset)
+
+		if stage in ('actors', 'times'):
+			return [(shift(annotation[0]),) + tuple(annotation[1:]) for annotation in annotations]
+		if stage == 'objectal_links':
+			return [[shift(span) for span in cluster] for cluster in annotations]
+		if stage == 'events':
+			return [event._replace(char_span=shift(event.char_span)) for event in annotations]
+		if stage == 'semantic_role_links':
+			return [[argument._replace(char_span=shift(argument.char_span)) for argument in sentence]
+					for sentence in annotations]
+
+		raise ValueError(f"Invalid stage {stage}. Must be one of {list(STAGES)}")
+
 	def _get_actor_key(self, char_span, match_type="exact"):
 		"""
 		Parameters
@@ -242,21 +530,7 @@ class Narrative:
 			the key of the actor with the corresponding character offset
 			or None if it doesn't exist
 		"""
-		if match_type == "exact":
-			for key in self.actors.keys():
-				if self.actors[key].character_span == char_span:
-					return str(key)
-		elif match_type == "partial":
-			for key in self.actors.keys():
-				aSpan = self.actors[key].character_span
-				if aSpan[0] <= char_span[0] <= aSpan[1]:
-					return str(key)
-				elif aSpan[0] <= char_span[1] <= aSpan[1]:
-					return str(key)
-		else:
-			raise ValueError(f"Parameter match_type must be one of [exact, partial].\nInstead it was {match_type}")
-
-		return None
+		return self._get_key(self._actor_index, char_span, match_type)
 
 	def _add_actor(self, char_span, lexical_head="Pronoun", actor_type="Other"):
 		"""
@@ -274,8 +548,12 @@ class Narrative:
 			the key of the new added actor
 		"""
 		key = 'T' + str(self._id)
-		self.actors[key] = ActorEntity(self.text[char_span[0]:char_span[1]], char_span, lexical_head,
-									   actor_type)  # Hard-coded lexical head and type as 'Pronoun' and 'Other', resp., for now
+		if self.compact:
+			self.actors[key] = CompactActorEntity(self, char_span, lexical_head, actor_type)
+		else:
+			self.actors[key] = ActorEntity(self.text[char_span[0]:char_span[1]], char_span, lexical_head,
+										   actor_type)  # Hard-coded lexical head and type as 'Pronoun' and 'Other', resp., for now
+		self._actor_index.add(key, char_span)
 
 		self._id += 1
 
@@ -290,124 +568,213 @@ class Narrative:
 		@return: The key of the event if it is found. None otherwise
 		"""
 
-		if match_type == "exact":
-			for key in self.events.keys():
-				if self.events[key].character_span == char_span:
-					return str(key)
-		elif match_type == "partial":
-			for key in self.events.keys():
-				aSpan = self.events[key].character_span
-				if aSpan[0] <= char_span[0] <= aSpan[1]:
-					return str(key)
-				elif aSpan[0] <= char_span[1] <= aSpan[1]:
-					return str(key)
-		else:
-			raise ValueError(f"Parameter match_type must be one of [exact, partial].\nInstead it was {match_type}")
-
-		return None
+		return self._get_key(self._event_index, char_span, match_type)
 
-	def _add_event(self, char_span):
+	def _add_event(self, char_span, text=None):
 		"""
 		Adds a new event to the narrative.
 
 		@param char_span: tuple of characters (first_char, last_char) that delimit the event
+		@param text: The textual representation of the event -> Defaults to the text inside char_span
 
 		@return: The key of the new added event
 		"""
 		key = 'E' + str(self._event_id)
-		self.events[key] = EventEntity(self.text[char_span[0]:char_span[1]], char_span)
+		if self.compact:
+			self.events[key] = CompactEventEntity(self, char_span, text)
+		else:
+			if text is None:
+				text = self.text[char_span[0]:char_span[1]]
+			self.events[key] = EventEntity(text, char_span)
+		self._event_index.add(key, char_span)
 
 		self._event_id += 1
 
 		return key
 
-	def ISO_annotation(self):
+	@staticmethod
+	def _get_key(index, char_span, match_type):
+		"""
+		Looks up 'char_span' in one of the span indexes of the narrative (actors or events).
+
+		@param index: The SpanIndex to search
+		@param char_span: The character span to look for
+		@param match_type: "exact" or "partial", as described in _get_actor_key
+
+		@return: The key of the first entity that matches. None otherwise
+		"""
+		if match_type == "exact":
+			key = index.exact(char_span)
+		elif match_type == "partial":
+			key = index.partial(char_span)
+		else:
+			raise ValueError(f"Parameter match_type must be one of [exact, partial].\nInstead it was {match_type}")
+
+		return None if key is None else str(key)
+
+	def ISO_annotation(self, blank_lines=True):
 		"""
 		Parameters
 		----------
-			None
+		blank_lines : bool
+			whether to separate every record with a blank line
 
 		Returns
 		-------
 			the ISO annotation in the .ann format
 		"""
 
-		attribute_id = 1
+		return ''.join(self.iter_ISO_annotation(blank_lines))
+
+	def write_ISO_annotation(self, file, blank_lines=True):
+		"""
+		Writes the ISO annotation in the .ann format to 'file', one record at a time.
+
+		Parameters
+		----------
+		file : file-like object
+			an object opened for writing text (with a 'write' method)
+		blank_lines : bool
+			whether to separate every record with a blank line
+		"""
+
+		for line in self.iter_ISO_annotation(blank_lines):
+			file.write(line)
+
+	def to_dict(self):
+		"""
+		Returns
+		-------
+		dict
+			the narrative as plain (JSON serializable) data: the text, its language and publication time,
+			and the entities and links by their keys, each with the attributes written in the ISO annotation
+		"""
+
+		def span(entity):
+			return [entity.character_span[0], entity.character_span[1]]
+
+		return {
+			'lang': self.lang,
+			'text': self.text,
+			'publication_time': self.publication_time,
+			'actors': {
+				key: {'span': span(actor), 'text': actor.text, 'lexical_head': actor.lexical_head,
+					'individuation': actor.individuation, 'type': actor.type, 'involvement': actor.involvement}
+				for key, actor in self.actors.items()
+			},
+			'times': {
+				key: {'span': span(time), 'text': time.text, 'type': time.type, 'value': time.value,
+					'temporal_function': time.temporal_function}
+				for key, time in self.times.items()
+			},
+			'events': {
+				key: {'span': span(event), 'text': event.text, 'class': event.event_class, 'tense': event.tense,
+					'polarity': event.polarity, 'factuality': event.factuality}
+				for key, event in self.events.items()
+			},
+			'objectal_links': {
+				key: {'type': link.type, 'arg1': link.arg1, 'arg2': link.arg2}
+				for key, link in self.obj_links.items()
+			},
+			'semantic_role_links': {
+				key: {'type': link.type, 'event': link.event, 'actor': link.actor}
+				for key, link in self.sem_links.items()
+			}
+		}
+
+	def iter_ISO_annotation(self, blank_lines=True):
+		"""
+		Generates the ISO annotation in the .ann format, one record (line) at a time.
+		The narrative isn't changed, so the annotation is the same every time it is generated.
 
-		r = ""
+		Parameters
+		----------
+		blank_lines : bool
+			whether to separate every record with a blank line
+
+		Returns
+		-------
+			a generator of the records of the annotation, each one ending with a new line
+		"""
+
+		end = '\n\n' if blank_lines else '\n'
+
+		attribute_id = 1
 
 		for actor_id in self.actors:
 			actor = self.actors[actor_id]
 
 			# T1 ACTOR 0 22 O presidente de França
-			r += (actor_id + '\t' + 'ACTOR' + ' ' + str(actor.character_span[0]) + ' ' + str(actor.character_span[1]) + ' ' + actor.text + '\n\n')
+			yield f"{actor_id}\tACTOR {actor.character_span[0]} {actor.character_span[1]} {actor.text}{end}"
 
 			# A1 Lexical_Head T1 Noun
-			r += ('A' + str(attribute_id) + '\t' + 'Lexical_Head' + ' ' + actor_id + ' ' + actor.lexical_head + '\n\n')
+			yield f"A{attribute_id}\tLexical_Head {actor_id} {actor.lexical_head}{end}"
 			attribute_id += 1
 
 			# A2 Individuation T1 Individual
-			r += ('A' + str(attribute_id) + '\t' + 'Individuation' + ' ' + actor_id + ' ' + actor.individuation + '\n\n')
+			yield f"A{attribute_id}\tIndividuation {actor_id} {actor.individuation}{end}"
 			attribute_id += 1
 
 			# A3 Actor_Type T1 Per
-			r += ('A' + str(attribute_id) + '\t' + 'Actor_Type' + ' ' + actor_id + ' ' + actor.type + '\n\n')
+			yield f"A{attribute_id}\tActor_Type {actor_id} {actor.type}{end}"
 			attribute_id += 1
 
 			# A4 Involvement T1 1
-			r += ('A' + str(attribute_id) + '\t' + 'Involvement' + ' ' + actor_id + ' ' + actor.involvement + '\n\n')
+			yield f"A{attribute_id}\tInvolvement {actor_id} {actor.involvement}{end}"
 			attribute_id += 1
 
 		for time_id in self.times:
 			time = self.times[time_id]
 
 			# T26 TIME_X3 413 429 novembro de 2015
-			r += (time_id + '\t' + 'TIME_X3' + ' ' + str(time.character_span[0]) + ' ' + str(time.character_span[1]) + ' ' + time.text + '\n\n')
+			yield f"{time_id}\tTIME_X3 {time.character_span[0]} {time.character_span[1]} {time.text}{end}"
 
 			# A55 Time_Type T26 Date
-			r += ('A' + str(attribute_id) + '\t' + 'Time_Type' + ' ' + time_id + ' ' + time.type + '\n\n')
+			yield f"A{attribute_id}\tTime_Type {time_id} {time.type}{end}"
 			attribute_id += 1
 
 			# 6 AnnotatorNotes T26 value=2015-11-XX  ?????
-			r += ('A' + str(attribute_id) + '\t' + 'Value' + ' ' + time_id + ' ' + time.value + '\n\n')
+			yield f"A{attribute_id}\tValue {time_id} {time.value}{end}"
 			attribute_id += 1
 
 			# A107 FunctionInDocument T4 Publication_Time
-			r += ('A' + str(attribute_id) + '\t' + 'FunctionInDocument' + ' ' + time_id + ' ' + time.temporal_function + '\n\n')
+			yield f"A{attribute_id}\tFunctionInDocument {time_id} {time.temporal_function}{end}"
 			attribute_id += 1
 
+		# The event text-bound annotations continue the 'T' numbering of actors and times.
+		# A local counter is used, so generating the annotation doesn't change the narrative.
+		text_bound_id = self._id
+
 		for event_id in self.events:
 			event = self.events[event_id]
 
 			# T22 EVENT 312 328 is strengthening
-			r += ('T' + str(self._id) + '\t' + 'EVENT' + ' ' + str(event.character_span[0]) + ' ' + str(event.character_span[1]) + ' ' + event.text + '\n\n')
+			yield f"T{text_bound_id}\tEVENT {event.character_span[0]} {event.character_span[1]} {event.text}{end}"
 
 			# E9 EVENT:T22
-			r += (f"{event_id}\tEVENT:T{str(self._id)}\n\n")
-			self._id += 1
+			yield f"{event_id}\tEVENT:T{text_bound_id}{end}"
+			text_bound_id += 1
 
-			r += (f"A{attribute_id}\tClass {event_id} {event.event_class}\n\n")
+			yield f"A{attribute_id}\tClass {event_id} {event.event_class}{end}"
 			attribute_id += 1
 
-			r += (f"A{attribute_id}\tTense {event_id} {event.tense}\n\n")
+			yield f"A{attribute_id}\tTense {event_id} {event.tense}{end}"
 			attribute_id += 1
 
-			r += (f"A{attribute_id}\tPolarity {event_id} {event.polarity}\n\n")
+			yield f"A{attribute_id}\tPolarity {event_id} {event.polarity}{end}"
 			attribute_id += 1
 
-			r += (f"A{attribute_id}\tFactuality {event_id} {event.factuality}\n\n")
+			yield f"A{attribute_id}\tFactuality {event_id} {event.factuality}{end}"
 			attribute_id += 1
 
 		for objectal_link_id in self.obj_links:
 			obj_link = self.obj_links[objectal_link_id]
 
 			# R34 OBJ_REL_objIdentity Arg1:T3 Arg2:T1
-			r += (objectal_link_id + '\t' + 'OBJ_REL_' + obj_link.type + ' ' + 'Arg1:' + obj_link.arg1 + ' ' + 'Arg2:' + obj_link.arg2 + '\n\n')
+			yield f"{objectal_link_id}\tOBJ_REL_{obj_link.type} Arg1:{obj_link.arg1} Arg2:{obj_link.arg2}{end}"
 
 		for sem_link_id in self.sem_links:
 			sem_link = self.sem_links[sem_link_id]
 
 			# R35 SEMROLE_theme Arg1:E1 Arg2:T1
-			r += (f"{sem_link_id}\tSEMROLE_{sem_link.type} Arg1:{sem_link.event} Arg2:{sem_link.actor}\n\n")
-
-		return r
+			yield f"{sem_link_id}\tSEMROLE_{sem_link.type} Arg1:{sem_link.event} Arg2:{sem_link.actor}{end}"
@@ -0,0 +1,245 @@
+"""
+	text2story.core.result_cache
+
+	ResultCache class (on-disk cache of the annotator results, keyed by a hash of their inputs)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3 # bytes
+
+
+class ResultCache:
+	"""
+	On-disk cache of the results of the annotators, in a SQLite database.
+
+	The results are keyed by a hash of everything they depend on (function, tool, language, text, publication time
+	and model version), so a cached result is only used for the exact same inputs.
+	The least recently used results are evicted when the size of the stored results goes over 'max_size'.
+	Several threads and processes can use the same database: each thread has its own connection, and the
+	database is in WAL mode, with every change in a transaction.
+
+	Attributes
+	----------
+	path: str
+		the path of the database
+	max_size: int
+		maximum number of bytes of the stored results
+	hits: int
+		number of results found in the cache by this process
+	misses: int
+		number of results not found in the cache by this process
+
+	Methods
+	-------
+	key(*inputs)
+		returns the key of the result of the inputs 'inputs'
+	get(key)
+		returns (True, result) if the result with key 'key' is cached or (False, None) otherwise
+	put(key, result)
+		stores the result with key 'key', evicting the least recently used results if needed
+	stats()
+		returns the hits and misses of this process and of every process, the number of results and their size
+	clear()
+		removes every result
+	"""
+
+	def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+		"""
+		Parameters
+		----------
+		path : str
+			the path of the database (created if it doesn't exist)
+		max_size : int
+			maximum number of bytes of the stored results
+		"""
+
+		if max_size <= 0:
+			raise ValueError(f"Parameter max_size must be positive.\nInstead it was {max_size}")
+
+		self.path = os.path.abspath(path)
+		self.max_size = max_size
+		self.hits = 0
+		self.misses = 0
+
+		self._local = threading.local()
+		self._counter_lock = threading.Lock()
+
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+
+		with self._transaction() as connection:
+			connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, used REAL)")
+			connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+			connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+			connection.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)", [('hits',), ('misses',), ('size',)])
+
+	@staticmethod
+	def key(*inputs):
+		"""
+		Parameters
+		----------
+		inputs
+			the inputs of the result (JSON serializable values)
+
+		Returns
+		-------
+		str
+			the SHA-256 hash of the inputs
+		"""
+		return hashlib.sha256(json.dumps(inputs, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+	def get(self, key):
+		"""
+		Parameters
+		----------
+		key : str
+			the key of the result
+
+		Returns
+		-------
+		tuple[bool, object]
+			(True, result) if the result is cached or (False, None) otherwise
+		"""
+
+		with self._transaction() as connection:
+			row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+			if row is not None:
+				connection.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+			connection.execute("UPDATE counters SET value = value + 1 WHERE name = ?", ('hits' if row is not None else 'misses',))
+
+		with self._counter_lock:
+			if row is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+
+		if row is None:
+			return False, None
+		return True, pickle.loads(row[0])
+
+	def put(self, key, result):
+		"""
+		Parameters
+		----------
+		key : str
+			the key of the result
+		result
+			the result (a picklable object)
+		"""
+
+		value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+		if len(value) > self.max_size:
+			return
+
+		with self._transaction() as connection:
+			previous = connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+			connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, value, len(value), time.time()))
+
+			connection.execute("UPDATE counters SET value = value + ? WHERE name = 'size'", (len(value) - (previous[0] if previous else 0),))
+			size = connection.execute("SELECT value FROM counters WHERE name = 'size'").fetchone()[0]
+
+			# Evicts the least recently used results, until the results fit in max_size
+			if size > self.max_size:
+				evicted = 0
+				for old_key, old_size in connection.execute("SELECT key, size FROM results WHERE key != ? ORDER BY used", (key,)).fetchall():
+					if size - evicted <= self.max_size:
+						break
+					connection.execute("DELETE FROM results WHERE key = ?", (old_key,))
+					evicted += old_size
+
+				connection.execute("UPDATE counters SET value = value - ? WHERE name = 'size'", (evicted,))
+
+	def stats(self):
+		"""
+		Returns
+		-------
+		dict
+			'hits' and 'misses' of this process, 'total_hits' and 'total_misses' of every process that used the database,
+			the number of results stored ('results') and their size in bytes ('size')
+		"""
+
+		connection = self._connection()
+		counters = dict(connection.execute("SELECT name, value FROM counters").fetchall())
+		results = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+		return {'hits': self.hits, 'misses': self.misses, 'total_hits': counters['hits'], 'total_misses': counters['misses'],
+				'results': results, 'size': counters['size']}
+
+	def clear(self):
+		with self._transaction() as connection:
+			connection.execute("DELETE FROM results")
+			connection.execute("UPDATE counters SET value = 0")
+
+	def _connection(self):
+		"""
+		Returns the connection of the current thread, opening it if it's the first use.
+		"""
+
+		connection = getattr(self._local, 'connection', None)
+		if connection is None:
+			# Autocommit mode, with the transactions started explicitly by _transaction
+			connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+			connection.execute("PRAGMA journal_mode=WAL")
+			connection.execute("PRAGMA synchronous=NORMAL")
+			self._local.connection = connection
+
+		return connection
+
+	def _transaction(self):
+		return _Transaction(self._connection())
+
+
+class _Transaction:
+	"""
+	Context manager of a write transaction (taking the write lock of the database at the start,
+	so concurrent read-modify-write transactions don't deadlock).
+	"""
+
+	def __init__(self, connection):
+		self.connection = connection
+
+	def __enter__(self):
+		self.connection.execute("BEGIN IMMEDIATE")
+		return self.connection
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
+		return False
+
+
+_cache = None
+
+
+def enable(path, max_size=DEFAULT_MAX_SIZE):
+	"""
+	Caches the results of the annotators in the database 'path' (see ResultCache).
+
+	Returns
+	-------
+	ResultCache
+		the cache used
+	"""
+
+	global _cache
+	_cache = ResultCache(path, max_size)
+	return _cache
+
+
+def disable():
+	global _cache
+	_cache = None
+
+
+def get_cache():
+	"""
+	Returns the cache in use or None if the results aren't cached.
+	"""
+	return _cache
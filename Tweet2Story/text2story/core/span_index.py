@@ -0,0 +1,117 @@
+"""
+	text2story.core.span_index
+
+	SpanIndex class (character span lookups for actors and events)
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class SpanIndex:
+	"""
+	Index over the character spans of the entities of a narrative (actors or events).
+
+	Lookups return the key of the first entity added (in insertion order) that matches the query,
+	which is the same result as scanning the entities dict from the beginning.
+
+	Attributes
+	----------
+	_exact: dict{tuple[int, int] -> str}
+		maps each character span to the key of the first entity added with that exact span
+	_starts: list[int]
+		sorted start character offsets of every indexed span
+	_entries: list[tuple[int, int, int, str]]
+		(start, end, insertion rank, key) for every indexed span, sorted like '_starts'
+	_max_length: int
+		length of the longest span indexed so far; bounds the region of '_starts' a point query has to look at
+
+	Methods
+	-------
+	add(key, char_span)
+		indexes the entity 'key' with the character span 'char_span'
+	exact(char_span)
+		returns the key of the first entity with exactly the same character span or None
+	partial(char_span)
+		returns the key of the first entity whose span contains the start or the end of 'char_span' or None
+	"""
+
+	def __init__(self):
+		self._exact = {}
+		self._starts = []
+		self._entries = []
+		self._max_length = 0
+		self._rank = 0
+
+	def __len__(self):
+		return len(self._entries)
+
+	def add(self, key, char_span):
+		"""
+		Parameters
+		----------
+		key : str
+			the key of the entity in the narrative
+		char_span : (int, int)
+			the character span of the entity
+		"""
+		start, end = char_span[0], char_span[1]
+
+		self._exact.setdefault((start, end), key)
+
+		entry = (start, end, self._rank, key)
+		position = bisect_right(self._entries, entry)
+		self._entries.insert(position, entry)
+		self._starts.insert(position, start)
+
+		self._max_length = max(self._max_length, end - start)
+		self._rank += 1
+
+	def exact(self, char_span):
+		"""
+		Parameters
+		----------
+		char_span : (int, int)
+			the character span to look for
+
+		Returns
+		-------
+			the key of the first entity with the same character span or None if it doesn't exist
+		"""
+		return self._exact.get((char_span[0], char_span[1]))
+
+	def partial(self, char_span):
+		"""
+		Parameters
+		----------
+		char_span : (int, int)
+			the character span to look for
+
+		Returns
+		-------
+			the key of the first entity whose span (inclusive on both ends) contains the start or the end
+			character offset of 'char_span' or None if it doesn't exist
+		"""
+		first = self._stab(char_span[0])
+		second = self._stab(char_span[1])
+
+		if first is None:
+			return None if second is None else second[1]
+		if second is None or first[0] < second[0]:
+			return first[1]
+		return second[1]
+
+	def _stab(self, point):
+		"""
+		Returns (insertion rank, key) of the first entity whose span contains 'point' or None.
+
+		Only the spans starting in [point - longest span, point] can contain the point, so just that slice is visited.
+		"""
+		lo = bisect_left(self._starts, point - self._max_length)
+		hi = bisect_right(self._starts, point)
+
+		best = None
+		for start, end, rank, key in self._entries[lo:hi]:
+			if end >= point and (best is None or rank < best[0]):
+				best = (rank, key)
+
+		return best
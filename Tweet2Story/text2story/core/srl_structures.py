@@ -0,0 +1,26 @@
+"""
+	text2story.core.srl_structures
+
+	Structure of the results of the semantic role labelling (SemanticRoleArgument),
+	returned by the annotators for the events and semantic role links
+"""
+
+from typing import NamedTuple, Tuple
+
+
+class SemanticRoleArgument(NamedTuple):
+    """
+    An argument of the SRL frames of a sentence: an actor or an event, in text order.
+
+    Attributes
+    ----------
+    actor: str
+        The words of the argument.
+    sem_role_type: str
+        'EVENT' for events; the semantic role ('AGENT', 'THEME', 'time', 'location', ...) for actors.
+    char_span: tuple[int, int]
+        The character span of the argument in the text.
+    """
+    actor: str
+    sem_role_type: str
+    char_span: Tuple[int, int]
@@ -6,8 +6,16 @@
     chunknize_actors(annotations)
         converts the result from the 'extract_actors' method, implemented by the annotators supported, to a list the chunknized list of actors
         to do this conversion, the IOB in the NE tag is used
+    merge_actors(annotations)
+        combines the actors identified by several tools into one list of actors
+    align_tokens(text, tokens, start, max_lookahead)
+        finds the character span of each token of a tokenization of the text, in one forward pass
+    split_chunks(text, max_chars)
+        splits the text in chunks of bounded size, at tweet, sentence or word boundaries
 """
 
+import re
+from heapq import heapify, heappop, heappush
 from itertools import tee
 
 
@@ -67,6 +75,133 @@ def chunknize_actors(annotations):
     return actors
 
 
+def merge_actors(annotations):
+    """
+    Combines the actors identified by several tools into one list of actors (see Annotator.extract_actors).
+
+    The next actor starts at the annotation with the lowest start character offset among the tools (ties go to the
+    first tool), found with a heap over the current annotation of each tool (k-way merge).
+    Its end character offset is extended with the annotations of the other tools that intersect it, taking at most
+    one annotation of each tool per pass, till a pass doesn't extend it.
+    The POS tag and the NE tag are the most common labels of the annotations merged (counted in one pass;
+    ties go to the label that appeared first), ignoring 'UNDEF' POS tags and favoring any NE over 'Other'.
+
+    Parameters
+    ----------
+    annotations : list[list[tuple[tuple[int, int], str, str]]]
+        the actors identified by each tool, sorted by character span
+
+    Returns
+    -------
+    list[tuple[tuple[int, int], str, str]]
+        the list of actors identified where each actor is represented by a tuple
+    """
+
+    nr_tools = len(annotations)
+    sizes = [len(tool_annotations) for tool_annotations in annotations]
+
+    final_annotation = []
+
+    idxs = [0] * nr_tools # Current actor position from each tool
+
+    # Heap with the current actor of each tool: (start char offset, tool, position)
+    # Entries whose position was already consumed (idxs moved on) are stale and skipped
+    heap = [(annotations[i][0][0][0], i, 0) for i in range(nr_tools) if sizes[i]]
+    heapify(heap)
+
+    while heap:
+        _, tool_id, position = heappop(heap)
+        if position != idxs[tool_id]:
+            continue
+
+        # For now, our actor consists of a unique annotation made by some tool
+        (actor_start_character_offset, actor_end_character_offset), lexical_head, actor_type = annotations[tool_id][position]
+        # For the lexical head and type we will accumulate the results and latter choose the best following a criterion
+        actor_lexical_heads = [lexical_head]
+        actor_types         = [actor_type]
+
+        position += 1
+        idxs[tool_id] = position
+        if position < sizes[tool_id]:
+            heappush(heap, (annotations[tool_id][position][0][0], tool_id, position))
+
+        # Extend the actor with the annotations of the other tools that intersect it (see Annotator.extract_actors).
+        # In the first pass the tool that identified the actor is skipped, to not add its information twice.
+        first_iteration = True
+        while True:
+            flag = False
+            for i in range(nr_tools):
+                if first_iteration and i == tool_id:
+                    continue
+
+                position = idxs[i]
+                if position < sizes[i]:
+                    (start, end), lexical_head, actor_type = annotations[i][position]
+                    if start <= actor_end_character_offset:
+                        if actor_end_character_offset < end:
+                            actor_end_character_offset = end
+                            flag = True
+
+                        actor_lexical_heads.append(lexical_head)
+                        actor_types.append(actor_type)
+
+                        position += 1
+                        idxs[i] = position
+                        if position < sizes[i]:
+                            heappush(heap, (annotations[i][position][0][0], i, position))
+
+            first_iteration = False
+            if not(flag):
+                break
+
+        # For the POS tag, we favor specifics the 'Noun' and 'Pronoun' tag and then we take the most common.
+        # Since we only defined this labels, the others will appear as 'UNDEF'
+        actor_lexical_head = _most_common(actor_lexical_heads, 'UNDEF')
+        if actor_lexical_head is None:
+            continue # Discard the actor if it's lexical head isn't a 'Noun' or 'Pronoun'
+
+        # For the NE, we also favor specifics NEs, in this case all labels versus the NE 'OTHER' and we take the most common.
+        actor_type = _most_common(actor_types, 'Other')
+        if actor_type is None:
+            actor_type = 'Other'
+
+        # Discard entities with types other than 'Per', 'Org', 'Loc', 'Obj', 'Nat' & 'Other'.
+        # Used, typically, to eliminate dates and durations incorrectly identified as an actor.
+        if actor_type in ['Per', 'Org', 'Loc', 'Obj', 'Nat', 'Other']:
+            final_annotation.append(((actor_start_character_offset, actor_end_character_offset), actor_lexical_head, actor_type))
+
+    return final_annotation
+
+
+def _most_common(labels, ignored):
+    """
+    Parameters
+    ----------
+    labels : list[str]
+        the votes
+    ignored : str
+        label that doesn't count as a vote
+
+    Returns
+    -------
+    str
+        the most common label (ties go to the label that appeared first) or None if there are no votes
+    """
+
+    if len(labels) == 1:
+        return None if labels[0] == ignored else labels[0]
+
+    votes = {}
+    for label in labels:
+        if label != ignored:
+            votes[label] = votes.get(label, 0) + 1
+
+    if not votes:
+        return None
+
+    return max(votes, key=votes.get) # Dicts keep the insertion order, so max returns the first label with most votes
+
+
 def pairwise(iterable):
     """
     Iterate through some iterable with a lookahead.
@@ -75,3 +210,145 @@ def pairwise(iterable):
     a, b = tee(iterable)
     next(b, None)
     return zip(a, b)
+
+
+# Maximum number of characters (after the whitespace) skipped to find the next token, in align_tokens
+ALIGN_LOOKAHEAD = 64
+
+# How the tokenizers may have changed the text of some tokens (PTB quotes and brackets, curly quotes, ...)
+_TOKEN_VARIANTS = {
+    '``': ('"', '\u201c', '\u201d', "''"),
+    "''": ('"', '\u201d', '\u201c', '``'),
+    '"': ('\u201c', '\u201d', '``', "''"),
+    '`': ("'", '\u2018'),
+    "'": ('\u2019', '\u2018', '`'),
+    '-LRB-': ('(',), '-RRB-': (')',),
+    '-LSB-': ('[',), '-RSB-': (']',),
+    '-LCB-': ('{',), '-RCB-': ('}',),
+    '...': ('\u2026',),
+    '--': ('\u2014', '\u2013')
+}
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+def _token_variants(token):
+    variants = (token,) + _TOKEN_VARIANTS.get(token, ())
+    if "'" in token and len(token) > 1: # e.g. "n't" or "'s" in a text with curly apostrophes
+        variants += (token.replace("'", '\u2019'),)
+    return variants
+
+
+def align_tokens(text, tokens, start=0, max_lookahead=ALIGN_LOOKAHEAD):
+    """
+    Finds the character span of each token of a tokenization of 'text', in one forward pass over the text.
+
+    Each token is looked for right after the previous one (skipping whitespace) and, if it isn't there, in the next
+    'max_lookahead' characters, so text the tokenizer dropped is skipped. Tokens the tokenizers normalize
+    (quotes, brackets, ...) are also matched by their original forms.
+    A token not found is unmatched (its span is None) and the next tokens are looked for from the end of the last
+    token matched, so one unmatched token doesn't shift the spans of the others.
+
+    Parameters
+    ----------
+    text : str
+        the text tokenized
+    tokens : iterable[str]
+        the tokens, in the order of the text
+    start : int
+        character offset where the first token is looked for
+    max_lookahead : int
+        maximum number of characters skipped to find a token (None to look until the end of the text)
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        the character span of each token or None if it wasn't found
+    """
+
+    spans = []
+    append = spans.append
+    skip_whitespace = _WHITESPACE.match
+    startswith = text.startswith
+
+    cursor = start
+    length = len(text)
+
+    for token in tokens:
+        if not token:
+            append(None)
+            continue
+
+        position = cursor
+        if position < length and text[position].isspace():
+            position = skip_whitespace(text, position).end()
+
+        # Usually the token is right where the previous one ended
+        if startswith(token, position):
+            cursor = position + len(token)
+            append((position, cursor))
+            continue
+
+        span = None
+        variants = _token_variants(token)
+        for variant in variants[1:]:
+            if startswith(variant, position):
+                span = (position, position + len(variant))
+                break
+        else:
+            for variant in variants:
+                end = length if max_lookahead is None else min(length, position + max_lookahead + len(variant))
+                found = text.find(variant, position, end)
+                if found != -1 and (span is None or found < span[0]):
+                    span = (found, found + len(variant))
+
+        append(span)
+        if span is not None:
+            cursor = span[1]
+
+    return spans
+
+
+# Boundaries where a text is split in chunks, from the preferred one: tweets (lines), sentences and words
+_CHUNK_BOUNDARIES = (re.compile(r'\n+'), re.compile(r'(?<=[.!?])\s+'), re.compile(r'\s+'))
+
+
+def split_chunks(text, max_chars):
+    """
+    Splits 'text' in consecutive chunks of at most 'max_chars' characters, cutting at the last line break
+    (tweet boundary) of each chunk or, if a chunk has none, at the last end of sentence or whitespace.
+    Words longer than 'max_chars' are cut anyway.
+
+    Parameters
+    ----------
+    text : str
+        the text to split
+    max_chars : int
+        maximum number of characters of a chunk
+
+    Returns
+    -------
+    list[tuple[int, str]]
+        the character offset of each chunk in 'text' and its text; together, the chunks are the whole text
+    """
+
+    if max_chars <= 0:
+        raise ValueError(f"Parameter max_chars must be positive.\nInstead it was {max_chars}")
+
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        for boundary in _CHUNK_BOUNDARIES:
+            cuts = [match.end() for match in boundary.finditer(text, start + 1, end)]
+            if cuts:
+                end = cuts[-1] # After the boundary, so the next chunk starts at the next line/sentence/word
+                break
+
+        chunks.append((start, text[start:end]))
+        start = end
+
+    if start < len(text) or not chunks:
+        chunks.append((start, text[start:]))
+
+    return chunks
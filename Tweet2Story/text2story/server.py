@@ -0,0 +1,163 @@
+"""
+    text2story.server
+
+    Annotation server: loads the models once and serves narrative extraction over HTTP,
+    on a TCP address or on a Unix socket (see text2story.client for the client)
+"""
+
+import json
+import os
+import socketserver
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from text2story.annotators import load, resident_models, ACTOR_EXTRACTION_TOOLS
+from text2story.client import DEFAULT_HOST, DEFAULT_PORT, request_narrative # The client, also exported here
+from text2story.core.exceptions import InvalidLanguage, InvalidTool
+from text2story.core.narrative import Narrative
+
+WARM_UP_TEXT = "The president of France visited Lisbon yesterday. He met the prime minister at noon."
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, actor_tools=None, langs=None, warm_up=True):
+    """
+    Loads the models and creates the server (call 'serve_forever' on it to start serving).
+
+    The server answers to:
+        POST /narrative with a JSON body {"text": ..., "lang": "en", "publication_time": "YYYY-MM-DD",
+            "format": "ann" or "json", "blank_lines": true}; only "text" is required.
+            The answer is the .ann annotation (text/plain) or, for "json", the narrative (Narrative.to_dict)
+            with the time of each extraction stage.
+        GET /health with the models loaded and the time it took to load them.
+
+    Parameters
+    ----------
+    host : str
+        the address to listen on (if 'socket_path' is None)
+    port : int
+        the port to listen on (if 'socket_path' is None)
+    socket_path : str
+        path of the Unix socket to listen on, instead of a TCP address
+    actor_tools : list[str]
+        the tools used to extract the actors (every actor extraction tool if None); the other stages have one tool each
+    langs : list[str]
+        the languages whose models are loaded at start (['en'] if None)
+    warm_up : bool
+        whether to extract a narrative at start, so the first request doesn't pay for the lazy initializations
+
+    Returns
+    -------
+    socketserver.BaseServer
+        the server, ready to serve
+    """
+
+    actor_tools = list(actor_tools) if actor_tools is not None else list(ACTOR_EXTRACTION_TOOLS)
+    for tool in actor_tools:
+        if tool not in ACTOR_EXTRACTION_TOOLS:
+            raise InvalidTool(tool)
+
+    langs = list(langs) if langs is not None else ['en']
+
+    load(actor_tools + ['py_heideltime', 'allennlp'], langs)
+
+    tools = {'actors': actor_tools}
+
+    if warm_up:
+        for lang in langs:
+            narrative = Narrative(lang, WARM_UP_TEXT, datetime.now().date().isoformat())
+            try:
+                narrative.extract_all(tools)
+            except InvalidLanguage: # Some stages (AllenNLP) only support english
+                pass
+
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _ThreadingUnixHTTPServer(socket_path, _NarrativeRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _NarrativeRequestHandler)
+
+    server.tools = tools
+    server.default_lang = langs[0]
+
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, actor_tools=None, langs=None, warm_up=True):
+    """
+    Creates the server (see create_server) and serves requests until interrupted.
+    """
+
+    server = create_server(host, port, socket_path, actor_tools, langs, warm_up)
+    print(f"Serving on {socket_path if socket_path is not None else f'http://{host}:{port}'}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+class _NarrativeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+        self._send_json(200, {'status': 'ok', 'models': resident_models()})
+
+    def do_POST(self):
+        if self.path != '/narrative':
+            return self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length).decode('utf-8'))
+            text = body['text']
+            output_format = body.get('format', 'ann')
+            if not isinstance(text, str) or output_format not in ('ann', 'json'):
+                raise ValueError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return self._send_json(400, {'error': 'The body must be a JSON object with a "text" string '
+                                                  'and, optionally, "lang", "publication_time", "format" ("ann" or "json") '
+                                                  'and "blank_lines"'})
+
+        lang = body.get('lang', self.server.default_lang)
+        publication_time = body.get('publication_time') or datetime.now().date().isoformat()
+
+        try:
+            narrative = Narrative(lang, text, publication_time)
+            timings = narrative.extract_all(self.server.tools)
+        except (InvalidLanguage, InvalidTool) as e:
+            return self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            return self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+        if output_format == 'json':
+            self._send_json(200, {'narrative': narrative.to_dict(), 'timings': timings})
+        else:
+            self._send(200, narrative.ISO_annotation(body.get('blank_lines', True)), 'text/plain; charset=utf-8')
+
+    def _send_json(self, status, content):
+        self._send(status, json.dumps(content, ensure_ascii=False), 'application/json')
+
+    def _send(self, status, content, content_type):
+        data = content.encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Clients of a Unix socket have no address
+        return self.client_address[0] if self.client_address else 'unix-socket'
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
@@ -0,0 +1,399 @@
+"""
+    text2story.stream
+
+    Streaming mode: follows live topics, keeping a sliding window of tweets per topic
+    and emitting the narrative of each updated topic at a fixed interval
+"""
+
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque, OrderedDict
+from datetime import datetime
+
+from text2story.core.narrative import Narrative
+
+
+def load_topics(path):
+    """
+    Parameters
+    ----------
+    path : str
+        a CSV file with the columns 'topic' and 'tweetID', like dataset/tweetIDs_by_newsID.csv
+
+    Returns
+    -------
+    dict{str -> str}
+        the topic of each tweet ID
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return {row['tweetID']: row['topic'] for row in csv.DictReader(f)}
+
+
+def parse_tweet(line, topics_by_tweet=None):
+    """
+    Parameters
+    ----------
+    line : str
+        a JSON line with a tweet: the hydrated tweets of the Twitter API (twarc) or just {"topic", "id", "text"}
+    topics_by_tweet : dict{str -> str}
+        the topic of each tweet ID, for tweets without a 'topic' field
+
+    Returns
+    -------
+    tuple[str, str, str]
+        (topic, tweet id, text), or None if the line isn't a tweet, the tweet has no text or its topic isn't
+        a plain file name (see is_topic_name)
+    """
+    try:
+        tweet = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(tweet, dict):
+        return None
+
+    extended_tweet = tweet.get('extended_tweet')
+    tweet_id = str(tweet.get('id_str') or tweet.get('id') or '')
+    text = tweet.get('full_text') or (extended_tweet.get('full_text') if isinstance(extended_tweet, dict) else None) \
+        or tweet.get('text')
+    topic = tweet.get('topic') or (topics_by_tweet or {}).get(tweet_id)
+
+    if not text or not isinstance(text, str) or not is_topic_name(topic):
+        return None
+
+    return topic, tweet_id, ' '.join(text.split()) # One tweet per line in the narrative text
+
+
+def is_topic_name(topic):
+    """
+    Whether 'topic' can name its annotation file: a non-empty string without path separators, other than '.' and '..'
+    (the topics come from the input, so they can't point outside the output directory).
+    """
+    return isinstance(topic, str) and topic not in ('', '.', '..') and '\0' not in topic and \
+        not any(separator in topic for separator in ('/', '\\', os.sep, os.altsep) if separator)
+
+
+def annotation_path(output_dir, topic):
+    """
+    @return: the path of the annotation file of the topic, '<topic>.ann' in 'output_dir'
+    @raise ValueError: if the topic isn't a plain file name, so the file wouldn't be in 'output_dir'
+    """
+    path = os.path.join(output_dir, topic + '.ann') if is_topic_name(topic) else None
+    if path is None or os.path.dirname(os.path.abspath(path)) != os.path.abspath(output_dir):
+        raise ValueError(f"The topic {topic!r} isn't a file name in {output_dir}")
+
+    return path
+
+
+def follow(path, poll_interval=1.0, stop=None):
+    """
+    Generates the lines of the file 'path', like 'tail -f': the lines already in it and the ones written afterwards.
+
+    @param path: path of the file
+    @param poll_interval: seconds to wait for new lines
+    @param stop: threading.Event that ends the generator when set
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        partial = ''
+        while stop is None or not stop.is_set():
+            line = f.readline()
+            if not line:
+                time.sleep(poll_interval)
+                continue
+
+            partial += line
+            if partial.endswith('\n'):
+                yield partial
+                partial = ''
+
+
+class TopicWindow:
+    """
+    The last tweets of a topic, bounded by a number of tweets and/or by their age.
+
+    Attributes
+    ----------
+    tweets: deque[tuple[float, str]]
+        (time received, text) of the tweets in the window, oldest first
+    pending: int
+        number of tweets received after the last emission of the topic
+    last_seen: float
+        time the last tweet of the topic was received
+    narrative: Narrative
+        the narrative of the tweets in the window at the last emission
+    """
+
+    def __init__(self, max_tweets=None, max_age=None):
+        self.max_tweets = max_tweets
+        self.max_age = max_age
+
+        self.tweets = deque()
+        self.pending = 0
+        self.oldest_pending = None
+        self.last_seen = None
+        self.narrative = None
+
+        # Whether tweets left the window after the last emission, in which case the narrative is extracted again
+        # (otherwise the new tweets are appended to the narrative)
+        self._evicted = False
+
+    def add(self, text, now):
+        self.tweets.append((now, text))
+        self.pending += 1
+        if self.oldest_pending is None:
+            self.oldest_pending = now
+        self.last_seen = now
+
+        self.expire(now)
+
+    def expire(self, now):
+        """
+        Removes the tweets that don't fit in the window.
+        """
+        while self.tweets and (
+                (self.max_tweets is not None and len(self.tweets) > self.max_tweets) or
+                (self.max_age is not None and now - self.tweets[0][0] > self.max_age)):
+            self.tweets.popleft()
+            self._evicted = True
+
+        self.pending = min(self.pending, len(self.tweets))
+
+    def lag(self, now):
+        """
+        Seconds the oldest tweet not yet emitted has been waiting (0 if every tweet was emitted).
+        """
+        return now - self.oldest_pending if self.oldest_pending is not None else 0.0
+
+    def update_narrative(self, lang, publication_time, tools=None):
+        """
+        Updates the narrative with the tweets in the window: appending the new tweets,
+        or extracting it again if tweets left the window.
+
+        @return: the updated narrative
+        """
+        new_tweets = [text for _, text in list(self.tweets)[len(self.tweets) - self.pending:]]
+
+        if self.narrative is None or self._evicted:
+            self.narrative = Narrative(lang, '\n'.join(text for _, text in self.tweets), publication_time)
+            self.narrative.extract_all(tools)
+        elif new_tweets:
+            self.narrative.append('\n'.join(new_tweets), publication_time, tools)
+
+        self.pending = 0
+        self.oldest_pending = None
+        self._evicted = False
+
+        return self.narrative
+
+
+class StreamProcessor:
+    """
+    Keeps a window of tweets per topic and emits the narratives of the updated topics.
+
+    The memory is bounded: every window is bounded (by 'window_tweets' and/or 'window_seconds'), topics without
+    new tweets for 'topic_ttl' seconds are evicted and, above 'max_topics', the least recently seen topics are evicted.
+
+    Methods
+    -------
+    add(topic, text)
+        adds a tweet to the window of its topic
+    emit()
+        updates the narratives of the topics with new tweets, calling 'on_emit(topic, narrative, lag)' for each one
+        (a topic that fails is logged and skipped)
+    stats()
+        returns the number of topics, the tweets waiting to be emitted and the lag of each topic
+    """
+
+    def __init__(self, on_emit, lang='en', window_tweets=200, window_seconds=None, topic_ttl=3600, max_topics=1000,
+                 tools=None, clock=time.monotonic, log=print):
+        """
+        Parameters
+        ----------
+        on_emit : callable
+            called with (topic, narrative, lag in seconds) for every emitted topic
+        lang : str
+            the language of the tweets
+        window_tweets : int
+            maximum number of tweets in the window of a topic (None for no limit)
+        window_seconds : float
+            maximum age, in seconds, of the tweets in the window of a topic (None for no limit)
+        topic_ttl : float
+            seconds without new tweets after which a topic is evicted (None to keep them)
+        max_topics : int
+            maximum number of topics kept
+        tools : dict{str -> iterable[str]}
+            the tools of each stage, like in Narrative.extract_all
+        clock : callable
+            returns the current time in seconds
+        log : callable
+            called with the failures of the topics
+        """
+
+        if window_tweets is None and window_seconds is None:
+            raise ValueError("The window must be bounded by window_tweets and/or window_seconds")
+
+        self.on_emit = on_emit
+        self.lang = lang
+        self.window_tweets = window_tweets
+        self.window_seconds = window_seconds
+        self.topic_ttl = topic_ttl
+        self.max_topics = max_topics
+        self.tools = tools
+        self.clock = clock
+        self.log = log
+
+        self.windows = OrderedDict() # topic -> TopicWindow, least recently seen first
+
+    def add(self, topic, text):
+        now = self.clock()
+
+        window = self.windows.pop(topic, None)
+        if window is None:
+            window = TopicWindow(self.window_tweets, self.window_seconds)
+        self.windows[topic] = window
+
+        window.add(text, now)
+
+        while len(self.windows) > self.max_topics:
+            self.windows.popitem(last=False)
+
+    def evict(self):
+        """
+        Removes the topics without new tweets for 'topic_ttl' seconds and the tweets that left the windows.
+        """
+        now = self.clock()
+
+        if self.topic_ttl is not None:
+            while self.windows and now - next(iter(self.windows.values())).last_seen > self.topic_ttl:
+                self.windows.popitem(last=False)
+
+        for window in self.windows.values():
+            window.expire(now)
+
+    def emit(self):
+        """
+        Updates and emits the narratives of the topics with new tweets.
+        A topic whose narrative or emission fails is logged and skipped: its narrative is extracted again
+        at its next emission, and the other topics are still emitted.
+
+        @return: number of topics emitted
+        """
+        self.evict()
+
+        publication_time = datetime.now().date().isoformat()
+        emitted = 0
+        for topic, window in list(self.windows.items()):
+            if not window.pending:
+                continue
+
+            lag = window.lag(self.clock())
+            try:
+                self.on_emit(topic, window.update_narrative(self.lang, publication_time, self.tools), lag)
+            except Exception as e:
+                window.narrative = None # It may be partly updated
+                self.log(f"Failed {topic} - {type(e).__name__}: {e}")
+                continue
+            emitted += 1
+
+        return emitted
+
+    def stats(self):
+        """
+        @return: dict with the number of topics ('topics'), the tweets waiting to be emitted ('pending')
+        and the lag, in seconds, of each topic with tweets waiting ('lag')
+        """
+        now = self.clock()
+        return {
+            'topics': len(self.windows),
+            'pending': sum(window.pending for window in self.windows.values()),
+            'lag': {topic: window.lag(now) for topic, window in self.windows.items() if window.pending}
+        }
+
+
+def run(lines, output_dir, topics_by_tweet=None, emit_interval=60.0, max_backlog=10000, log=print, **window_options):
+    """
+    Reads the tweets of 'lines' (e.g. sys.stdin or follow(path)) in a background thread and,
+    every 'emit_interval' seconds, writes the narrative of each updated topic to '<topic>.ann' in 'output_dir'.
+    Runs until the lines end (and emits the last updates) or until interrupted.
+
+    Parameters
+    ----------
+    lines : iterable[str]
+        JSON lines with the tweets (see parse_tweet)
+    output_dir : str
+        directory of the annotation files
+    topics_by_tweet : dict{str -> str}
+        the topic of each tweet ID (see load_topics)
+    emit_interval : float
+        seconds between emissions
+    max_backlog : int
+        maximum number of tweets read and not yet in a window; the reader waits while the backlog is full
+    log : callable
+        called with the progress messages (backlog and lag of each emission)
+    window_options
+        the options of StreamProcessor (lang, window_tweets, window_seconds, topic_ttl, max_topics, tools)
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    def write(topic, narrative, lag):
+        path = annotation_path(output_dir, topic)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            narrative.write_ISO_annotation(f)
+        os.replace(path + '.tmp', path)
+
+        log(f"Emitted {topic} - {len(narrative.text.splitlines())} tweets, lag {round(lag, 2)} seconds")
+
+    processor = StreamProcessor(write, log=log, **window_options)
+
+    backlog = queue.Queue(maxsize=max_backlog)
+    end = object()
+
+    def read():
+        try:
+            for line in lines:
+                try:
+                    tweet = parse_tweet(line, topics_by_tweet)
+                except Exception as e: # A malformed line is skipped, it doesn't end the stream
+                    log(f"Skipped a line - {type(e).__name__}: {e}")
+                    continue
+                if tweet is not None:
+                    backlog.put(tweet)
+        finally:
+            backlog.put(end)
+
+    threading.Thread(target=read, daemon=True).start()
+
+    next_emission = time.monotonic() + emit_interval
+    finished = False
+    try:
+        while not finished:
+            try:
+                tweet = backlog.get(timeout=max(0.0, next_emission - time.monotonic()))
+                if tweet is end:
+                    finished = True
+                else:
+                    topic, _, text = tweet
+                    processor.add(topic, text)
+            except queue.Empty:
+                pass
+
+            if finished or time.monotonic() >= next_emission:
+                stats = processor.stats()
+                log(f"Backlog - {backlog.qsize()} tweets unread, {stats['pending']} tweets waiting in {stats['topics']} topics"
+                    + (f", max lag {round(max(stats['lag'].values()), 2)} seconds" if stats['lag'] else ""))
+
+                processor.emit()
+                next_emission = time.monotonic() + emit_interval
+    except KeyboardInterrupt:
+        pass
+
+    return processor
+
+
+def stdin_lines():
+    return iter(sys.stdin.readline, '')
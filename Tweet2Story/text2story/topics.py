@@ -0,0 +1,199 @@
+"""
+    text2story.topics
+
+    Topic corpus runner: extracts the narrative of every topic (the tweets of a news topic, as grouped in
+    dataset/tweetIDs_by_newsID.csv), sharding the topics across worker processes
+"""
+
+import heapq
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from time import perf_counter
+
+from text2story.core import model_store, result_cache
+from text2story.core.narrative import Narrative
+from text2story.stream import annotation_path, load_topics, parse_tweet
+
+
+def read_topics(tweets_path, topics_path=None):
+    """
+    Groups the tweets by topic.
+
+    Parameters
+    ----------
+    tweets_path : str
+        JSON lines file with the tweets (e.g. hydrated with twarc, see parse_tweet)
+    topics_path : str
+        CSV with the topic of each tweet ID (dataset/tweetIDs_by_newsID.csv), for tweets without a 'topic' field
+
+    Returns
+    -------
+    dict{str -> str}
+        the text of each topic (its tweets, one per line, in the order of the file); tweets whose topic isn't
+        a file name are left out (see stream.parse_tweet)
+    """
+
+    topics_by_tweet = load_topics(topics_path) if topics_path is not None else None
+
+    tweets = {}
+    with open(tweets_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            tweet = parse_tweet(line, topics_by_tweet)
+            if tweet is not None:
+                topic, _, text = tweet
+                tweets.setdefault(topic, []).append(text)
+
+    return {topic: '\n'.join(texts) for topic, texts in tweets.items()}
+
+
+def shard(sizes, shards):
+    """
+    Splits the topics in 'shards' shards with about the same total size (longest processing time first:
+    the biggest topics are placed first, each one in the shard with the smallest total so far).
+
+    Parameters
+    ----------
+    sizes : dict{str -> int}
+        the estimated size (e.g. number of characters) of each topic
+    shards : int
+        number of shards
+
+    Returns
+    -------
+    list[list[str]]
+        the topics of each shard, biggest first; shards can be empty if there are fewer topics than shards
+    """
+
+    if shards < 1:
+        raise ValueError(f"Parameter shards must be positive.\nInstead it was {shards}")
+
+    assignment = [[] for _ in range(shards)]
+    loads = [(0, i) for i in range(shards)] # (total size, shard), as a heap
+
+    for topic in sorted(sizes, key=lambda topic: (-sizes[topic], topic)):
+        total, i = heapq.heappop(loads)
+        assignment[i].append(topic)
+        heapq.heappush(loads, (total + sizes[topic], i))
+
+    return assignment
+
+
+def run(texts, output_dir, processes=None, lang='en', publication_time=None, tools=None, chunk_size=None, log=print):
+    """
+    Extracts the narrative of every topic to '<topic>.ann' in 'output_dir'.
+
+    The topics are split in one shard per process, balanced by text size (see shard), so a huge topic doesn't
+    leave the other processes idle at the end. Each process loads the models once and writes the annotation
+    of each topic as soon as it's extracted.
+
+    Parameters
+    ----------
+    texts : dict{str -> str}
+        the text of each topic (see read_topics)
+    output_dir : str
+        directory of the annotation files
+    processes : int
+        number of worker processes (the number of CPUs if None)
+    lang : str
+        the language of the texts
+    publication_time : str
+        the publication time of the texts (today if None)
+    tools : dict{str -> iterable[str]}
+        the tools of each stage, like in Narrative.extract_all
+    chunk_size : int
+        maximum number of characters of a topic annotated at once, like in Narrative.extract_all
+        (None for the whole topic)
+    log : callable
+        called with the progress messages
+
+    Returns
+    -------
+    dict
+        'annotated' and 'failed' (numbers of topics) and 'seconds'
+    """
+
+    processes = processes or os.cpu_count() or 1
+    publication_time = publication_time or datetime.now().date().isoformat()
+    os.makedirs(output_dir, exist_ok=True)
+
+    if not texts:
+        return {'annotated': 0, 'failed': 0, 'seconds': 0.0}
+
+    shards = [topics for topics in shard({topic: len(text) for topic, text in texts.items()}, processes) if topics]
+    for i, topics in enumerate(shards):
+        log(f"Shard {i} - {len(topics)} topics, {sum(len(texts[topic]) for topic in topics)} characters")
+
+    start = perf_counter()
+
+    # The workers are fresh interpreters, so the model directory, the offline mode and the result cache
+    # of this process are set up again in each one
+    cache = result_cache.get_cache()
+    settings = (model_store.get_model_dir(), model_store.is_offline(),
+                cache.path if cache is not None else None, cache.max_size if cache is not None else None)
+
+    annotated, failed = 0, 0
+    context = multiprocessing.get_context('spawn') # Fresh processes, without the threads and models of this one
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=len(shards), mp_context=context,
+                                                           initializer=_init_worker, initargs=settings) as executor:
+        progress = manager.Queue()
+        futures = [
+            executor.submit(_run_shard, [(topic, texts[topic]) for topic in topics], output_dir, lang, publication_time,
+                            tools, chunk_size, progress)
+            for topics in shards
+        ]
+
+        while annotated + failed < len(texts):
+            try:
+                topic, seconds, error = progress.get(timeout=1)
+            except queue.Empty:
+                if all(future.done() for future in futures):
+                    break # A worker died; its exception is raised below
+                continue
+
+            if error is None:
+                annotated += 1
+                log(f"[{annotated + failed}/{len(texts)}] Annotated {topic} - {round(seconds, 2)} seconds")
+            else:
+                failed += 1
+                log(f"[{annotated + failed}/{len(texts)}] Failed {topic} - {error}")
+
+        for future in futures:
+            future.result()
+
+    return {'annotated': annotated, 'failed': failed, 'seconds': perf_counter() - start}
+
+
+def _init_worker(model_dir, offline, cache_path, cache_size):
+    """
+    Sets up a worker process like the process that started it: its model directory and offline mode
+    (see core.model_store) and, if 'cache_path' isn't None, its result cache (see core.result_cache).
+    """
+
+    model_store.configure(model_dir, offline)
+    if cache_path is not None:
+        result_cache.enable(cache_path, cache_size)
+
+
+def _run_shard(topics, output_dir, lang, publication_time, tools, chunk_size, progress):
+    """
+    Extracts the narratives of the topics of a shard, in a worker process, one after the other
+    (the models are loaded by the first one), reporting each topic to 'progress'.
+    """
+
+    for topic, text in topics:
+        start = perf_counter()
+        try:
+            path = annotation_path(output_dir, topic) # Before the extraction, a topic that isn't a file name fails fast
+            narrative = Narrative(lang, text, publication_time)
+            narrative.extract_all(tools, chunk_size=chunk_size)
+
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                narrative.write_ISO_annotation(f)
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            progress.put((topic, perf_counter() - start, f"{type(e).__name__}: {e}"))
+        else:
+            progress.put((topic, perf_counter() - start, None))
@@ -35,6 +35,9 @@ SRL_TYPE_MAPPING = {
     "REC": "instrument"  # REC = reciprocal
 }
 
+# Number of sentences sent together to the SRL predictor
+BATCH_SIZE = 32
+
 ROOT_PATH = os.path.join(Path(__file__).parent)
 TEST_FILES = os.path.join(ROOT_PATH, "CaRB", "data")
 EVAL_DIR = os.path.join(ROOT_PATH, "CaRB", "system_outputs", "test")
@@ -52,6 +55,19 @@ def pairwise(iterable):
     return zip(a, b, c)
 
 
+def predict_srl(sentences, batch_size=BATCH_SIZE):
+    # Batches of sentences of about the same length (less padding), predictions in the order of the sentences
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i].split()))
+
+    srl = [None] * len(sentences)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        for i, result in zip(batch, predictor.predict_batch_json([{"sentence": sentences[i]} for i in batch])):
+            srl[i] = result
+
+    return srl
+
+
 def normalize_sent_tags(sentence_df):
     normalized_tags, begin_tags = [], []
     for col in np.arange(len(sentence_df.columns)):
@@ -185,12 +201,7 @@ if __name__ == '__main__':
     sentences = tweets.split("\n")
 
     # SEMANTIC ROLE LABELLING #
-    srl = []
-    for sent in sentences:
-        result = predictor.predict(
-            sentence=sent
-        )
-        srl.append(result)
+    srl = predict_srl(sentences)
 
     # 1. DATAFRAME COM TODAS AS PALAVRAS E AS SUAS TAGS #
     dfs_by_sent = []